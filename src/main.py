@@ -1,14 +1,15 @@
 import sys
+import multiprocessing
 from pathlib import Path
 from PyQt6.QtWidgets import (
     QApplication, QLabel, QComboBox, QMessageBox,
     QWidget, QVBoxLayout, QPushButton, QHBoxLayout, QStackedWidget
 )
-from PyQt6.QtCore import Qt, QSize, QEvent, QPropertyAnimation, QEasingCurve
+from PyQt6.QtCore import Qt, QSize, QEvent, QPropertyAnimation, QEasingCurve, QSettings
 from PyQt6.QtGui import QPixmap, QIcon, QEnterEvent
 
 # Business/Logic
-from services.ProcessamentoAgitel import ProcessadorAgitel
+from services.ProcessadorAgitel import ProcessadorAgitel, ProcessadorAgitelLote
 
 # UI/Interface
 from qt_ui.HomeScreen import HomeScreen
@@ -23,6 +24,8 @@ from qt_ui.IPreenchimentoContrato import PainelPreenchimentoContrato
 # Utils/Modules
 from utils.windowManager import ResizableWindow
 from utils.themeManager import GerenTema
+from utils.appPaths import app_path
+from utils.stageTimer import StageTimer
 
 
 class AnimatedButton(QPushButton):
@@ -56,7 +59,10 @@ class MainApp(ResizableWindow):
 
         super().__init__(title_bar=self.barra_titulo)
 
-        self.settings_path = "config.ini"
+        self.settings_path = app_path("config.ini")
+        # Trace de tempos de cada execução (le_helper_tempos) só com salvar_tempos=true no config.ini
+        if QSettings(self.settings_path, QSettings.Format.IniFormat).value("salvar_tempos", False, type=bool):
+            StageTimer.trace_dir = app_path(StageTimer.TRACE_DIR)
         self._initialize_ui()
         self._setup_connections()
         self._finalize_ui_setup()
@@ -222,12 +228,36 @@ class MainApp(ResizableWindow):
         self.layout.addWidget(self.central_content, stretch=1)
 
     def _iniciar_processamento_agitel(self):
-        file_path = self.processamento_agitel.get_file_path()
+        file_paths = self.processamento_agitel.get_file_paths()
         equalize = self.processamento_agitel.get_equalize_option()
-        if not file_path:
+        workers = self.processamento_agitel.get_workers()
+        output_format = self.processamento_agitel.get_output_format()
+        use_cache = self.processamento_agitel.get_cache_option()
+        summary = self.processamento_agitel.get_summary_option()
+        summary_only = self.processamento_agitel.get_summary_only_option()
+        memory_limit_mb = self.processamento_agitel.get_memory_limit()
+        dedup = self.processamento_agitel.get_dedup_option()
+        history_path = self.processamento_agitel.get_history_path()
+        if not file_paths:
             QMessageBox.warning(self, "Aviso", "Selecione um arquivo Excel.")
             return
-        self.controller_agitel = ProcessadorAgitel(file_path=file_path, equalize=equalize)
+        if len(file_paths) > 1:
+            # Lote: um arquivo por processo, até `workers` ao mesmo tempo
+            self.controller_agitel = ProcessadorAgitelLote(
+                file_paths=file_paths, equalize=equalize, workers=workers,
+                output_format=output_format, use_cache=use_cache,
+                combined_output=self.processamento_agitel.get_combined_option(),
+                summary=summary, summary_only=summary_only, memory_limit_mb=memory_limit_mb,
+                dedup=dedup, history_path=history_path
+            )
+            self.controller_agitel.fileStatusUpdated.connect(self.processamento_agitel.update_file_status)
+        else:
+            self.controller_agitel = ProcessadorAgitel(
+                file_path=file_paths[0], equalize=equalize, workers=workers,
+                output_format=output_format, use_cache=use_cache,
+                summary=summary, summary_only=summary_only, memory_limit_mb=memory_limit_mb,
+                dedup=dedup, history_path=history_path
+            )
         self.controller_agitel.progressUpdated.connect(self.processamento_agitel.update_progress)
         self.controller_agitel.processFinished.connect(self.processamento_agitel.on_process_finished)
         self.controller_agitel.errorOccurred.connect(self.processamento_agitel.show_error)
@@ -286,6 +316,8 @@ class MainApp(ResizableWindow):
 
 
 if __name__ == "__main__":
+    # Necessário para o pool de processos do Agitel no executável (PyInstaller/Windows)
+    multiprocessing.freeze_support()
     app = QApplication(sys.argv)
     main_window = MainApp()
     main_window.mostrar_home()
@@ -14,6 +14,7 @@ from utils.sheetStyles import (
     estilo_label_dark
 )
 from services.AutomacaoColeta import TarefaAutomacao, PararAutomacao
+from utils.appPaths import app_path
 
 class PainelAutomacaoColeta(QWidget):
     def __init__(self, parent=None):
@@ -89,14 +90,14 @@ class PainelAutomacaoColeta(QWidget):
         layout.addWidget(self.log_faturas)
 
     def carregar_configuracoes(self):
-        cfg = QSettings("config.ini", QSettings.Format.IniFormat)
+        cfg = QSettings(app_path("config.ini"), QSettings.Format.IniFormat)
         self.pasta_salvamento = cfg.value("pasta_salvamento", "")
         self.caminho_dados = cfg.value("caminho_dados", "")
         self.campo_pasta.setText(self.pasta_salvamento)
         self.campo_planilha.setText(self.caminho_dados)
 
     def salvar_configuracoes(self):
-        cfg = QSettings("config.ini", QSettings.Format.IniFormat)
+        cfg = QSettings(app_path("config.ini"), QSettings.Format.IniFormat)
         cfg.setValue("pasta_salvamento", self.pasta_salvamento)
         cfg.setValue("caminho_dados", self.caminho_dados)
 
@@ -4,7 +4,7 @@ from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QGridLayout, QPushButton, QLineEdit,
     QFileDialog, QProgressBar, QTableWidget, QTableWidgetItem,
     QLabel, QHBoxLayout, QHeaderView, QTextEdit,
-    QAbstractItemView, QDialog, QCheckBox, QScrollArea
+    QAbstractItemView, QDialog, QCheckBox, QScrollArea, QComboBox
 )
 from PyQt6.QtCore import QThread, pyqtSlot, QSettings
 from openpyxl.utils import get_column_letter
@@ -15,6 +15,8 @@ from utils.sheetStyles import (
     estilo_tabela_dark, estilo_tabela_light,
     estilo_progress_bar_light, estilo_progress_bar_dark,
     estilo_log_light, estilo_log_dark,
+    estilo_combo_box_light, estilo_combo_box_dark,
+    estilo_check_box_light, estilo_check_box_dark,
     estilo_hover
 )
 from services.MesclaPlanilhas import PlanilhaMesclagemWorker
@@ -25,6 +27,8 @@ class PainelMesclaPlanilha(QWidget):
         super().__init__(parent)
         self.is_dark_mode = False
         self.colunas_base = set()
+        self.cabecalhos_base = []
+        self.colunas_chave = set()
         self.cancelar_processo = False
         self.worker_thread = None
         self.init_ui()
@@ -62,6 +66,16 @@ class PainelMesclaPlanilha(QWidget):
         self.text_nome_saida = QLineEdit()
         self.text_nome_saida.setPlaceholderText("planilha_mesclada")
 
+        self.label_memoria = QLabel("Limite de memória:")
+        self.combo_memoria = QComboBox()
+        self.combo_memoria.setFixedWidth(120)
+        self.combo_memoria.addItems(["Sem limite", "256 MB", "512 MB", "1024 MB", "2048 MB"])
+
+        self.label_workers = QLabel("Processos de leitura:")
+        self.combo_workers = QComboBox()
+        self.combo_workers.setFixedWidth(120)
+        self.combo_workers.addItems([str(n) for n in range(1, (os.cpu_count() or 1) + 1)])
+
         grid.addWidget(self.label_pasta, 0, 0)
         grid.addWidget(self.text_pasta, 0, 1)
         grid.addWidget(self.btn_selecionar_pasta, 0, 2)
@@ -73,6 +87,24 @@ class PainelMesclaPlanilha(QWidget):
         grid.addWidget(self.label_saida, 2, 0)
         grid.addWidget(self.text_nome_saida, 2, 1, 1, 1)
 
+        grid.addWidget(self.label_memoria, 3, 0)
+        grid.addWidget(self.combo_memoria, 3, 1)
+
+        grid.addWidget(self.label_workers, 4, 0)
+        grid.addWidget(self.combo_workers, 4, 1)
+
+        self.checkbox_por_nome = QCheckBox("Mapear colunas pelo nome do cabeçalho")
+        grid.addWidget(self.checkbox_por_nome, 5, 0, 1, 2)
+
+        self.checkbox_incremental = QCheckBox("Mesclagem incremental (só arquivos novos ou alterados)")
+        grid.addWidget(self.checkbox_incremental, 6, 0, 1, 2)
+
+        self.checkbox_dedup = QCheckBox("Remover linhas duplicadas")
+        self.btn_colunas_chave = QPushButton("Colunas da Chave")
+        self.btn_colunas_chave.clicked.connect(self.selecionar_colunas_chave)
+        grid.addWidget(self.checkbox_dedup, 7, 0, 1, 2)
+        grid.addWidget(self.btn_colunas_chave, 7, 2)
+
         self.layout().addLayout(grid)
 
     def _create_table(self):
@@ -123,7 +155,7 @@ class PainelMesclaPlanilha(QWidget):
         table_style = estilo_tabela_dark() if is_dark_mode else estilo_tabela_light()
         log_style = estilo_log_dark() if is_dark_mode else estilo_log_light()
 
-        for label in [self.label_pasta, self.label_base, self.label_saida]:
+        for label in [self.label_pasta, self.label_base, self.label_saida, self.label_memoria, self.label_workers]:
             label.setStyleSheet(label_style)
             
         for line_edit in [self.text_pasta, self.text_arquivo_base, self.text_nome_saida]:
@@ -131,9 +163,13 @@ class PainelMesclaPlanilha(QWidget):
             
         self.progress_bar.setStyleSheet(progress_style)
         self.tabela_arquivos.setStyleSheet(table_style)
+        for combo in [self.combo_memoria, self.combo_workers]:
+            combo.setStyleSheet(estilo_combo_box_dark() if is_dark_mode else estilo_combo_box_light())
+        for checkbox in [self.checkbox_por_nome, self.checkbox_incremental, self.checkbox_dedup]:
+            checkbox.setStyleSheet(estilo_check_box_dark() if is_dark_mode else estilo_check_box_light())
         self.text_log.setStyleSheet(log_style)
 
-        for button in [self.btn_selecionar_pasta, self.btn_selecionar_base, 
+        for button in [self.btn_selecionar_pasta, self.btn_selecionar_base, self.btn_colunas_chave,
                     self.btn_mesclar, self.btn_cancelar]:
             estilo_hover(button, is_dark_mode)
 
@@ -188,6 +224,8 @@ class PainelMesclaPlanilha(QWidget):
             dialogo = DialogoSelecaoColunas(cabecalhos, self)
             if dialogo.exec() == QDialog.DialogCode.Accepted:
                 self.colunas_base = set(dialogo.colunas_selecionadas())
+                self.cabecalhos_base = cabecalhos
+                self.colunas_chave = set()
                 self.append_log(f"🔖 Colunas base selecionadas: {len(self.colunas_base)} colunas")
                 
         except Exception as e:
@@ -195,6 +233,19 @@ class PainelMesclaPlanilha(QWidget):
         finally:
             wb.close()
 
+    def selecionar_colunas_chave(self):
+        if not self.colunas_base:
+            self.append_log("⚠️ Selecione as colunas base!")
+            return
+        indices = sorted(self.colunas_base)
+        dialogo = DialogoSelecaoColunas(
+            [self.cabecalhos_base[idx] if idx < len(self.cabecalhos_base) else None for idx in indices], self, indices
+        )
+        if dialogo.exec() == QDialog.DialogCode.Accepted:
+            self.colunas_chave = set(dialogo.colunas_selecionadas())
+            self.checkbox_dedup.setChecked(True)
+            self.append_log(f"🔑 Chave de duplicidade: {len(self.colunas_chave) or len(self.colunas_base)} colunas")
+
     @pyqtSlot()
     def iniciar_mesclagem(self):
         if not self.validar_campos():
@@ -210,7 +261,14 @@ class PainelMesclaPlanilha(QWidget):
             arquivos,
             self.text_pasta.text(),
             self.text_nome_saida.text() or "planilha_mesclada",
-            self.colunas_base
+            self.colunas_base,
+            self.get_limite_memoria(),
+            workers=self.get_workers(),
+            por_nome=self.checkbox_por_nome.isChecked(),
+            incremental=self.checkbox_incremental.isChecked(),
+            dedup=self.checkbox_dedup.isChecked(),
+            colunas_chave=self.colunas_chave,
+            arquivo_base=self.text_arquivo_base.text() or None
         )
         
         self.worker.moveToThread(self.worker_thread)
@@ -220,12 +278,21 @@ class PainelMesclaPlanilha(QWidget):
         self.worker.atualizar_status.connect(self.atualizar_status_arquivo)
         self.worker.concluido.connect(self.processamento_concluido)
         self.worker.erro.connect(self.mostrar_erro)
+        self.worker.tempos.connect(self.append_log)
+        self.worker.aviso.connect(lambda mensagem: self.append_log(f"⚠️ {mensagem}"))
         
         self.btn_mesclar.setEnabled(False)
         self.btn_cancelar.setEnabled(True)
         self.worker_thread.start()
         self.append_log("⏳ Iniciando processo de mesclagem...")
 
+    def get_limite_memoria(self):
+        texto = self.combo_memoria.currentText()
+        return None if texto == "Sem limite" else int(texto.split()[0])
+
+    def get_workers(self):
+        return int(self.combo_workers.currentText())
+
     def validar_campos(self):
         if not self.text_pasta.text():
             self.append_log("⚠️ Selecione uma pasta contendo os arquivos!")
@@ -264,7 +331,7 @@ class PainelMesclaPlanilha(QWidget):
 
 
 class DialogoSelecaoColunas(QDialog):
-    def __init__(self, cabecalhos, parent=None):
+    def __init__(self, cabecalhos, parent=None, indices=None):
         super().__init__(parent)
         self.setWindowTitle("Selecionar Colunas")
         self.setMinimumSize(400, 300)
@@ -275,7 +342,8 @@ class DialogoSelecaoColunas(QDialog):
         self.layout_colunas = QVBoxLayout(self.widget)
         
         self.checkboxes = []
-        for idx, cabecalho in enumerate(cabecalhos):
+        # indices: coluna de cada cabeçalho na planilha, quando a lista não começa na coluna A
+        for idx, cabecalho in zip(indices or range(len(cabecalhos)), cabecalhos):
             cb = QCheckBox(f"{cabecalho} (Coluna {get_column_letter(idx + 1)})")
             cb.setChecked(True)
             self.checkboxes.append((cb, idx))
@@ -2,17 +2,23 @@ import os
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QGridLayout, QPushButton, QLineEdit,
     QFileDialog, QProgressBar, QTextEdit, QCheckBox,
-    QLabel, QHBoxLayout
+    QLabel, QHBoxLayout, QComboBox, QTableWidget, QTableWidgetItem,
+    QHeaderView, QAbstractItemView
 )
 from PyQt6.QtCore import pyqtSignal, pyqtSlot, QSettings, Qt
 from utils.sheetStyles import (
     estilo_label_light, estilo_label_dark,
     campo_qline_light, campo_qline_dark,
     estilo_check_box_light, estilo_check_box_dark,
+    estilo_combo_box_light, estilo_combo_box_dark,
     estilo_log_light, estilo_log_dark,
     estilo_progress_bar_light, estilo_progress_bar_dark,
+    estilo_tabela_light, estilo_tabela_dark,
     estilo_hover
 )
+from services.HistoricoAgitel import HistoricoAgitel
+from services.RegioesAgitel import RegioesAgitel
+from services.ProcessamentoAgitelLote import MotorAgitelLote
 
 class PainelProcessamentoAgitel(QWidget):
     processStarted = pyqtSignal()
@@ -23,6 +29,9 @@ class PainelProcessamentoAgitel(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.is_dark_mode = False
+        self.file_paths = []
+        # Primeira abertura: grava as regras padrão da Região para o usuário editar
+        RegioesAgitel.criar_arquivo_padrao()
         self.init_ui()
         self._connect_signals()
 
@@ -32,6 +41,7 @@ class PainelProcessamentoAgitel(QWidget):
         self.layout().setSpacing(10)
 
         self._create_file_controls()
+        self._create_table()
         self._create_progress_bar()
         self._create_results_area()
 
@@ -41,18 +51,42 @@ class PainelProcessamentoAgitel(QWidget):
         grid.setHorizontalSpacing(15)
         grid.setColumnStretch(1, 1)
 
-        self.label_file = QLabel("Arquivo XLSX (Planilha da Agitel):")
+        self.label_file = QLabel("Arquivo(s) XLSX (Planilha da Agitel):")
         self.text_file = QLineEdit()
         self.text_file.setReadOnly(True)
 
         self.btn_select_file = QPushButton("Selecionar Arquivo")
         self.btn_select_file.setFixedSize(160, 32)
+        self.btn_select_folder = QPushButton("Selecionar Pasta")
+        self.btn_select_folder.setFixedSize(160, 32)
         self.btn_process = QPushButton("Processar")
         self.btn_process.setFixedSize(160, 32)
         self.checkbox_equalize = QCheckBox("Equalizar 'Região'")
+        self.checkbox_cache = QCheckBox("Reaproveitar abas sem alterações")
+        self.checkbox_combined = QCheckBox("Saída combinada (lote)")
+        self.checkbox_summary = QCheckBox("Gerar resumo")
+        self.checkbox_summary_only = QCheckBox("Somente resumo")
+        self.checkbox_dedup = QCheckBox("Remover chamadas duplicadas")
+        self.checkbox_history = QCheckBox("Salvar no histórico")
+
+        self.label_workers = QLabel("Processos:")
+        self.combo_workers = QComboBox()
+        self.combo_workers.setFixedWidth(70)
+        self.combo_workers.addItems([str(n) for n in range(1, (os.cpu_count() or 1) + 1)])
+
+        self.label_format = QLabel("Formato de saída:")
+        self.combo_format = QComboBox()
+        self.combo_format.setFixedWidth(100)
+        self.combo_format.addItems(["XLSX", "CSV", "Parquet"])
+
+        self.label_memory = QLabel("Limite de memória:")
+        self.combo_memory = QComboBox()
+        self.combo_memory.setFixedWidth(120)
+        self.combo_memory.addItems(["Sem limite", "256 MB", "512 MB", "1024 MB", "2048 MB"])
 
         button_layout = QHBoxLayout()
         button_layout.addWidget(self.btn_select_file)
+        button_layout.addWidget(self.btn_select_folder)
         button_layout.addWidget(self.btn_process)
         button_layout.setSpacing(10)
 
@@ -61,11 +95,49 @@ class PainelProcessamentoAgitel(QWidget):
         grid.addLayout(button_layout, 0, 2)
         grid.addWidget(self.checkbox_equalize, 0, 3, Qt.AlignmentFlag.AlignLeft)
 
+        options_layout = QHBoxLayout()
+        options_layout.addWidget(self.label_workers)
+        options_layout.addWidget(self.combo_workers)
+        options_layout.addSpacing(15)
+        options_layout.addWidget(self.label_format)
+        options_layout.addWidget(self.combo_format)
+        options_layout.addSpacing(15)
+        options_layout.addWidget(self.checkbox_cache)
+        options_layout.addSpacing(15)
+        options_layout.addWidget(self.checkbox_combined)
+        options_layout.addStretch()
+        grid.addLayout(options_layout, 1, 1)
+
+        summary_layout = QHBoxLayout()
+        summary_layout.addWidget(self.checkbox_summary)
+        summary_layout.addSpacing(15)
+        summary_layout.addWidget(self.checkbox_summary_only)
+        summary_layout.addSpacing(15)
+        summary_layout.addWidget(self.label_memory)
+        summary_layout.addWidget(self.combo_memory)
+        summary_layout.addSpacing(15)
+        summary_layout.addWidget(self.checkbox_dedup)
+        summary_layout.addSpacing(15)
+        summary_layout.addWidget(self.checkbox_history)
+        summary_layout.addStretch()
+        grid.addLayout(summary_layout, 2, 1)
+
         self.btn_select_file.clicked.connect(self._emit_select_file)
+        self.btn_select_folder.clicked.connect(self._emit_select_folder)
         self.btn_process.clicked.connect(self._emit_process_file)
 
         self.layout().addLayout(grid)
 
+    def _create_table(self):
+        # Status por arquivo, visível apenas no processamento em lote
+        self.tabela_arquivos = QTableWidget(0, 2)
+        self.tabela_arquivos.setHorizontalHeaderLabels(["Arquivo", "Status"])
+        self.tabela_arquivos.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        self.tabela_arquivos.verticalHeader().hide()
+        self.tabela_arquivos.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.tabela_arquivos.hide()
+        self.layout().addWidget(self.tabela_arquivos)
+
     def _create_progress_bar(self):
         self.progress_bar = QProgressBar()
         self.progress_bar.setRange(0, 100)
@@ -84,17 +156,28 @@ class PainelProcessamentoAgitel(QWidget):
             'label': estilo_label_dark() if is_dark_mode else estilo_label_light(),
             'line': campo_qline_dark() if is_dark_mode else campo_qline_light(),
             'check': estilo_check_box_dark() if is_dark_mode else estilo_check_box_light(),
+            'combo': estilo_combo_box_dark() if is_dark_mode else estilo_combo_box_light(),
             'log': estilo_log_dark() if is_dark_mode else estilo_log_light(),
-            'progress': estilo_progress_bar_dark() if is_dark_mode else estilo_progress_bar_light()
+            'progress': estilo_progress_bar_dark() if is_dark_mode else estilo_progress_bar_light(),
+            'table': estilo_tabela_dark() if is_dark_mode else estilo_tabela_light()
         }
 
         self.label_file.setStyleSheet(styles['label'])
+        for label in [self.label_workers, self.label_format, self.label_memory]:
+            label.setStyleSheet(styles['label'])
+        for combo in [self.combo_workers, self.combo_format, self.combo_memory]:
+            combo.setStyleSheet(styles['combo'])
         self.text_file.setStyleSheet(styles['line'])
         self.checkbox_equalize.setStyleSheet(styles['check'])
+        self.checkbox_cache.setStyleSheet(styles['check'])
+        for checkbox in [self.checkbox_combined, self.checkbox_summary, self.checkbox_summary_only,
+                         self.checkbox_dedup, self.checkbox_history]:
+            checkbox.setStyleSheet(styles['check'])
+        self.tabela_arquivos.setStyleSheet(styles['table'])
         self.text_results.setStyleSheet(styles['log'])
         self.progress_bar.setStyleSheet(styles['progress'])
 
-        for btn in [self.btn_select_file, self.btn_process]:
+        for btn in [self.btn_select_file, self.btn_select_folder, self.btn_process]:
             estilo_hover(btn, is_dark_mode)
 
     def _connect_signals(self):
@@ -105,13 +188,39 @@ class PainelProcessamentoAgitel(QWidget):
     def _emit_select_file(self):
         settings = QSettings("LivreEscolha", "LE_Helper")
         last_dir = settings.value("last_open_dir", "")
-        file_path, _ = QFileDialog.getOpenFileName(
-            self, "Selecionar Arquivo Excel", last_dir, "Excel Files (*.xlsx)"
+        file_paths, _ = QFileDialog.getOpenFileNames(
+            self, "Selecionar Arquivo(s) Excel", last_dir, "Excel Files (*.xlsx)"
         )
-        if file_path:
-            self.text_file.setText(file_path)
-            settings.setValue("last_open_dir", os.path.dirname(file_path))
-            self.append_log(f"📂 Arquivo selecionado: {os.path.basename(file_path)}")
+        if file_paths:
+            settings.setValue("last_open_dir", os.path.dirname(file_paths[0]))
+            if len(file_paths) == 1:
+                self._set_files(file_paths, file_paths[0])
+                self.append_log(f"📂 Arquivo selecionado: {os.path.basename(file_paths[0])}")
+            else:
+                self._set_files(file_paths, f"{len(file_paths)} arquivos selecionados")
+                self.append_log(f"📑 {len(file_paths)} arquivos selecionados")
+
+    def _emit_select_folder(self):
+        settings = QSettings("LivreEscolha", "LE_Helper")
+        folder = QFileDialog.getExistingDirectory(
+            self, "Selecionar Pasta", settings.value("last_open_dir", "")
+        )
+        if folder:
+            settings.setValue("last_open_dir", folder)
+            file_paths = MotorAgitelLote.list_folder(folder)
+            self._set_files(file_paths, folder)
+            self.append_log(f"📑 {len(file_paths)} arquivos encontrados na pasta")
+
+    def _set_files(self, file_paths, label):
+        self.file_paths = file_paths
+        self.text_file.setText(label if file_paths else "")
+        self.tabela_arquivos.setRowCount(0)
+        for file_path in file_paths:
+            row = self.tabela_arquivos.rowCount()
+            self.tabela_arquivos.insertRow(row)
+            self.tabela_arquivos.setItem(row, 0, QTableWidgetItem(os.path.basename(file_path)))
+            self.tabela_arquivos.setItem(row, 1, QTableWidgetItem("Pendente"))
+        self.tabela_arquivos.setVisible(len(file_paths) > 1)
 
     def _emit_process_file(self):
         if not self.text_file.text():
@@ -126,6 +235,12 @@ class PainelProcessamentoAgitel(QWidget):
         if value == 100:
             self.append_log("✅ Processamento concluído, salvando arquivo!")
 
+    @pyqtSlot(int, str)
+    def update_file_status(self, index, status):
+        item = self.tabela_arquivos.item(index, 1)
+        if item:
+            item.setText(status)
+
     @pyqtSlot(str)
     def on_process_finished(self, message):
         self.btn_process.setEnabled(True)
@@ -150,13 +265,45 @@ class PainelProcessamentoAgitel(QWidget):
         )
 
     def get_file_path(self):
-        return self.text_file.text()
+        return self.file_paths[0] if self.file_paths else ""
+
+    def get_file_paths(self):
+        return list(self.file_paths)
+
+    def get_combined_option(self):
+        return self.checkbox_combined.isChecked()
+
+    def get_summary_option(self):
+        return self.checkbox_summary.isChecked()
+
+    def get_summary_only_option(self):
+        return self.checkbox_summary_only.isChecked()
+
+    def get_dedup_option(self):
+        return self.checkbox_dedup.isChecked()
+
+    def get_history_path(self):
+        return HistoricoAgitel.ARQUIVO_PADRAO if self.checkbox_history.isChecked() else None
 
     def get_equalize_option(self):
         return self.checkbox_equalize.isChecked()
 
+    def get_cache_option(self):
+        return self.checkbox_cache.isChecked()
+
+    def get_memory_limit(self):
+        text = self.combo_memory.currentText()
+        return None if text == "Sem limite" else int(text.split()[0])
+
+    def get_workers(self):
+        return int(self.combo_workers.currentText())
+
+    def get_output_format(self):
+        return self.combo_format.currentText().lower()
+
     def set_processing_state(self, processing):
         self.btn_process.setEnabled(not processing)
         self.btn_select_file.setEnabled(not processing)
+        self.btn_select_folder.setEnabled(not processing)
         status = "Processando..." if processing else "Pronto"
         self.append_log(f"📢 Status: {status}")
\ No newline at end of file
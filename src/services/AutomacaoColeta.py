@@ -13,6 +13,7 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from webdriver_manager.chrome import ChromeDriverManager
 from PyPDF2 import PdfReader
+from utils.stageTimer import StageTimer
 
 class TarefaAutomacao(QRunnable):
     def __init__(self, automator, dados_usuario, funcao_log):
@@ -61,7 +62,9 @@ class Blume:
         self.parent = parent
         self.caminho_dados = caminho_dados
         self.diretorio_download = os.path.join(os.path.expanduser('~'), 'Downloads')  # ✅ aqui
-        self.planilha = load_workbook(caminho_dados, data_only=True).active
+        self.timer = StageTimer('blume')
+        with self.timer.span("carregar planilha"):
+            self.planilha = load_workbook(caminho_dados, data_only=True).active
         self.mutex = QMutex()
         self.flag_parar = False
         self.drivers = []
@@ -74,10 +77,11 @@ class Blume:
             opcoes.add_argument("--window-size=600,1000")
             opcoes.add_argument("--headless")
             self.parent.log_mensagem("Abrindo navegador...", area="tecnico")
-            driver = webdriver.Chrome(
-                service=Service(ChromeDriverManager().install()),
-                options=opcoes
-            )
+            with self.timer.span("abrir navegador"):
+                driver = webdriver.Chrome(
+                    service=Service(ChromeDriverManager().install()),
+                    options=opcoes
+                )
             self.drivers.append(driver)
             return driver
         except Exception as erro:
@@ -85,6 +89,12 @@ class Blume:
             raise
 
     def executar_automacao(self, dados_usuario):
+        try:
+            self._executar_coleta(dados_usuario)
+        finally:
+            self.timer.report(lambda linha: self.parent.log_mensagem(linha, area="tecnico"))
+
+    def _executar_coleta(self, dados_usuario):
         self.parent.log_mensagem("Iniciando coleta para Blume...", area="tecnico")
         if self.verificar_coleta_completa():
             self.parent.log_mensagem("Todas faturas já foram coletadas!", area="tecnico")
@@ -105,12 +115,15 @@ class Blume:
                 continue
 
             driver = None
+            self.timer.count("acessos")
             try:
                 driver = self.inicializar_navegador()
                 wait = WebDriverWait(driver, 2)
-                driver.get("https://portal.blumetelecom.com.br")
-                self.fazer_login(driver, wait, usuario)
-                self.processar_boletos(driver, wait, usuario)
+                with self.timer.span("login", acesso=usuario['LOGIN']):
+                    driver.get("https://portal.blumetelecom.com.br")
+                    self.fazer_login(driver, wait, usuario)
+                with self.timer.span("boletos", acesso=usuario['LOGIN']):
+                    self.processar_boletos(driver, wait, usuario)
                 self.marcar_pendentes_indisponiveis(usuario['LOGIN'])
             except Exception as erro:
                 self.parent.log_mensagem(f"Erro no processamento: {str(erro)}", area="tecnico")
@@ -195,11 +208,13 @@ class Blume:
                     driver.execute_script("arguments[0].click();", botao_baixar_boleto)
 
                     self.parent.log_mensagem("Aguardando finalização do download (10 segundos)...", area="tecnico")
-                    time.sleep(11)
+                    with self.timer.span("aguardar download"):
+                        time.sleep(11)
 
-                    tempo_limite = datetime.now() - timedelta(seconds=15)
-                    arquivos_pdf = list(Path(self.diretorio_download).glob("*.pdf"))
-                    arquivos_pdf = [f for f in arquivos_pdf if datetime.fromtimestamp(f.stat().st_mtime) > tempo_limite]
+                        tempo_limite = datetime.now() - timedelta(seconds=15)
+                        arquivos_pdf = list(Path(self.diretorio_download).glob("*.pdf"))
+                        arquivos_pdf = [f for f in arquivos_pdf if datetime.fromtimestamp(f.stat().st_mtime) > tempo_limite]
+                    self.timer.count("boletos")
 
                     if not arquivos_pdf:
                         self.parent.log_mensagem("Nenhum PDF recente encontrado após o download.", area="tecnico")
@@ -207,9 +222,11 @@ class Blume:
 
                     ultimo_pdf = max(arquivos_pdf, key=lambda f: f.stat().st_mtime)
                     caminho_pdf = str(ultimo_pdf)
-                    contrato = self.extrair_contrato_pdf(caminho_pdf)
+                    with self.timer.span("extração PDF"):
+                        contrato = self.extrair_contrato_pdf(caminho_pdf)
+                        pendencia = self.verificar_pendencia_pdf(caminho_pdf)
 
-                    if self.verificar_pendencia_pdf(caminho_pdf):
+                    if pendencia:
                         if contrato:
                             nomenclatura = self.obter_nomenclatura(contrato)
                         else:
@@ -404,7 +421,8 @@ class Blume:
             for linha in self.planilha.iter_rows(min_row=2):
                 if (str(linha[8].value) == identificador or str(linha[4].value).lstrip('0') == identificador):
                     linha[11].value = status
-            self.planilha.parent.save(self.caminho_dados)
+            with self.timer.span("salvar planilha"):
+                self.planilha.parent.save(self.caminho_dados)
         finally:
             self.mutex.unlock()
 
@@ -419,7 +437,8 @@ class Blume:
             for linha in self.planilha.iter_rows(min_row=2, values_only=False):
                 if str(linha[8].value) == login and linha[11].value not in ['COLETADO IA', 'INDISPONIVEL']:
                     linha[11].value = 'INDISPONIVEL'
-            self.planilha.parent.save(self.caminho_dados)
+            with self.timer.span("salvar planilha"):
+                self.planilha.parent.save(self.caminho_dados)
         finally:
             self.mutex.unlock()
 
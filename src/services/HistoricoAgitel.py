@@ -0,0 +1,191 @@
+import os
+import sqlite3
+from datetime import date
+from utils.appPaths import app_path
+from utils.excelDays import ExcelDays
+
+
+class HistoricoAgitel:
+    """
+    Histórico local (SQLite) das chamadas já processadas, para consultar totais
+    por mês, Região e Origem sem reprocessar as planilhas.
+
+    Cada gravação é uma "carga" de um arquivo de origem. As linhas entram em
+    lotes (vários processos podem gravar ao mesmo tempo) e só passam a contar
+    nas consultas quando a carga termina; nesse momento as cargas anteriores do
+    mesmo arquivo são substituídas, então reprocessar um export não duplica nada.
+    """
+
+    # Na pasta do aplicativo: a interface e a CLI (aberta a partir de src) usam o mesmo banco
+    ARQUIVO_PADRAO = app_path('agitel_historico.db')
+    BATCH_SIZE = 10_000
+    TIMEOUT = 120
+
+    # Colunas aceitas em agrupamentos e filtros -> coluna da tabela
+    CAMPOS = {
+        'mes': 'c.mes', 'dia': 'c.dia', 'regiao': 'c.regiao',
+        'origem': 'c.origem', 'servico': 'c.servico', 'destino': 'c.destino'
+    }
+
+    def __init__(self, path=None):
+        self.path = path or self.ARQUIVO_PADRAO
+        self._db = sqlite3.connect(self.path, timeout=self.TIMEOUT)
+        self._db.execute("PRAGMA journal_mode = WAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS cargas (
+                id INTEGER PRIMARY KEY,
+                arquivo TEXT NOT NULL,
+                importado_em TEXT NOT NULL,
+                linhas INTEGER NOT NULL DEFAULT 0,
+                concluida INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE TABLE IF NOT EXISTS chamadas (
+                carga INTEGER NOT NULL,
+                mes TEXT,
+                dia TEXT,
+                data REAL,
+                origem TEXT,
+                servico TEXT,
+                regiao TEXT,
+                destino TEXT,
+                duracao REAL,
+                minutos REAL,
+                valor REAL
+            );
+            CREATE INDEX IF NOT EXISTS idx_chamadas_mes
+                ON chamadas (mes, regiao, origem, carga, minutos, valor);
+            CREATE INDEX IF NOT EXISTS idx_chamadas_origem ON chamadas (origem, mes);
+            CREATE INDEX IF NOT EXISTS idx_chamadas_carga ON chamadas (carga);
+        """)
+        self._day = ExcelDays()
+
+    def track(self, rows, source, interrupted=None):
+        """
+        Repassa as linhas sem alterá-las, gravando-as no histórico como uma nova
+        carga de `source`. A carga só é concluída se todas as linhas passarem
+        (e interrupted(), se informado, for falso ao final).
+        """
+        source = os.path.abspath(source)
+        carga = self._begin(source)
+        count = 0
+        batch = []
+        try:
+            for row in rows:
+                batch.append(self._record(carga, row))
+                if len(batch) >= self.BATCH_SIZE:
+                    self._insert(batch)
+                    count += len(batch)
+                    batch = []
+                yield row
+            if interrupted and interrupted():
+                # Saída parcial: mantém a carga anterior do arquivo
+                self._discard(carga)
+                return
+            self._insert(batch)
+            self._finish(carga, source, count + len(batch))
+        except BaseException:
+            # Inclui o gerador abandonado no meio (GeneratorExit), ex.: erro na gravação da saída
+            self._discard(carga)
+            raise
+
+    def totais(self, agrupar=('mes',), desde=None, ate=None, **filtros):
+        """
+        Chamadas, minutos e valor agrupados pelos campos de `agrupar`. desde/ate
+        são meses 'AAAA-MM' (inclusivos); os demais filtros são igualdade exata
+        em regiao, origem, servico, destino, mes ou dia.
+        """
+        grupos = [self._campo(nome) for nome in agrupar]
+        # "+c.carga" impede o planner de partir de idx_chamadas_carga: assim ele percorre
+        # idx_chamadas_mes (cobre mes, regiao, origem, minutos e valor) sem ler a tabela
+        where = ["+c.carga IN (SELECT id FROM cargas WHERE concluida = 1)"]
+        params = []
+        if desde:
+            where.append("c.mes >= ?")
+            params.append(desde)
+        if ate:
+            where.append("c.mes <= ?")
+            params.append(ate)
+        for nome, valor in filtros.items():
+            if valor is not None:
+                where.append(f"{self._campo(nome)} = ?")
+                params.append(valor)
+
+        select = ", ".join(grupos + ["COUNT(*)", "ROUND(SUM(c.minutos), 2)", "ROUND(SUM(c.valor), 2)"])
+        sql = f"SELECT {select} FROM chamadas c WHERE {' AND '.join(where)}"
+        if grupos:
+            sql += f" GROUP BY {', '.join(grupos)} ORDER BY {', '.join(grupos)}"
+        return self._db.execute(sql, params).fetchall()
+
+    def meses(self):
+        return [row[0] for row in self._db.execute(
+            "SELECT DISTINCT mes FROM chamadas WHERE mes IS NOT NULL"
+            " AND +carga IN (SELECT id FROM cargas WHERE concluida = 1) ORDER BY mes"
+        )]
+
+    def cargas(self):
+        """Arquivos no histórico: (arquivo, importado em, linhas)"""
+        return self._db.execute(
+            "SELECT arquivo, importado_em, linhas FROM cargas WHERE concluida = 1 ORDER BY importado_em"
+        ).fetchall()
+
+    @staticmethod
+    def primeiro_mes(ultimos):
+        """Mês 'AAAA-MM' que inicia os últimos `ultimos` meses (contando o atual)"""
+        hoje = date.today()
+        total = hoje.year * 12 + hoje.month - 1 - (ultimos - 1)
+        return f"{total // 12:04d}-{total % 12 + 1:02d}"
+
+    def close(self):
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _campo(self, nome):
+        try:
+            return self.CAMPOS[nome]
+        except KeyError:
+            raise ValueError(f"Campo inválido: {nome} (use {', '.join(self.CAMPOS)})")
+
+    def _begin(self, source):
+        with self._db:
+            # Restos de cargas interrompidas (processo encerrado) há mais de um dia
+            self._db.execute(
+                "DELETE FROM chamadas WHERE carga IN (SELECT id FROM cargas WHERE concluida = 0"
+                " AND importado_em < datetime('now', '-1 day'))"
+            )
+            self._db.execute("DELETE FROM cargas WHERE concluida = 0 AND importado_em < datetime('now', '-1 day')")
+            return self._db.execute(
+                "INSERT INTO cargas (arquivo, importado_em) VALUES (?, datetime('now'))", (source,)
+            ).lastrowid
+
+    def _insert(self, batch):
+        if batch:
+            with self._db:
+                self._db.executemany("INSERT INTO chamadas VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", batch)
+
+    def _finish(self, carga, source, count):
+        with self._db:
+            antigas = "SELECT id FROM cargas WHERE arquivo = ? AND id <> ?"
+            self._db.execute(f"DELETE FROM chamadas WHERE carga IN ({antigas})", (source, carga))
+            self._db.execute(f"DELETE FROM cargas WHERE id IN ({antigas})", (source, carga))
+            self._db.execute("UPDATE cargas SET concluida = 1, linhas = ? WHERE id = ?", (count, carga))
+
+    def _discard(self, carga):
+        with self._db:
+            self._db.execute("DELETE FROM chamadas WHERE carga = ?", (carga,))
+            self._db.execute("DELETE FROM cargas WHERE id = ?", (carga,))
+
+    def _record(self, carga, row):
+        dia = self._day(row[0])
+        return (
+            carga, dia[:7] if dia else None, dia,
+            row[0] if type(row[0]) in (int, float) else None,
+            row[1], row[2], row[3], row[4],
+            row[5] if type(row[5]) in (int, float) else None,
+            row[6] if type(row[6]) in (int, float) else 0.0,
+            row[7] if type(row[7]) in (int, float) else 0.0
+        )
@@ -1,9 +1,26 @@
 import os
+import re
+import json
+import queue
+import hashlib
 import logging
+import multiprocessing
 import time
+import unicodedata
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from copy import copy
+from functools import lru_cache
+from itertools import islice
+from operator import itemgetter
 from openpyxl import load_workbook, Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.utils import get_column_letter
 from PyQt6.QtCore import QObject, pyqtSignal
+from utils.reportChannel import ReportChannel
+from utils.dedupIndex import DedupIndex
+from utils.stageTimer import StageTimer
+from utils.xlsxReader import open_workbook, XlsxSheet
 
 
 class PlanilhaMesclagemWorker(QObject):
@@ -11,8 +28,28 @@ class PlanilhaMesclagemWorker(QObject):
     concluido = pyqtSignal(str)
     erro = pyqtSignal(str)
     atualizar_status = pyqtSignal(int, str)
+    tempos = pyqtSignal(str)
+    aviso = pyqtSignal(str)
 
-    def __init__(self, arquivos, pasta_saida, nome_arquivo, colunas_selecionadas):
+    # Memória aproximada (em bytes) que o openpyxl ocupa por byte de .xlsx carregado em uma planilha normal
+    FATOR_MEMORIA_XLSX = 50
+
+    # Formatação copiada do cabeçalho da planilha base
+    ATRIBUTOS_ESTILO = ('font', 'fill', 'border', 'alignment', 'number_format', 'protection')
+
+    # Cabeçalhos já analisados ({nome normalizado: índice}) por fingerprint do arquivo, entre execuções (na pasta da saída)
+    CABECALHOS_FILE = 'mesclagem_cabecalhos.json'
+    MAX_CABECALHOS = 500
+
+    # Manifesto da mesclagem incremental, ao lado da saída ({nome_arquivo}_manifesto.json)
+    MANIFESTO_VERSAO = 1
+
+    # Bytes por chave no índice de duplicadas, para o limite de memória decidir quando ele vai para o disco
+    DEDUP_KEY_BYTES = 16
+
+    def __init__(self, arquivos, pasta_saida, nome_arquivo, colunas_selecionadas, limite_memoria_mb=None,
+                 streaming=True, workers=1, por_nome=False, arquivo_base=None, incremental=False,
+                 dedup=False, colunas_chave=None):
         super().__init__()
         self.arquivos = arquivos
         self.pasta_saida = pasta_saida
@@ -24,52 +61,93 @@ class PlanilhaMesclagemWorker(QObject):
         self.wb_saida = None
         self.ws_saida = None
         self.caminho_saida = None
+        self.limite_memoria_mb = limite_memoria_mb
+        # Saída write-only: as linhas vão para o disco conforme são lidas (o modo antigo monta a planilha inteira)
+        self.streaming = streaming
+        # Com mais de um processo, os próximos arquivos são lidos em paralelo enquanto o atual é gravado
+        self.workers = max(1, int(workers))
+        # Por nome: cada coluna selecionada é procurada pelo nome do cabeçalho em cada arquivo, não pela posição
+        self.por_nome = por_nome
+        self.arquivo_base = arquivo_base or (arquivos[0] if arquivos else None)
+        self.nomes_colunas = {}
+        # Incremental: só arquivos novos ou alterados são lidos; o resto vem da saída anterior (ver manifesto)
+        self.incremental = incremental
+        self._linhas_gravadas = 0
+        # Duplicadas: a chave são as colunas de colunas_chave (entre as selecionadas) ou, sem elas, a linha inteira
+        self.dedup = dedup
+        self.colunas_chave = set(colunas_chave or ())
+        self.duplicadas = 0
+        self._report = ReportChannel(on_progress=self.progress.emit, on_status=self.atualizar_status.emit)
+        self.timer = StageTimer('mesclagem')
 
     def _carregar_estilos_base(self, arquivo_base):
-        """Carrega estilos da planilha base para aplicar na saída"""
+        """
+        Carrega os nomes e a formatação do cabeçalho e as larguras da planilha base, indexados
+        pela posição da coluna na saída. Só a 1ª linha e as larguras são lidas, não os dados.
+        """
         try:
-            wb = load_workbook(arquivo_base)
-            ws = wb.active
-            
             self.larguras_colunas = {}
             self.estilos_base = {}
-            
-            for col in self.colunas_selecionadas:
+            self.nomes_colunas = {}
+
+            wb = load_workbook(arquivo_base, read_only=True)
+            try:
+                cabecalho = next(wb.active.iter_rows(max_row=1), ())
+            finally:
+                wb.close()
+
+            base = open_workbook(arquivo_base)
+            try:
+                ws = base.active
+                larguras = ws.column_widths() if isinstance(ws, XlsxSheet) else {}
+            finally:
+                base.close()
+
+            for posicao, col in enumerate(self.colunas_selecionadas):
                 col_letter = get_column_letter(col + 1)
-                
+                cell = cabecalho[col] if col < len(cabecalho) else None
+
                 # Obter o valor do cabeçalho da coluna
-                nome_coluna = ws.cell(row=1, column=col + 1).value
+                nome_coluna = cell.value if cell is not None else None
 
                 # Ignorar colunas com nome "None" ou valor None
                 if nome_coluna is None or (str(nome_coluna).strip() == "None"):
                     logging.info(f"Ignorando coluna {col_letter} com nome: {nome_coluna}")
                     continue
+                self.nomes_colunas[posicao] = str(nome_coluna)
                 
                 # Largura da coluna
-                if col_letter in ws.column_dimensions:
-                    self.larguras_colunas[col_letter] = ws.column_dimensions[col_letter].width
+                if col in larguras:
+                    self.larguras_colunas[get_column_letter(posicao + 1)] = larguras[col]
                 
                 # Estilo da célula
-                cell = ws.cell(row=1, column=col + 1)
-                if cell.style:
-                    self.estilos_base[col] = cell.style
-            
-            wb.close()
+                if cell.has_style:
+                    self.estilos_base[posicao] = {
+                        atributo: copy(getattr(cell, atributo)) for atributo in self.ATRIBUTOS_ESTILO
+                    }
         except Exception as e:
             logging.error(f"Erro ao carregar estilos base: {str(e)}")
 
+    @staticmethod
+    def _aplicar_estilo(cell, estilo):
+        for atributo, valor in estilo.items():
+            setattr(cell, atributo, valor)
+
+    def _aplicar_larguras(self):
+        """Larguras da base nas colunas da saída (no modo streaming, antes da primeira linha)"""
+        for col, width in (self.larguras_colunas or {}).items():
+            if width:
+                self.ws_saida.column_dimensions[col].width = width
+
     def _aplicar_estilos(self):
         """Aplica estilos carregados na planilha de saída"""
         try:
-            if self.larguras_colunas:
-                for col, width in self.larguras_colunas.items():
-                    if width and col in self.ws_saida.column_dimensions:
-                        self.ws_saida.column_dimensions[col].width = width
+            self._aplicar_larguras()
 
             if self.estilos_base and self.ws_saida.max_row >= 1:
                 for col_idx, style in self.estilos_base.items():
                     if col_idx < len(self.ws_saida[1]):
-                        self.ws_saida.cell(row=1, column=col_idx+1).style = style
+                        self._aplicar_estilo(self.ws_saida.cell(row=1, column=col_idx+1), style)
         except Exception as e:
             logging.error(f"Erro ao aplicar estilos: {str(e)}")
 
@@ -85,59 +163,614 @@ class PlanilhaMesclagemWorker(QObject):
             logging.error(f"Erro ao salvar parcialmente: {str(e)}")
         return None
 
+    def _excede_limite_memoria(self):
+        """Estima se a planilha de saída inteira em memória passaria do limite configurado"""
+        if not self.limite_memoria_mb:
+            return False
+        tamanho = sum(os.path.getsize(arquivo) for arquivo in self.arquivos if os.path.exists(arquivo))
+        return tamanho * self.FATOR_MEMORIA_XLSX > self.limite_memoria_mb * 1024 * 1024
+
+    def _linha_estilos(self):
+        """
+        Primeira linha no modo streaming: a planilha normal recebe os estilos da
+        base em uma linha 1 sem valores, então o mesmo é gravado aqui antes dos dados.
+        """
+        linha = []
+        for col_idx in range(len(self.colunas_selecionadas)):
+            cell = WriteOnlyCell(self.ws_saida)
+            style = (self.estilos_base or {}).get(col_idx)
+            if style:
+                try:
+                    self._aplicar_estilo(cell, style)
+                except Exception as e:
+                    logging.error(f"Erro ao aplicar estilos: {str(e)}")
+            linha.append(cell)
+        return linha
+
+    @staticmethod
+    def _ler_linhas(ws, colunas):
+        """
+        Gera as linhas de dados (a partir da 2ª) apenas com as colunas de origem em
+        `colunas`, na ordem da saída; None (coluna ausente no arquivo) sai vazia.
+        """
+        lidas = sorted({col for col in colunas if col is not None})
+        if isinstance(ws, XlsxSheet):
+            # O leitor direto já devolve só as colunas lidas, em ordem crescente
+            rows = ws.iter_rows(min_row=2, values_only=True, columns=lidas)
+            posicoes = {col: i for i, col in enumerate(lidas)}
+            largura = len(lidas)
+        else:
+            rows = ws.iter_rows(min_row=2, values_only=True)
+            posicoes = {col: col for col in lidas}
+            largura = lidas[-1] + 1 if lidas else 0
+
+        # Linhas curtas são completadas com "" e as ausentes apontam para a posição extra, sempre vazia
+        preenchimento = ("",) * (largura + 1)
+        indices = [posicoes[col] if col is not None else largura for col in colunas]
+        if indices == list(range(largura)):
+            # Colunas já na ordem da saída: só corta as colunas seguintes (openpyxl devolve a linha
+            # inteira) e completa as curtas
+            for row in rows:
+                row = list(row[:largura])
+                yield row + [""] * (largura - len(row))
+            return
+        projetar = itemgetter(*indices) if len(indices) > 1 else lambda row: (row[indices[0]],)
+        if None in colunas:
+            for row in rows:
+                yield list(projetar(tuple(row[:largura]) + preenchimento[min(len(row), largura):]))
+        else:
+            for row in rows:
+                if len(row) < largura:
+                    row = tuple(row) + preenchimento[len(row):largura]
+                yield list(projetar(row))
+
+    @classmethod
+    def _colunas_do_arquivo(cls, ws, colunas, nomes, cabecalho=None):
+        """
+        Colunas de origem de cada coluna da saída e o cabeçalho usado. Sem nomes é a
+        própria posição; com nomes, o índice do nome no cabeçalho ({nome normalizado:
+        índice}), que só é lido da 1ª linha quando não vem do cache.
+        """
+        if nomes is None:
+            return colunas, None
+        if cabecalho is None:
+            cabecalho = cls._ler_cabecalho(ws)
+        return [cabecalho.get(nome) if nome else col for nome, col in zip(nomes, colunas)], cabecalho
+
+    @classmethod
+    def _ler_cabecalho(cls, ws):
+        cabecalho = {}
+        for index, value in enumerate(next(ws.iter_rows(max_row=1, values_only=True), ())):
+            if value is not None:
+                cabecalho.setdefault(cls._normalizar(value), index)
+        return cabecalho
+
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def _normalizar(nome):
+        # Sem acentos, maiúsculas ou espaços/sublinhados repetidos: "Data_Vencimento " == "data vencimento"
+        texto = ''.join(c for c in unicodedata.normalize('NFD', str(nome).lower())
+                        if not unicodedata.combining(c))
+        return re.sub(r'[\s_]+', ' ', texto).strip()
+
+    @staticmethod
+    def _fingerprint_arquivo(arquivo):
+        """Caminho, tamanho e data de modificação: muda quando o arquivo é regravado"""
+        info = os.stat(arquivo)
+        raw = f"{os.path.abspath(arquivo)}|{info.st_size}|{info.st_mtime_ns}"
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+    def _caminho_cabecalhos(self):
+        # Junto da saída, como o manifesto, e não na pasta de onde o app foi aberto
+        return os.path.join(self.pasta_saida, self.CABECALHOS_FILE)
+
+    def _carregar_cabecalhos(self):
+        caminho = self._caminho_cabecalhos()
+        try:
+            if os.path.exists(caminho):
+                with open(caminho, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+        except Exception as e:
+            logging.warning(f"Cabeçalhos da mesclagem ignorados: {str(e)}")
+        return {}
+
+    def _salvar_cabecalhos(self, cabecalhos):
+        # Mantém apenas os arquivos mais recentes (dict preserva a ordem de inserção)
+        recentes = dict(list(cabecalhos.items())[-self.MAX_CABECALHOS:])
+        caminho = self._caminho_cabecalhos()
+        # Arquivo temporário + replace: uma interrupção não deixa o JSON pela metade
+        temporario = f"{caminho}.{os.getpid()}.tmp"
+        try:
+            with open(temporario, 'w', encoding='utf-8') as f:
+                json.dump(recentes, f, ensure_ascii=False)
+            os.replace(temporario, caminho)
+        except Exception as e:
+            logging.warning(f"Erro ao salvar cabeçalhos da mesclagem: {str(e)}")
+            if os.path.exists(temporario):
+                os.remove(temporario)
+
+    def _nomes_normalizados(self):
+        """Nome normalizado de cada coluna da saída (None se a base não tiver nome), ou None fora do modo por nome"""
+        if not self.por_nome:
+            return None
+        return [
+            self._normalizar(self.nomes_colunas[posicao]) if posicao in self.nomes_colunas else None
+            for posicao in range(len(self.colunas_selecionadas))
+        ]
+
+    def _avisar_ausentes(self, nome_arquivo, nomes, cabecalho):
+        ausentes = [
+            self.nomes_colunas[posicao] for posicao, nome in enumerate(nomes or ())
+            if nome and nome not in cabecalho
+        ]
+        if ausentes:
+            self.aviso.emit(f"{nome_arquivo}: coluna(s) não encontrada(s), gravada(s) vazia(s): {', '.join(ausentes)}")
+
+    def _copiar_linhas(self, linhas):
+        """Grava as linhas na saída (até um cancelamento) e devolve quantas foram gravadas"""
+        total = 0
+        for nova_linha in linhas:
+            if self._cancelar:
+                break
+
+            self.ws_saida.append(nova_linha)
+            total += 1
+        self._linhas_gravadas += total
+        return total
+
+    def _caminho_manifesto(self):
+        return os.path.join(self.pasta_saida, f"{self.nome_arquivo}_manifesto.json")
+
+    @staticmethod
+    def _assinatura(arquivo):
+        info = os.stat(arquivo)
+        return {'tamanho': info.st_size, 'modificado': info.st_mtime_ns}
+
+    @staticmethod
+    def _hash_conteudo(arquivo):
+        digest = hashlib.sha1()
+        with open(arquivo, 'rb') as f:
+            for bloco in iter(lambda: f.read(1 << 20), b''):
+                digest.update(bloco)
+        return digest.hexdigest()
+
+    def _entrada_manifesto(self, arquivo, inicio, linhas):
+        """Arquivo lido nesta execução e o trecho (linhas inicial e final) que ocupa na saída"""
+        return {
+            'caminho': os.path.abspath(arquivo), **self._assinatura(arquivo),
+            'hash': self._hash_conteudo(arquivo), 'linhas': [inicio, inicio + linhas - 1]
+        }
+
+    def _carregar_manifesto(self, nomes, chave):
+        """
+        Manifesto da última mesclagem incremental, ou None se não houver ou se ele não valer
+        mais: colunas diferentes ou saída alterada/removida depois da última execução.
+        """
+        caminho = self._caminho_manifesto()
+        if not os.path.exists(caminho):
+            return None
+        try:
+            with open(caminho, 'r', encoding='utf-8') as f:
+                manifesto = json.load(f)
+            valido = (
+                manifesto.get('versao') == self.MANIFESTO_VERSAO
+                and manifesto.get('colunas') == self.colunas_selecionadas and manifesto.get('nomes') == nomes
+                and manifesto.get('chave') == chave
+                and os.path.exists(self.caminho_saida) and manifesto.get('saida') == self._assinatura(self.caminho_saida)
+            )
+        except Exception as e:
+            logging.warning(f"Manifesto da mesclagem ignorado: {str(e)}")
+            valido = False
+        if not valido:
+            self.aviso.emit("Manifesto não corresponde à saída ou às colunas atuais; mesclando todos os arquivos")
+            return None
+        return manifesto
+
+    def _salvar_manifesto(self, arquivos, nomes, chave):
+        manifesto = {
+            'versao': self.MANIFESTO_VERSAO, 'colunas': self.colunas_selecionadas, 'nomes': nomes, 'chave': chave,
+            'saida': self._assinatura(self.caminho_saida), 'arquivos': arquivos
+        }
+        try:
+            with open(self._caminho_manifesto(), 'w', encoding='utf-8') as f:
+                json.dump(manifesto, f, ensure_ascii=False, indent=2)
+        except Exception as e:
+            logging.warning(f"Erro ao salvar o manifesto da mesclagem: {str(e)}")
+
+    def _inalterado(self, arquivo, entrada):
+        assinatura = self._assinatura(arquivo)
+        if assinatura['tamanho'] != entrada['tamanho']:
+            return False
+        # Mesmo tamanho e data: sem alterações; só a data mudou (arquivo copiado de novo): decide o conteúdo
+        return assinatura['modificado'] == entrada['modificado'] or self._hash_conteudo(arquivo) == entrada['hash']
+
+    def _planejar_incremental(self, manifesto):
+        """
+        Passos (índice do arquivo, entrada do manifesto) na ordem da saída e quantos arquivos
+        do manifesto saíram da pasta. Com entrada, as linhas são copiadas da saída anterior
+        (arquivo sem alterações, mesmo que renomeado ou movido); sem entrada, o arquivo é
+        lido: um alterado substitui as próprias linhas no lugar e os novos vão para o fim.
+        As linhas dos arquivos que saíram da pasta não entram na nova saída.
+        """
+        saida = os.path.abspath(self.caminho_saida)
+        indices = {
+            os.path.abspath(arquivo): idx for idx, arquivo in enumerate(self.arquivos)
+            if os.path.abspath(arquivo) != saida
+        }
+        entradas = (manifesto or {}).get('arquivos', [])
+        conhecidas = {entrada['caminho'] for entrada in entradas}
+        # Arquivos fora do manifesto: novos ou renomeados/movidos (reconhecidos pelo conteúdo)
+        novos = [idx for caminho, idx in indices.items() if caminho not in conhecidas]
+        hashes = {}
+
+        def renomeado(entrada):
+            for idx in novos:
+                arquivo = self.arquivos[idx]
+                if os.path.getsize(arquivo) != entrada['tamanho']:
+                    continue
+                if idx not in hashes:
+                    hashes[idx] = self._hash_conteudo(arquivo)
+                if hashes[idx] == entrada['hash']:
+                    novos.remove(idx)
+                    return idx
+            return None
+
+        passos = []
+        removidos = 0
+        for entrada in entradas:
+            idx = indices.pop(entrada['caminho'], None)
+            if idx is None:
+                idx = renomeado(entrada)
+                if idx is None:
+                    removidos += 1
+                    continue
+                indices.pop(os.path.abspath(self.arquivos[idx]))
+                entrada = dict(entrada, caminho=os.path.abspath(self.arquivos[idx]))
+            if self._inalterado(self.arquivos[idx], entrada):
+                passos.append((idx, dict(entrada, **self._assinatura(self.arquivos[idx]))))
+            else:
+                passos.append((idx, None))
+        return passos + [(idx, None) for idx in indices.values()], removidos
+
+    def _manter_saida(self, passos, nomes, chave):
+        """Nada novo ou alterado: a saída anterior continua valendo e não é regravada"""
+        for idx, _ in passos:
+            self._report.status(idx, "Sem alterações")
+        self._salvar_manifesto([entrada for _, entrada in passos], nomes, chave)
+        self._report.progress(100)
+        self._report.flush()
+        self.timer.report(self.tempos.emit)
+        self.concluido.emit(f"Nenhum arquivo novo ou alterado. Arquivo final mantido em: {self.caminho_saida}")
+
+    def _posicoes_chave(self):
+        """Posições, na saída, das colunas da chave de duplicadas (None sem remoção de duplicadas)"""
+        if not self.dedup:
+            return None
+        posicoes = [posicao for posicao, col in enumerate(self.colunas_selecionadas) if col in self.colunas_chave]
+        return posicoes or list(range(len(self.colunas_selecionadas)))
+
+    @staticmethod
+    def _funcao_chave(posicoes, largura):
+        extrair = itemgetter(*posicoes) if len(posicoes) > 1 else lambda linha: (linha[posicoes[0]],)
+
+        def chave(linha):
+            # Linhas da saída anterior vêm sem as células vazias do fim e com None no lugar de ""
+            if len(linha) < largura:
+                linha = tuple(linha) + (None,) * (largura - len(linha))
+            return tuple(None if valor == "" else valor for valor in extrair(linha))
+        return chave
+
+    def _dedup_mensagem(self):
+        return f" ({self.duplicadas} linhas duplicadas removidas)" if self.dedup else ""
+
     def executar_mesclagem(self):
         """Método principal que executa o processo de mesclagem"""
+        self.timer = timer = StageTimer('mesclagem')
+        self._linhas_gravadas = 0
+        self.duplicadas = 0
+        leitura = None
+        anterior = None
+        indice = None
         try:
             self.caminho_saida = os.path.join(self.pasta_saida, f"{self.nome_arquivo}.xlsx")
-            self.wb_saida = Workbook()
-            self.ws_saida = self.wb_saida.active
-
             if self.arquivos:
-                self._carregar_estilos_base(self.arquivos[0])
-                self._aplicar_estilos()
+                with timer.span("estilos base"):
+                    self._carregar_estilos_base(self.arquivo_base)
 
             total_arquivos = len(self.arquivos)
-            for idx, arquivo in enumerate(self.arquivos):
+            nomes = self._nomes_normalizados()
+            posicoes_chave = self._posicoes_chave()
+            if self.incremental and self.arquivos:
+                with timer.span("manifesto"):
+                    passos, removidos = self._planejar_incremental(self._carregar_manifesto(nomes, posicoes_chave))
+                if removidos:
+                    self.aviso.emit(f"{removidos} arquivo(s) fora da pasta: as linhas deles saem do arquivo final")
+                elif passos and all(entrada is not None for _, entrada in passos):
+                    self._manter_saida(passos, nomes, posicoes_chave)
+                    return
+            else:
+                passos = [(idx, None) for idx in range(total_arquivos)]
+
+            # Acima do limite de memória o modo antigo também passa para write-only
+            self.streaming = self.streaming or self._excede_limite_memoria()
+            if self.streaming:
+                self.wb_saida = Workbook(write_only=True)
+                self.ws_saida = self.wb_saida.create_sheet()
+            else:
+                self.wb_saida = Workbook()
+                self.ws_saida = self.wb_saida.active
+
+            if self.arquivos:
+                if self.streaming:
+                    self._aplicar_larguras()
+                    self.ws_saida.append(self._linha_estilos())
+                else:
+                    self._aplicar_estilos()
+
+            if posicoes_chave is not None:
+                # Só hashes de 64 bits em memória; acima do limite, o índice vai para um SQLite temporário
+                indice = DedupIndex(
+                    self.limite_memoria_mb * 1024 * 1024 // 4 // self.DEDUP_KEY_BYTES if self.limite_memoria_mb else None
+                )
+                chave = self._funcao_chave(posicoes_chave, len(self.colunas_selecionadas))
+
+            def sem_duplicadas(linhas):
+                return indice.unique(linhas, chave) if indice is not None else linhas
+
+            lidos = [idx for idx, entrada in passos if entrada is None]
+            copiados = [entrada['linhas'][1] for _, entrada in passos if entrada is not None]
+            if copiados:
+                anterior = SaidaAnterior(self.caminho_saida, max(copiados))
+            cabecalhos = self._carregar_cabecalhos() if nomes is not None else {}
+            fingerprints = [
+                self._fingerprint_arquivo(arquivo) if nomes is not None and os.path.exists(arquivo) else None
+                for arquivo in self.arquivos
+            ]
+            cabecalhos_novos = 0
+            if self.workers > 1 and len(lidos) > 1:
+                leitura = LeituraAntecipada(
+                    [self.arquivos[idx] for idx in lidos], self.colunas_selecionadas, min(self.workers, len(lidos)),
+                    on_lendo=lambda posicao: self._report.status(lidos[posicao], "Lendo..."),
+                    nomes=nomes, cabecalhos=[cabecalhos.get(fingerprints[idx]) for idx in lidos]
+                )
+            manifesto = []
+            for passo, (idx, entrada) in enumerate(passos):
                 if self._cancelar:
                     break
 
-                self.atualizar_status.emit(idx, "Processando...")
+                # Linha 1 é a dos estilos da base
+                inicio = self._linhas_gravadas + 2
+                if entrada is not None:
+                    # Sem alterações: as linhas vêm da saída anterior, sem abrir o arquivo
+                    with timer.span("cópia da saída anterior", arquivo=os.path.basename(entrada['caminho'])):
+                        linhas = self._copiar_linhas(sem_duplicadas(anterior.trecho(*entrada['linhas'])))
+                    timer.count("linhas reaproveitadas", linhas)
+                    manifesto.append(dict(entrada, linhas=[inicio, inicio + linhas - 1]))
+                    self._report.status(idx, "Sem alterações")
+                    self._report.progress((passo + 1) / len(passos) * 100)
+                    continue
+
+                arquivo = self.arquivos[idx]
+                self._report.status(idx, "Processando...")
+                duplicadas = indice.dropped if indice is not None else 0
                 
                 try:
-                    wb_entrada = load_workbook(arquivo, read_only=True, data_only=True)
-                    ws_entrada = wb_entrada.active
-                    
-                    for row in ws_entrada.iter_rows(min_row=2, values_only=True):
+                    nome = os.path.basename(arquivo)
+                    if leitura:
+                        # Arquivo lido por um processo filho; aqui as linhas só são gravadas conforme chegam
+                        linhas_lidas, resultado = leitura.proximo()
+                        with timer.span("aguardar leitura e cópia", arquivo=nome):
+                            linhas = self._copiar_linhas(sem_duplicadas(linhas_lidas))
                         if self._cancelar:
                             break
-                            
-                        nova_linha = [row[col] if col < len(row) else "" for col in self.colunas_selecionadas]
-                        self.ws_saida.append(nova_linha)
-                    
-                    wb_entrada.close()
-                    self.progress.emit(int((idx + 1) / total_arquivos * 100))
-                    self.atualizar_status.emit(idx, "Concluído")
+                        cabecalho, tempos = resultado()
+                        timer.merge(tempos)
+                    else:
+                        with timer.span("abrir planilha", arquivo=nome):
+                            wb_entrada = open_workbook(arquivo, data_only=True)
+                            ws_entrada = wb_entrada.active
+
+                        try:
+                            with timer.span("cabeçalho", arquivo=nome):
+                                colunas, cabecalho = self._colunas_do_arquivo(
+                                    ws_entrada, self.colunas_selecionadas, nomes, cabecalhos.get(fingerprints[idx])
+                                )
+                            with timer.span("leitura e cópia", arquivo=nome):
+                                linhas = self._copiar_linhas(sem_duplicadas(self._ler_linhas(ws_entrada, colunas)))
+                        finally:
+                            wb_entrada.close()
+                    if nomes is not None:
+                        self._avisar_ausentes(nome, nomes, cabecalho)
+                        if fingerprints[idx] not in cabecalhos:
+                            cabecalhos[fingerprints[idx]] = cabecalho
+                            cabecalhos_novos += 1
+                    if self.incremental:
+                        manifesto.append(self._entrada_manifesto(arquivo, inicio, linhas))
+                    timer.count("linhas", linhas)
+                    timer.count("arquivos")
+
+                    self._report.progress((passo + 1) / len(passos) * 100)
+                    duplicadas = indice.dropped - duplicadas if indice is not None else 0
+                    if duplicadas:
+                        timer.count("duplicadas", duplicadas)
+                    self._report.status(idx, f"Concluído ({duplicadas} duplicadas)" if duplicadas else "Concluído")
 
                 except Exception as e:
-                    self.atualizar_status.emit(idx, f"Erro: {str(e)[:30]}")
+                    self._report.status(idx, f"Erro: {str(e)[:30]}")
                     logging.error(f"Erro no arquivo {arquivo}: {str(e)}")
 
+            if anterior:
+                anterior.close()
+            if indice is not None:
+                self.duplicadas = indice.dropped
+            if cabecalhos_novos:
+                self._salvar_cabecalhos(cabecalhos)
+            self._report.flush()
             if self._cancelar:
-                caminho_parcial = self._salvar_parcialmente()
+                with timer.span("salvar"):
+                    caminho_parcial = self._salvar_parcialmente()
+                self.timer.report(self.tempos.emit)
                 self.concluido.emit(f"Processo cancelado. Arquivo parcial salvo em: {caminho_parcial}" if caminho_parcial 
                                   else "Cancelado mas houve erro ao salvar")
             else:
-                self._aplicar_estilos()
-                self.wb_saida.save(self.caminho_saida)
-                self.concluido.emit(f"Arquivo final salvo em: {self.caminho_saida}")
+                if not self.streaming:
+                    self._aplicar_estilos()
+                with timer.span("salvar"):
+                    if self.incremental:
+                        # A saída anterior foi lida até aqui, então a nova só a substitui depois de gravada
+                        temporario = f"{self.caminho_saida}.tmp"
+                        self.wb_saida.save(temporario)
+                        os.replace(temporario, self.caminho_saida)
+                        self._salvar_manifesto(manifesto, nomes, posicoes_chave)
+                    else:
+                        self.wb_saida.save(self.caminho_saida)
+                self.timer.report(self.tempos.emit)
+                self.concluido.emit(f"Arquivo final salvo em: {self.caminho_saida}{self._dedup_mensagem()}")
 
         except Exception as e:
+            self._report.flush()
+            self.timer.report(self.tempos.emit)
             self.erro.emit(f"Erro crítico: {str(e)}")
             logging.error("Erro na mesclagem", exc_info=True)
         finally:
+            if leitura:
+                leitura.close()
+            if anterior:
+                anterior.close()
+            if indice is not None:
+                indice.close()
             if self.wb_saida:
                 self.wb_saida.close()
 
     def cancelar(self):
         """Marca o processo para cancelamento"""
         self._cancelar = True
+
+
+class SaidaAnterior:
+    """
+    Linhas de dados da saída da mesclagem anterior, lidas em uma única passada:
+    os trechos (linhas inicial e final, como no manifesto) são pedidos em ordem
+    crescente e o que fica entre eles (linhas de arquivos alterados) é pulado.
+    """
+
+    def __init__(self, caminho, ultima_linha):
+        self._wb = open_workbook(caminho)
+        self._linhas = self._wb.active.iter_rows(min_row=2, max_row=ultima_linha, values_only=True)
+        self._proxima = 2
+
+    def trecho(self, inicio, fim):
+        deque(islice(self._linhas, inicio - self._proxima), maxlen=0)
+        self._proxima = fim + 1
+        return islice(self._linhas, fim - inicio + 1)
+
+    def close(self):
+        self._wb.close()
+
+
+class LeituraAntecipada:
+    """
+    Lê as planilhas de entrada em processos filhos, `workers` arquivos à frente
+    do gravador, e entrega as linhas (já só com as colunas selecionadas) na ordem
+    original dos arquivos. on_lendo(índice) avisa quando um arquivo entra na leitura.
+    Com nomes, as colunas são mapeadas pelo cabeçalho (o de `cabecalhos`, na ordem
+    dos arquivos, quando já conhecido).
+
+    As linhas chegam em lotes de LOTE_LINHAS por uma fila de no máximo MAX_LOTES
+    lotes por arquivo: o processo filho espera o gravador quando ela enche, então
+    a memória da leitura antecipada não depende do tamanho dos arquivos.
+    """
+
+    LOTE_LINHAS = 1000
+    MAX_LOTES = 4
+
+    def __init__(self, arquivos, colunas, workers, on_lendo=None, nomes=None, cabecalhos=None):
+        self._arquivos = iter(enumerate(zip(arquivos, cabecalhos or [None] * len(arquivos))))
+        self._colunas = colunas
+        self._nomes = nomes
+        self._on_lendo = on_lendo
+        self._pendentes = deque()
+        self._atual = None
+        self._manager = multiprocessing.Manager()
+        self._pool = ProcessPoolExecutor(max_workers=workers)
+        for _ in range(workers):
+            self._enviar()
+
+    def _enviar(self):
+        idx, (arquivo, cabecalho) = next(self._arquivos, (None, (None, None)))
+        if arquivo is None:
+            return
+        fila = self._manager.Queue(self.MAX_LOTES)
+        parar = self._manager.Event()
+        futuro = self._pool.submit(
+            _ler_arquivo_worker, arquivo, self._colunas, fila, parar, self._nomes, cabecalho, self.LOTE_LINHAS
+        )
+        self._pendentes.append((futuro, fila, parar))
+        if self._on_lendo:
+            self._on_lendo(idx)
+
+    def proximo(self):
+        """
+        (linhas, resultado) do próximo arquivo na ordem: linhas gera as linhas conforme o
+        processo filho as envia e resultado() devolve (cabeçalho, tempos) depois delas,
+        propagando erros de leitura
+        """
+        if self._atual:
+            # Arquivo anterior não lido até o fim (erro na gravação): libera o processo dele
+            self._atual[2].set()
+        futuro, fila, parar = self._atual = self._pendentes.popleft()
+        # Mantém os processos ocupados enquanto este arquivo é gravado
+        self._enviar()
+
+        def linhas():
+            while True:
+                lote = fila.get()
+                if lote is None:
+                    return
+                yield from lote
+        return linhas(), futuro.result
+
+    def close(self):
+        for _, _, parar in ([self._atual] if self._atual else []) + list(self._pendentes):
+            parar.set()
+        self._pool.shutdown(wait=True, cancel_futures=True)
+        self._manager.shutdown()
+
+
+def _ler_arquivo_worker(arquivo, colunas, fila, parar, nomes=None, cabecalho=None, lote=1000):
+    """
+    Executado no processo filho: envia as linhas de dados do arquivo em lotes pela fila
+    (None no fim) e devolve o cabeçalho usado no mapeamento por nome (None sem nomes)
+    e os tempos (StageTimer.export)
+    """
+    timer = StageTimer('mesclagem', track_memory=False)
+    nome = os.path.basename(arquivo)
+
+    def enviar(item):
+        # Fila cheia: espera o gravador, a menos que a leitura tenha sido descartada
+        while not parar.is_set():
+            try:
+                fila.put(item, timeout=0.2)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    try:
+        with timer.span("abrir planilha (processo)", arquivo=nome):
+            wb = open_workbook(arquivo, data_only=True)
+            ws = wb.active
+        try:
+            with timer.span("cabeçalho (processo)", arquivo=nome):
+                colunas, cabecalho = PlanilhaMesclagemWorker._colunas_do_arquivo(ws, colunas, nomes, cabecalho)
+            with timer.span("leitura (processo)", arquivo=nome):
+                linhas = PlanilhaMesclagemWorker._ler_linhas(ws, colunas)
+                while True:
+                    bloco = list(islice(linhas, lote))
+                    if not bloco or not enviar(bloco):
+                        break
+        finally:
+            wb.close()
+    finally:
+        enviar(None)
+    return cabecalho, timer.export()
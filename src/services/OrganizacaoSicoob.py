@@ -2,6 +2,8 @@ import os
 import re
 from PyPDF2 import PdfReader
 from PyQt6.QtCore import QThread, pyqtSignal
+from utils.reportChannel import ReportChannel
+from utils.stageTimer import StageTimer
 
 def extract_cnpjs_from_pdf(file_path):
     """
@@ -39,13 +41,18 @@ class OrganizadorSicoobThread(QThread):
         self.diretorio = diretorio
         self.agencias = agencias  # Mapeamento: CNPJ -> Agência
         self.historico = []
+        self._report = ReportChannel(self.mensagem.emit, self.progresso.emit)
+        self.timer = StageTimer('sicoob')
 
     def run(self):
+        self.timer = timer = StageTimer('sicoob')
         try:
-            arquivos = [f for f in os.listdir(self.diretorio)
-                        if os.path.isfile(os.path.join(self.diretorio, f))
-                        and f.lower().endswith('.pdf')]
+            with timer.span("listar arquivos"):
+                arquivos = [f for f in os.listdir(self.diretorio)
+                            if os.path.isfile(os.path.join(self.diretorio, f))
+                            and f.lower().endswith('.pdf')]
             total = len(arquivos)
+            timer.count("arquivos", total)
             if total == 0:
                 self.mensagem.emit("Nenhum arquivo PDF encontrado na pasta.")
                 self.finalizado.emit(False)
@@ -53,7 +60,8 @@ class OrganizadorSicoobThread(QThread):
 
             for i, arquivo in enumerate(arquivos):
                 caminho_origem = os.path.join(self.diretorio, arquivo)
-                cnpjs = extract_cnpjs_from_pdf(caminho_origem)
+                with timer.span("extração PDF", arquivo=arquivo):
+                    cnpjs = extract_cnpjs_from_pdf(caminho_origem)
                 cnpj_selecionado = None
                 if len(cnpjs) >= 2:
                     cnpj_selecionado = cnpjs[1]
@@ -61,21 +69,27 @@ class OrganizadorSicoobThread(QThread):
                     cnpj_selecionado = cnpjs[0]
 
                 if not cnpj_selecionado:
-                    self.mensagem.emit(f"Arquivo '{arquivo}': Nenhum CNPJ encontrado.")
+                    self._report.log(f"Arquivo '{arquivo}': Nenhum CNPJ encontrado.")
                 else:
                     if cnpj_selecionado in self.agencias:
                         novo_nome_base = self.agencias[cnpj_selecionado]
                         novo_nome = novo_nome_base + ".pdf"
                         novo_caminho = os.path.join(self.diretorio, novo_nome)
-                        novo_caminho = self.gerar_nome_unico(novo_caminho)
-                        os.rename(caminho_origem, novo_caminho)
-                        self.mensagem.emit(f"Arquivo '{arquivo}' renomeado para '{os.path.basename(novo_caminho)}'.")
+                        with timer.span("renomear", arquivo=arquivo):
+                            novo_caminho = self.gerar_nome_unico(novo_caminho)
+                            os.rename(caminho_origem, novo_caminho)
+                        timer.count("renomeados")
+                        self._report.log(f"Arquivo '{arquivo}' renomeado para '{os.path.basename(novo_caminho)}'.")
                         self.historico.append((novo_caminho, caminho_origem))
                     else:
-                        self.mensagem.emit(f"Arquivo '{arquivo}': CNPJ {cnpj_selecionado} não mapeado.")
-                self.progresso.emit(int(((i+1) / total) * 100))
+                        self._report.log(f"Arquivo '{arquivo}': CNPJ {cnpj_selecionado} não mapeado.")
+                self._report.progress(((i+1) / total) * 100)
+            self.timer.report(self._report.log)
+            self._report.flush()
             self.finalizado.emit(True)
         except Exception as e:
+            self.timer.report(self._report.log)
+            self._report.flush()
             self.error.emit(f"Erro na organização: {str(e)}")
             self.finalizado.emit(False)
 
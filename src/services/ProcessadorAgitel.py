@@ -0,0 +1,47 @@
+import logging
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from services.ProcessamentoAgitel import MotorAgitel
+from services.ProcessamentoAgitelLote import MotorAgitelLote
+
+
+class ProcessadorAgitel(QThread):
+    """Adaptador Qt do MotorAgitel: roda o motor na thread e repassa os callbacks como sinais"""
+    progressUpdated = pyqtSignal(int)
+    processFinished = pyqtSignal(str)
+    errorOccurred = pyqtSignal(str)
+    logUpdated = pyqtSignal(str)
+
+    def __init__(self, file_path, equalize, **options):
+        super().__init__()
+        self.engine = MotorAgitel(
+            file_path, equalize,
+            on_log=self.logUpdated.emit, on_progress=self.progressUpdated.emit, **options
+        )
+
+    def run(self):
+        try:
+            message = self.engine.process()
+            if message:
+                self.processFinished.emit(message)
+        except Exception as e:
+            self.errorOccurred.emit(f"Erro crítico: {str(e)}")
+            logging.exception("Erro durante o processamento")
+        finally:
+            self.engine.timer.report(self.logUpdated.emit)
+
+    def stop(self):
+        self.engine.stop()
+
+
+class ProcessadorAgitelLote(ProcessadorAgitel):
+    """Adaptador Qt do MotorAgitelLote, com o status de cada arquivo em fileStatusUpdated"""
+    fileStatusUpdated = pyqtSignal(int, str)
+
+    def __init__(self, file_paths, equalize, **options):
+        QThread.__init__(self)
+        self.engine = MotorAgitelLote(
+            file_paths, equalize,
+            on_log=self.logUpdated.emit, on_progress=self.progressUpdated.emit,
+            on_status=self.fileStatusUpdated.emit, **options
+        )
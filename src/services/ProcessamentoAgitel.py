@@ -1,29 +1,117 @@
 import re
 import os
 import gc
+import csv
+import json
+import hashlib
 import logging
 import unicodedata
+from collections import namedtuple
+from copy import copy
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from datetime import time as dt_time, datetime as dt_datetime
-from openpyxl import load_workbook, Workbook
+import numpy as np
+from openpyxl import Workbook
+from openpyxl.cell import Cell, WriteOnlyCell
 from openpyxl.styles import Font, Alignment, NamedStyle
 from openpyxl.utils import datetime as xl_datetime
-from PyQt6.QtCore import QThread, pyqtSignal
-
-class ProcessadorAgitel(QThread):
-    progressUpdated = pyqtSignal(int)
-    processFinished = pyqtSignal(str)
-    errorOccurred = pyqtSignal(str)
-    logUpdated = pyqtSignal(str)
+from services.HistoricoAgitel import HistoricoAgitel
+from services.RegioesAgitel import RegioesAgitel
+from services.ResumoAgitel import ResumoAgitel
+from utils.dedupIndex import DedupIndex
+from utils.externalSort import SortedRuns
+from utils.reportChannel import ReportChannel
+from utils.sheetCache import SheetCache
+from utils.stageTimer import StageTimer
+from utils.xlsxReader import open_workbook, XlsxSheet
+
+# Resultado da detecção de cabeçalho de uma aba: linha do cabeçalho (1-based) e índice de cada coluna
+SheetSchema = namedtuple('SheetSchema', ['header_row', 'indices'])
+
+
+class MotorAgitel:
+    """
+    Leitura, conversão e gravação das planilhas da Agitel, sem dependência de Qt.
+    Log e progresso saem pelos callbacks on_log(str) e on_progress(int); a
+    interface usa o adaptador em services.ProcessadorAgitel e a linha de
+    comando está em services.agitel.
+    """
 
     COLUNAS_SAIDA = [
         'Data', 'Origem', 'Serviço', 'Região', 
         'Destino', 'Duração', 'Duração (minutos)', 'Valor'
     ]
 
-    def __init__(self, file_path, equalize):
-        super().__init__()
+    # Coluna de saída -> estilo aplicado na gravação (modo streaming)
+    FORMATOS_COLUNAS = {0: 'date', 5: 'duration', 6: 'minutes', 7: 'currency'}
+
+    # Intervalo mínimo (s) entre atualizações de progresso dentro de uma aba
+    PROGRESS_INTERVAL = 0.2
+
+    # Layouts de cabeçalho já detectados, persistidos entre execuções
+    LAYOUTS_FILE = 'agitel_layouts.json'
+    MAX_LAYOUTS = 50
+    HEADER_SCAN_ROWS = 20
+
+    ESSENTIAL_COLUMNS = frozenset({'data', 'origem', 'destino', 'duracao', 'preco'})
+    COLUMN_ALIASES = {
+        'data': ['data', 'datachamada', 'datahora', 'datahorario'],
+        'origem': ['origem', 'ramalorigem', 'setor', 'operador'],
+        'servico': ['servico', 'tiposervico', 'serviço', 'tipochamada'],
+        'regiao': ['regiao', 'região', 'localchamada', 'ddd'],
+        'destino': ['destino', 'numerodestino', 'telefone', 'ramaldestino'],
+        'duracao': ['duracao', 'tempochamada', 'tempogasto', 'duraçao'],
+        'preco': ['preco', 'custochamada', 'valor', 'tarifa']
+    }
+
+    DATE_PATTERN = re.compile(r"\d{2}/\d{2}/\d{4}")
+    TIME_PATTERN = re.compile(r"\d{2}:\d{2}:\d{2}")
+
+    # Estimativa de memória por linha convertida (tupla de 8 valores), usada no limite de memória
+    ROW_BYTES_ESTIMATE = 512
+    # Bytes por chave do índice de duplicadas; o índice usa no máximo 1/4 do limite de memória
+    DEDUP_KEY_BYTES = 16
+
+    FORMATOS_SAIDA = ('xlsx', 'csv', 'parquet')
+    PARQUET_BATCH_ROWS = 100_000
+    # Data que chega em texto (não convertida na leitura) e vai para a coluna timestamp do Parquet
+    FORMATOS_DATA_TEXTO = ('%d/%m/%Y %H:%M:%S', '%d/%m/%Y %H:%M', '%d/%m/%Y')
+
+    def __init__(self, file_path, equalize, streaming=True, workers=1, chunk_size=5000,
+                 output_format='xlsx', use_cache=False, export_rows=False,
+                 summary=False, summary_only=False, memory_limit_mb=None,
+                 output_dir=None, dedup=False, history_path=None, on_log=None, on_progress=None):
+        if output_format not in self.FORMATOS_SAIDA:
+            raise ValueError(f"Formato de saída inválido: {output_format}")
         self.file_path = file_path
         self.equalize = equalize
+        # Regras de equalização da Região (RegioesAgitel.ARQUIVO_PADRAO), aplicadas na conversão
+        self.regioes = RegioesAgitel.carregar() if equalize else None
+        # Com limite de memória a saída é sempre em streaming (o modo antigo monta a planilha inteira)
+        self.streaming = streaming or bool(memory_limit_mb)
+        self.memory_limit_mb = memory_limit_mb
+        self.max_rows_in_memory = (
+            max(2000, memory_limit_mb * 1024 * 1024 // self.ROW_BYTES_ESTIMATE) if memory_limit_mb else None
+        )
+        self.output_format = output_format
+        self.workers = max(1, int(workers))
+        self.chunk_size = max(1, int(chunk_size))
+        self.use_cache = use_cache
+        self.export_rows = export_rows
+        self.summary = summary or summary_only
+        self.summary_only = summary_only
+        # Descarta chamadas repetidas (mesma Data, Origem, Destino e Duração) na gravação
+        self.dedup = dedup
+        self.duplicates_dropped = 0
+        # Banco SQLite (HistoricoAgitel) onde as linhas gravadas também são guardadas
+        self.history_path = history_path
+        self.rows_path = None
+        self.output_dir = output_dir
+        self.output_path = None
+        self._report = ReportChannel(on_log, on_progress, self.PROGRESS_INTERVAL)
+        # Tempos por etapa da última execução (relatório nos logs e trace em JSON)
+        self.timer = StageTimer('agitel')
         self._interrupted = False
         self._setup_styles()
 
@@ -35,11 +123,18 @@ class ProcessadorAgitel(QThread):
             'duration': NamedStyle(name="duration", number_format='hh:mm:ss')
         }
 
-    def run(self):
+    def process(self):
+        """Processa a planilha e devolve a mensagem final; erros são propagados"""
+        self.timer = timer = StageTimer('agitel')
         try:
-            wb = load_workbook(self.file_path, read_only=True)
+            with timer.span("abrir planilha"):
+                wb = open_workbook(self.file_path)
             valid_sheets = []
-            batch_counter = 0
+            layouts = self._load_layouts()
+            layouts_count = len(layouts)
+            self._cache = SheetCache() if self.use_cache else None
+            fingerprints = {}
+            cached = {}
 
             primeira_aba = wb.worksheets[0].title.lower() if wb.worksheets else ""
             ignorar_primeira = "resumo" in primeira_aba
@@ -49,137 +144,690 @@ class ProcessadorAgitel(QThread):
                     break
                 if ignorar_primeira and sheet == wb.worksheets[0]:
                     continue
-                    
-                if self._find_header_row(sheet):
-                    valid_sheets.append(sheet)
-                else:
-                    self.logUpdated.emit(f"Aviso: {sheet.title} ignorada (cabeçalho não encontrado)")
 
-            total_sheets = len(valid_sheets)
-            progress_per_sheet = 100 / total_sheets if total_sheets > 0 else 0
+                with timer.span("cabeçalho", aba=sheet.title):
+                    schema = self._detect_schema(sheet, layouts)
+                if not schema:
+                    self._report.log(f"Aviso: {sheet.title} ignorada (cabeçalho não encontrado)")
+                    continue
 
-            output_wb = Workbook()
-            output_sheet = output_wb.active
-            self._create_header(output_wb, output_sheet)
+                valid_sheets.append((sheet, schema))
+                if self._cache:
+                    with timer.span("fingerprint", aba=sheet.title):
+                        fingerprint = self._sheet_fingerprint(sheet)
+                    if fingerprint:
+                        if self.regioes:
+                            # Linhas em cache já saem equalizadas, então as regras entram na chave
+                            fingerprint += f":{self.regioes.fingerprint()}"
+                        fingerprints[sheet.title] = fingerprint
+                        if self._cache.has(self.file_path, sheet.title, fingerprint):
+                            cached[sheet.title] = fingerprint
+            timer.count("abas", len(valid_sheets))
+
+            if len(layouts) != layouts_count:
+                self._save_layouts(layouts)
+
+            if self.max_rows_in_memory:
+                runs = SortedRuns(key=self._sort_key, max_rows_in_memory=self.max_rows_in_memory // 2)
+            else:
+                runs = SortedRuns(key=self._sort_key)
+            start = timer.now()
+            for sheet, sheet_rows, whole in self._parse_sheets(valid_sheets, cached):
+                # Tempo até o gerador entregar a aba: leitura e conversão (ou espera pelo processo filho)
+                timer.add_span("leitura", start, timer.now(), aba=sheet.title)
+                with timer.span("ordenação", aba=sheet.title):
+                    if isinstance(sheet_rows, str):
+                        # Aba já ordenada e gravada em disco pelo processo filho
+                        runs.add_spilled(sheet_rows)
+                    else:
+                        runs.add_run(sheet_rows)
+                if (not isinstance(sheet_rows, str) and whole and sheet.title in fingerprints
+                        and sheet.title not in cached and not self._interrupted):
+                    with timer.span("cache", aba=sheet.title):
+                        self._cache.put(self.file_path, sheet.title, fingerprints[sheet.title], sheet_rows)
+                start = timer.now()
+            if self._cache:
+                with timer.span("cache"):
+                    self._cache.save()
+            timer.count("linhas", len(runs))
+
+            self.output_path = self._get_output_path()
+            with timer.span("gravação", formato=self.output_format):
+                self._write_output(self.output_path, runs.merged())
+            if self.export_rows:
+                # Linhas ordenadas, para saídas combinadas (lote)
+                with timer.span("exportar linhas"):
+                    self.rows_path = runs.export()
+            return f"Arquivo salvo em: {self.output_path}{self._dedup_message()}"
+        finally:
+            self._report.flush()
+            if 'wb' in locals(): wb.close()
+            if 'runs' in locals(): runs.close()
+            gc.collect()
+            timer.finish()
+
+    def _parse_sheets(self, sheets, cached=None):
+        """
+        Gera (aba, linhas não vazias, aba inteira?) na ordem das abas. Com limite
+        de memória uma aba grande sai em vários blocos; abas em cache não são relidas.
+        """
+        cached = cached or {}
+        if self.workers > 1 and len(sheets) - len(cached) > 1:
+            yield from self._parse_sheets_parallel(sheets, cached)
+            return
 
-            for index, sheet in enumerate(valid_sheets, 1):
+        progress_per_sheet = 100 / len(sheets) if sheets else 0
+        for index, (sheet, schema) in enumerate(sheets):
+            if self._interrupted:
+                return
+
+            base = index * progress_per_sheet
+            yield from self._read_sheet(
+                sheet, schema, cached.get(sheet.title),
+                lambda fraction: self._emit_progress(base + fraction * progress_per_sheet)
+            )
+            self._emit_progress((index + 1) * progress_per_sheet)
+
+    def _read_sheet(self, sheet, schema, fingerprint=None, on_progress=None):
+        if fingerprint:
+            sheet_rows = self._cache.get(self.file_path, sheet.title, fingerprint)
+            if sheet_rows is not None:
+                self._report.log(f"Processando: {sheet.title} (sem alterações, cache)")
+                yield sheet, sheet_rows, True
+                return
+            # Entrada ilegível cai na leitura normal da aba
+
+        self._report.log(f"Processando: {sheet.title}")
+
+        limit = self.max_rows_in_memory // 2 if self.max_rows_in_memory else None
+        whole = True
+        sheet_rows = []
+        for chunk in self._process_sheet(sheet, schema, on_progress):
+            sheet_rows.extend(row for row in chunk if not self._is_empty_row(row))
+            if limit and len(sheet_rows) >= limit:
+                yield sheet, sheet_rows, False
+                whole = False
+                sheet_rows = []
+        yield sheet, sheet_rows, whole
+
+    def _parse_sheets_parallel(self, sheets, cached):
+        # Cada processo abre a planilha uma vez (initializer) e processa as abas que receber
+        workers = min(self.workers, len(sheets) - len(cached))
+        progress_per_sheet = 100 / len(sheets)
+        limit = self.max_rows_in_memory // 2 if self.max_rows_in_memory else None
+        pool = ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_sheet_worker,
+            initargs=(self.file_path,)
+        )
+        try:
+            futures = {
+                sheet.title: pool.submit(_parse_sheet_worker, sheet.title, schema, self.chunk_size, limit, self.regioes)
+                for sheet, schema in sheets if sheet.title not in cached
+            }
+            for index, (sheet, schema) in enumerate(sheets, 1):
                 if self._interrupted:
-                    break
+                    return
 
-                self.logUpdated.emit(f"Processando: {sheet.title}")
-                
-                for chunk in self._process_sheet(sheet):
-                    for row in chunk:
-                        output_sheet.append(row)
+                if sheet.title in cached:
+                    # Aba sem alterações: lida do cache neste processo
+                    yield from self._read_sheet(sheet, schema, cached[sheet.title])
+                    self._emit_progress(index * progress_per_sheet)
+                    continue
 
-                self.progressUpdated.emit(int(index * progress_per_sheet))
+                self._report.log(f"Processando: {sheet.title}")
 
-                batch_counter += 1
-                if batch_counter >= 10 or index == total_sheets:
-                    self._clean_and_sort_output(output_sheet)
-                    batch_counter = 0
+                sheet_rows, logs, timing = futures.pop(sheet.title).result()
+                self.timer.merge(timing)
+                for message in logs:
+                    self._log_row_error(message)
+                yield sheet, sheet_rows, True
+                self._emit_progress(index * progress_per_sheet)
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+            for future in futures.values() if 'futures' in locals() else ():
+                # Runs gravados por abas que não chegaram a ser entregues
+                if future.done() and not future.cancelled() and future.exception() is None:
+                    sheet_rows = future.result()[0]
+                    if isinstance(sheet_rows, str) and os.path.exists(sheet_rows):
+                        os.remove(sheet_rows)
+
+    def _sheet_fingerprint(self, sheet):
+        # Só o leitor direto tem acesso ao XML da aba; no fallback do openpyxl não há cache
+        if not isinstance(sheet, XlsxSheet):
+            return None
+        try:
+            return sheet.fingerprint()
+        except Exception as e:
+            logging.warning(f"Fingerprint indisponível para {sheet.title}: {str(e)}")
+            return None
 
-            self._apply_final_formatting(output_sheet)
-            if self.equalize:
-                self._equalize_regiao(output_sheet)
+    def _emit_progress(self, value, force=False):
+        self._report.progress(value, force)
 
-            output_path = self._get_output_path()
-            output_wb.save(output_path)
-            self.processFinished.emit(f"Arquivo salvo em: {output_path}")
+    def _log_row_error(self, message):
+        # Linhas ruins de um export sujo viram uma única mensagem com a contagem
+        self._report.log(message, group="Linha ignorada")
 
-        except Exception as e:
-            self.errorOccurred.emit(f"Erro crítico: {str(e)}")
-            logging.exception("Erro durante o processamento")
-        finally:
-            if 'wb' in locals(): wb.close()
-            if 'output_wb' in locals(): output_wb.close()
-            gc.collect()
+    @staticmethod
+    def _sort_key(row):
+        return str(row[3]).lower() if row[3] else ""
 
-    def _clean_and_sort_output(self, sheet):
-        try:
-            all_rows = []
-            for row in sheet.iter_rows(min_row=2, values_only=True):
-                if any(cell not in (None, "", 0) for cell in row):
-                    all_rows.append(row)
+    @staticmethod
+    def _is_empty_row(row):
+        return not any(cell not in (None, "", 0) for cell in row)
 
-            all_rows.sort(key=lambda x: str(x[3]).lower() if x[3] else "")
+    @staticmethod
+    def _dedup_key(row):
+        # Data, Origem, Destino e Duração identificam a chamada
+        return row[0], row[1], row[4], row[5]
 
-            sheet.delete_rows(2, sheet.max_row)
-            for row in all_rows:
-                sheet.append(row)
+    def _dedup_message(self):
+        return f" ({self.duplicates_dropped} chamadas duplicadas removidas)" if self.dedup else ""
 
-        except Exception as e:
-            self.logUpdated.emit(f"Erro na organização: {str(e)[:50]}")
+    def _write_output(self, output_path, rows, store_history=True):
+        index = history = tracked = None
+        try:
+            if self.dedup:
+                max_keys = (
+                    self.memory_limit_mb * 1024 * 1024 // 4 // self.DEDUP_KEY_BYTES if self.memory_limit_mb else None
+                )
+                index = DedupIndex(max_keys)
+                rows = index.unique(rows, self._dedup_key)
+            if self.history_path and store_history:
+                history = HistoricoAgitel(self.history_path)
+                rows = tracked = history.track(rows, self.file_path, interrupted=lambda: self._interrupted)
+            self._write_rows(output_path, rows)
+        finally:
+            if tracked:
+                tracked.close()
+            if history:
+                history.close()
+            if index is not None:
+                # is not None: o índice tem __len__ e fica vazio (falso) depois do close()
+                self.duplicates_dropped = index.dropped
+                index.close()
+
+        if index is not None and index.dropped:
+            self._report.log(f"Chamadas duplicadas removidas: {index.dropped}")
+        if history and not self._interrupted:
+            self._report.log(f"Histórico atualizado: {self.history_path}")
+
+    def _write_rows(self, output_path, rows):
+        summary = None
+        if self.summary:
+            # Totais acumulados na mesma passada da gravação (a Região já vem equalizada da conversão)
+            summary = ResumoAgitel()
+            rows = summary.track(rows)
+
+        if self.summary_only:
+            for _ in rows:
+                pass
+            self._write_summary_file(output_path, summary)
+        elif self.output_format == 'csv':
+            self._write_csv_output(output_path, rows)
+        elif self.output_format == 'parquet':
+            self._write_parquet_output(output_path, rows)
+        else:
+            self._write_xlsx_output(output_path, rows, summary)
+            return
 
-    def _apply_final_formatting(self, sheet):
-        for row in sheet.iter_rows(min_row=2):
-            cell = row[5]
-            cell.number_format = 'hh:mm:ss'
+        if summary and not self.summary_only:
+            summary.write_csv(f"{os.path.splitext(output_path)[0]}_resumo.csv")
 
-    def _process_sheet(self, sheet):
-        header_row = self._find_header_row(sheet)
-        if not header_row:
+    def _write_summary_file(self, output_path, summary):
+        if output_path.endswith('.csv'):
+            summary.write_csv(output_path)
             return
+        output_wb = Workbook(write_only=True)
+        try:
+            summary.write_sheet(output_wb.create_sheet("Resumo"))
+            output_wb.save(output_path)
+        finally:
+            output_wb.close()
 
-        indices = self._get_column_indices(header_row)
-        start_row = header_row[0].row + 1
-        chunk = []
-
-        rows = list(sheet.iter_rows(min_row=start_row, values_only=True))
-        total_rows = len(rows)
-        current_index = 0
+    def _write_xlsx_output(self, output_path, rows, summary=None):
+        if self.streaming:
+            output_wb = Workbook(write_only=True)
+            output_sheet = output_wb.create_sheet()
+        else:
+            output_wb = Workbook()
+            output_sheet = output_wb.active
 
-        while current_index < total_rows:
-            if self._interrupted:
-                return
+        try:
+            self._create_header(output_wb, output_sheet)
+            if self.streaming:
+                self._write_streaming_output(output_sheet, rows)
+            else:
+                self._write_buffered_output(output_sheet, rows)
+            if summary:
+                summary_sheet = output_wb.create_sheet("Resumo")
+                if self.streaming:
+                    summary.write_sheet(summary_sheet)
+                else:
+                    self._write_summary_rows(summary_sheet, summary)
+            with self.timer.span("salvar"):
+                output_wb.save(output_path)
+        finally:
+            output_wb.close()
 
-            row = rows[current_index]
-            current_index += 1
+    @staticmethod
+    def _write_summary_rows(sheet, summary):
+        sheet.append(summary.COLUNAS)
+        for cell in sheet[1]:
+            cell.font = Font(bold=True)
+            cell.alignment = Alignment(horizontal='center')
+        for values in summary.rows():
+            sheet.append(values)
+            for col, number_format in summary.FORMATOS.items():
+                sheet.cell(row=sheet.max_row, column=col + 1).number_format = number_format
+
+    def _write_csv_output(self, output_path, rows):
+        """CSV em streaming: data ISO, duração hh:mm:ss, minutos e valor numéricos"""
+        with open(output_path, 'w', newline='', encoding='utf-8-sig') as f:
+            writer = csv.writer(f)
+            writer.writerow(self.COLUNAS_SAIDA)
+            for row in rows:
+                writer.writerow([
+                    self._serial_to_text(row[0]),
+                    row[1], row[2], row[3], row[4],
+                    self._fraction_to_text(row[5]),
+                    row[6], row[7]
+                ])
+
+    def _write_parquet_output(self, output_path, rows):
+        """Parquet colunar e tipado, gravado em row groups de PARQUET_BATCH_ROWS linhas"""
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Exportação em Parquet requer o pacote 'pyarrow' (pip install pyarrow)")
+
+        schema = pa.schema([
+            ('Data', pa.timestamp('ms')),
+            ('Origem', pa.string()),
+            ('Serviço', pa.string()),
+            ('Região', pa.string()),
+            ('Destino', pa.string()),
+            ('Duração', pa.duration('ms')),
+            ('Duração (minutos)', pa.float64()),
+            ('Valor', pa.float64())
+        ])
+
+        unparsed = 0
+
+        def to_table(batch):
+            nonlocal unparsed
+            columns = list(zip(*batch))
+            timestamps, timestamps_null, batch_unparsed = self._serials_to_epoch_ms(columns[0])
+            unparsed += batch_unparsed
+            durations, durations_null = self._fractions_to_ms(columns[5])
+            return pa.Table.from_arrays([
+                pa.array(timestamps, type=pa.timestamp('ms'), mask=timestamps_null),
+                pa.array(columns[1], type=pa.string()),
+                pa.array(columns[2], type=pa.string()),
+                pa.array(columns[3], type=pa.string()),
+                pa.array(columns[4], type=pa.string()),
+                pa.array(durations, type=pa.duration('ms'), mask=durations_null),
+                pa.array(columns[6], type=pa.float64()),
+                pa.array(columns[7], type=pa.float64())
+            ], schema=schema)
+
+        with pq.ParquetWriter(output_path, schema) as writer:
+            batch = []
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= self.PARQUET_BATCH_ROWS:
+                    writer.write_table(to_table(batch))
+                    batch = []
+            if batch:
+                writer.write_table(to_table(batch))
+        if unparsed:
+            self._report.log(f"Aviso: {unparsed} valor(es) de Data em texto não reconhecido(s) ficaram vazios no Parquet")
+
+    @staticmethod
+    def _numeric_mask(values):
+        return np.fromiter((type(v) in (int, float) for v in values), bool, len(values))
+
+    @classmethod
+    def _serials_to_epoch_ms(cls, values):
+        """
+        Serial do Excel -> milissegundos desde 1970 (mesmo arredondamento de from_excel).
+        Texto dd/mm/aaaa [hh:mm[:ss]] também é convertido; devolve (ms, nulos, textos não reconhecidos).
+        """
+        numeric = cls._numeric_mask(values)
+        serials = np.array([v if ok else 0.0 for v, ok in zip(values, numeric)], dtype=np.float64)
+        days, fractions = np.divmod(serials, 1)
+        days = np.where((serials > 0) & (serials < 60), days + 1, days)
+        millis = (days - 25569).astype(np.int64) * 86_400_000 + np.round(fractions * 86_400_000).astype(np.int64)
+        null = ~numeric
+
+        unparsed = 0
+        for i in np.flatnonzero(null):
+            value = values[i]
+            if not isinstance(value, str) or not value.strip():
+                continue
+            parsed = cls._text_to_epoch_ms(value.strip())
+            if parsed is None:
+                unparsed += 1
+            else:
+                millis[i] = parsed
+                null[i] = False
+        return millis, null, unparsed
 
-            processed_row = self._process_row(row, indices)
-            if processed_row:
-                chunk.append(processed_row)
-        if chunk:
-            yield chunk
+    @classmethod
+    def _text_to_epoch_ms(cls, text):
+        for fmt in cls.FORMATOS_DATA_TEXTO:
+            try:
+                delta = dt_datetime.strptime(text, fmt) - dt_datetime(1970, 1, 1)
+            except ValueError:
+                continue
+            return delta.days * 86_400_000 + delta.seconds * 1000 + delta.microseconds // 1000
+        return None
 
-    def _process_row(self, row, indices):
+    @classmethod
+    def _fractions_to_ms(cls, values):
+        numeric = cls._numeric_mask(values)
+        fractions = np.array([v if ok else 0.0 for v, ok in zip(values, numeric)], dtype=np.float64)
+        return np.round(fractions * 86_400_000).astype(np.int64), ~numeric
+
+    @staticmethod
+    def _serial_to_text(value):
+        if type(value) not in (int, float):
+            return value
+        converted = xl_datetime.from_excel(value)
+        if isinstance(converted, dt_datetime):
+            return converted.strftime('%Y-%m-%d %H:%M:%S')
+        return converted.strftime('%H:%M:%S')
+
+    @staticmethod
+    def _fraction_to_text(value):
+        if type(value) not in (int, float):
+            return value
+        seconds = int(round(value * 86400))
+        return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+    def _write_streaming_output(self, sheet, rows):
+        templates = self._create_cell_templates(sheet)
+        for row in rows:
+            self._write_row(sheet, row, templates)
+
+    def _create_cell_templates(self, sheet):
+        # Células write-only são gravadas no append, então uma célula formatada por coluna é reaproveitada
+        templates = {}
+        for col, style in self.FORMATOS_COLUNAS.items():
+            cell = WriteOnlyCell(sheet)
+            cell.number_format = self.styles[style].number_format
+            templates[col] = cell
+        return templates
+
+    def _write_row(self, sheet, row, templates):
+        values = list(row)
+        for col, cell in templates.items():
+            cell.value = values[col]
+            values[col] = cell
+        sheet.append(values)
+
+    def _write_buffered_output(self, sheet, rows):
+        # Numa planilha normal o append guarda a própria célula, então a Duração ganha uma
+        # célula nova por linha, já com o estilo do modelo (sem passada de formatação no fim)
+        template = Cell(sheet)
+        template.number_format = self.styles['duration'].number_format
+        style = template._style
+        for row in rows:
+            values = list(row)
+            values[5] = Cell(sheet, value=values[5], style_array=copy(style))
+            sheet.append(values)
+
+    def _process_sheet(self, sheet, schema, on_progress=None):
+        yield from self._parse_sheet(
+            sheet, schema, self._log_row_error, lambda: self._interrupted, self.chunk_size, on_progress,
+            self.regioes
+        )
+
+    @classmethod
+    def _parse_sheet(cls, sheet, schema, log, interrupted, chunk_size=5000, on_progress=None, regioes=None):
+        """
+        Lê as linhas da aba sob demanda e gera blocos de até chunk_size linhas processadas
+        (com regioes, um RegioesAgitel, a Região já sai equalizada)
+        """
+        indices = schema.indices
+        start_row = schema.header_row + 1
+        total_rows = (sheet.max_row or 0) - start_row + 1
+        rows_read = 0
+        raw_rows = []
+
+        if isinstance(sheet, XlsxSheet):
+            # Leitor direto: só as colunas usadas são convertidas
+            columns = sorted(set(indices.values()))
+            rows = sheet.iter_rows(min_row=start_row, values_only=True, columns=columns)
+            indices = {key: columns.index(col) for key, col in indices.items()}
+        else:
+            rows = sheet.iter_rows(min_row=start_row, values_only=True)
+
+        for row in rows:
+            raw_rows.append(row)
+            rows_read += 1
+            if rows_read % chunk_size == 0:
+                if interrupted():
+                    return
+                chunk = cls._convert_chunk(raw_rows, indices, log, regioes)
+                raw_rows = []
+                if chunk:
+                    yield chunk
+                if on_progress and total_rows > 0:
+                    on_progress(min(rows_read / total_rows, 1.0))
+        if raw_rows:
+            chunk = cls._convert_chunk(raw_rows, indices, log, regioes)
+            if chunk:
+                yield chunk
+
+    @classmethod
+    def _process_row(cls, row, indices, log, regioes=None):
         try:
-            data = self._convert_date(row[indices.get('data', -1)]) or ""
+            data = cls._convert_date(row[indices.get('data', -1)]) or ""
             origem = str(row[indices.get('origem', -1)] or "").strip()
             destino = str(row[indices.get('destino', -1)] or "").strip()
+            regiao = str(row[indices.get('regiao', -1)] or "")
             
             return [
                 data,
                 origem,
                 str(row[indices.get('servico', -1)] or ""),
-                str(row[indices.get('regiao', -1)] or ""),
+                regioes(regiao) if regioes else regiao,
                 destino,
-                self._convert_duration(row[indices.get('duracao', -1)]),
-                self._duration_to_minutes(row[indices.get('duracao', -1)]),
-                self._parse_currency(row[indices.get('preco', -1)])
+                cls._convert_duration(row[indices.get('duracao', -1)]),
+                cls._duration_to_minutes(row[indices.get('duracao', -1)]),
+                cls._parse_currency(row[indices.get('preco', -1)])
             ]
         except Exception as e:
-            self.logUpdated.emit(f"Linha ignorada: {str(e)[:50]}")
+            log(f"Linha ignorada: {str(e)[:50]}")
             return None
 
+    @classmethod
+    def _convert_chunk(cls, rows, indices, log, regioes=None):
+        """
+        Converte um bloco de linhas brutas coluna a coluna (NumPy), com o mesmo
+        resultado de _process_row linha a linha. Linhas curtas demais seguem por
+        _process_row (que registra "Linha ignorada") e qualquer falha inesperada
+        na conversão em bloco refaz o bloco linha a linha.
+        """
+        width = max(indices.values()) + 1
+        valid_rows = []
+        for row in rows:
+            if len(row) >= width:
+                valid_rows.append(row)
+            else:
+                cls._process_row(row, indices, log, regioes)
+
+        if not valid_rows:
+            return []
+
+        try:
+            return cls._convert_columns(valid_rows, indices, regioes)
+        except Exception:
+            processed = (cls._process_row(row, indices, log, regioes) for row in valid_rows)
+            return [row for row in processed if row]
+
+    @classmethod
+    def _convert_columns(cls, rows, indices, regioes=None):
+        def column(key):
+            idx = indices[key]
+            return [row[idx] for row in rows]
+
+        regiao = [str(value or "") for value in column('regiao')]
+        if regioes:
+            regiao = regioes.equalize_column(regiao)
+        duracoes, minutos = cls._convert_durations(column('duracao'))
+        return list(zip(
+            cls._convert_dates(column('data')),
+            [str(value or "").strip() for value in column('origem')],
+            [str(value or "") for value in column('servico')],
+            regiao,
+            [str(value or "").strip() for value in column('destino')],
+            duracoes,
+            minutos,
+            cls._parse_currencies(column('preco'))
+        ))
+
+    # Época do Excel (1899-12-30) em ordinal do calendário gregoriano
+    EXCEL_EPOCH_ORDINAL = dt_datetime(1899, 12, 30).toordinal()
+
+    @classmethod
+    def _convert_dates(cls, values):
+        # Mesmo cálculo de openpyxl.utils.datetime.to_excel, em bloco
+        result = [value or "" for value in values]
+        dates = [(i, value) for i, value in enumerate(values) if isinstance(value, dt_datetime)]
+        if not dates:
+            return result
+
+        count = len(dates)
+        days = np.fromiter((d.toordinal() for _, d in dates), np.int64, count) - cls.EXCEL_EPOCH_ORDINAL
+        days = np.where((days > 0) & (days <= 60), days - 1, days)
+        seconds = np.fromiter((d.hour * 3600 + d.minute * 60 + d.second for _, d in dates), np.int64, count)
+        micros = np.fromiter((d.microsecond for _, d in dates), np.int64, count)
+        serials = (days + (seconds + micros * 1e-6) / 86400).tolist()
+
+        for (i, _), serial in zip(dates, serials):
+            result[i] = serial or ""
+        return result
+
+    @classmethod
+    def _convert_durations(cls, values):
+        """Retorna (fração do dia, minutos) para uma coluna de durações"""
+        fractions = list(values)
+        minutes = [0.0] * len(values)
+
+        time_positions, time_seconds = [], []
+        text_positions, text_parts = [], []
+        for i, value in enumerate(values):
+            if isinstance(value, dt_time):
+                time_positions.append(i)
+                time_seconds.append(value.hour * 3600 + value.minute * 60 + value.second)
+            elif isinstance(value, str):
+                try:
+                    h, m, s = map(int, value.split(':'))
+                except:
+                    fractions[i] = 0.0
+                    continue
+                text_positions.append(i)
+                text_parts.append((h, m, s))
+
+        if time_positions:
+            seconds = np.array(time_seconds, dtype=np.int64)
+            h, m, s = seconds // 3600, (seconds // 60) % 60, seconds % 60
+            day_fractions = (h / 24 + m / 1440 + s / 86400).tolist()
+            rounded_minutes = cls._minutes_table()[seconds].tolist()
+            for i, fraction, minute in zip(time_positions, day_fractions, rounded_minutes):
+                fractions[i] = fraction
+                minutes[i] = minute
+
+        if text_positions:
+            parts = np.array(text_parts, dtype=np.int64)
+            h, m, s = parts[:, 0], parts[:, 1], parts[:, 2]
+            for i, fraction in zip(text_positions, (h / 24 + m / 1440 + s / 86400).tolist()):
+                fractions[i] = fraction
+
+        return fractions, minutes
+
+    _MINUTES_TABLE = None
+
+    @classmethod
+    def _minutes_table(cls):
+        # round() do Python e np.round divergem em empates; a tabela (por segundo do dia)
+        # guarda exatamente o valor de _duration_to_minutes
+        if cls._MINUTES_TABLE is None:
+            cls._MINUTES_TABLE = np.array([
+                round(h * 60 + m + s / 60, 1)
+                for h in range(24) for m in range(60) for s in range(60)
+            ])
+        return cls._MINUTES_TABLE
+
+    @classmethod
+    def _parse_currencies(cls, values):
+        result = [0.0] * len(values)
+        text_positions, texts = [], []
+        for i, value in enumerate(values):
+            if type(value) in (int, float):
+                result[i] = float(value)
+            elif isinstance(value, str):
+                text_positions.append(i)
+                texts.append(value)
+            else:
+                result[i] = cls._parse_currency(value)
+
+        if texts:
+            # Limpeza da coluna inteira numa única passada; float() já ignora espaços nas pontas
+            cleaned = '\x00'.join(texts).replace('R$', '').replace(',', '.').split('\x00')
+            try:
+                if len(cleaned) != len(texts):
+                    raise ValueError
+                parsed = [float(text) for text in cleaned]
+            except ValueError:
+                parsed = [cls._parse_currency(text) for text in texts]
+            for i, value in zip(text_positions, parsed):
+                result[i] = value
+        return result
+
     def _create_header(self, wb, sheet):
+        if self.streaming:
+            header = []
+            for title in self.COLUNAS_SAIDA:
+                cell = WriteOnlyCell(sheet, value=title)
+                cell.font = Font(bold=True)
+                cell.alignment = Alignment(horizontal='center')
+                header.append(cell)
+            sheet.append(header)
+            return
+
         sheet.append(self.COLUNAS_SAIDA)
         for col, title in enumerate(self.COLUNAS_SAIDA, 1):
             cell = sheet.cell(row=1, column=col)
             cell.font = Font(bold=True)
             cell.alignment = Alignment(horizontal='center')
-        sheet.column_dimensions['F'].number_format = 'hh:mm:ss'
 
     def _get_output_path(self):
         base, ext = os.path.splitext(self.file_path)
-        return f"{base}_leitura_agitel{ext}"
-
-    def _convert_date(self, value):
+        if self.output_dir:
+            base = os.path.join(self.output_dir, os.path.basename(base))
+        return self._output_name(f"{base}_leitura_agitel", ext)
+
+    def _output_name(self, base, ext):
+        if self.summary_only:
+            # Só o resumo: planilha no formato XLSX, senão CSV
+            return f"{base}_resumo{'.xlsx' if self.output_format == 'xlsx' else '.csv'}"
+        if self.output_format != 'xlsx':
+            ext = f".{self.output_format}"
+        return f"{base}{ext}"
+
+    @staticmethod
+    def _convert_date(value):
         if isinstance(value, dt_datetime):
             return xl_datetime.to_excel(value)
         return value
 
-    def _convert_duration(self, value):
+    @staticmethod
+    def _convert_duration(value):
         if isinstance(value, dt_time):
             return value.hour/24 + value.minute/1440 + value.second/86400
         elif isinstance(value, str):
@@ -190,90 +838,180 @@ class ProcessadorAgitel(QThread):
                 return 0.0
         return value
 
-    def _duration_to_minutes(self, value):
+    @staticmethod
+    def _duration_to_minutes(value):
         if isinstance(value, dt_time):
             return round(value.hour * 60 + value.minute + value.second / 60, 1)
         return 0.0
 
-    def _parse_currency(self, value):
+    @staticmethod
+    def _parse_currency(value):
         try:
             return float(str(value).replace('R$', '').replace(',', '.').strip())
         except:
             return 0.0
 
-    def _equalize_regiao(self, sheet):
-        for row in sheet.iter_rows(min_row=2):
-            cell = row[3]
-            if not cell.value:
-                continue
-                
-            valor = str(cell.value).lower()
-            if "fixo" in valor:
-                cell.value = "Fixo"
-            elif any(x in valor for x in ["movel", "móvel"]):
-                cell.value = "Móvel"
-            elif not valor.strip():
-                cell.value = "Intragrupo"
-
-    def _find_header_row(self, sheet):
-        essential_columns = {'data', 'origem', 'destino', 'duracao', 'preco'}
-        
-        for row in sheet.iter_rows(max_row=20):
-            if self._is_data_row(row):
+    @classmethod
+    def _detect_schema(cls, sheet, layouts=None):
+        """
+        Detecta o cabeçalho da aba numa única leitura das primeiras linhas. A leitura
+        para na linha candidata de um layout já conhecido cujo fingerprint bater;
+        só sem layout conhecido as HEADER_SCAN_ROWS linhas são lidas e analisadas.
+        """
+        candidates = {layout['header_row'] for layout in layouts.values()} if layouts else set()
+        rows = []
+        row_iter = sheet.iter_rows(max_row=cls.HEADER_SCAN_ROWS, values_only=True)
+        try:
+            for header_row, row in enumerate(row_iter, 1):
+                rows.append(row)
+                if header_row in candidates:
+                    layout = layouts.get(cls._layout_fingerprint(header_row, row))
+                    if layout:
+                        return SheetSchema(header_row, layout['indices'])
+        finally:
+            row_iter.close()
+
+        header_row = cls._find_header_row(rows)
+        if not header_row:
+            return None
+
+        schema = SheetSchema(header_row, cls._get_column_indices(rows[header_row - 1]))
+        if layouts is not None:
+            fingerprint = cls._layout_fingerprint(header_row, rows[header_row - 1])
+            layouts[fingerprint] = {'header_row': header_row, 'indices': schema.indices}
+        return schema
+
+    @staticmethod
+    def _layout_fingerprint(header_row, values):
+        raw = f"{header_row}|" + "\x1f".join("" if value is None else str(value) for value in values)
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+    def _layouts_path(self):
+        # Fica junto da saída (como no lote), não na pasta de onde o app foi aberto
+        folder = self.output_dir or os.path.dirname(os.path.abspath(self.file_path))
+        return os.path.join(folder, self.LAYOUTS_FILE)
+
+    def _load_layouts(self):
+        path = self._layouts_path()
+        try:
+            if os.path.exists(path):
+                with open(path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+        except Exception as e:
+            logging.warning(f"Layouts do Agitel ignorados: {str(e)}")
+        return {}
+
+    def _save_layouts(self, layouts):
+        # Mantém apenas os layouts mais recentes (dict preserva a ordem de inserção)
+        recentes = dict(list(layouts.items())[-self.MAX_LAYOUTS:])
+        path = self._layouts_path()
+        # Arquivo temporário + replace: processos do lote podem gravar ao mesmo tempo
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(recentes, f, ensure_ascii=False, indent=2)
+            os.replace(temp_path, path)
+        except Exception as e:
+            logging.warning(f"Erro ao salvar layouts do Agitel: {str(e)}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    @classmethod
+    def _find_header_row(cls, rows):
+        """Retorna o número (1-based) da linha de cabeçalho entre as linhas lidas, ou None"""
+        for number, row in enumerate(rows, 1):
+            if cls._is_data_row(row):
                 continue
-                
+
             found = set()
-            for cell in row:
-                if cell.value:
-                    normalized = self._normalize(str(cell.value))
-                    if normalized in essential_columns:
+            for value in row:
+                if value:
+                    normalized = cls._normalize(str(value))
+                    if normalized in cls.ESSENTIAL_COLUMNS:
                         found.add(normalized)
-            
-            if found >= essential_columns:
-                return row
+
+            if found >= cls.ESSENTIAL_COLUMNS:
+                return number
         return None
-    
-    def _is_data_row(self, row):
+
+    @classmethod
+    def _is_data_row(cls, row):
         data_patterns = 0
-        for cell in row:
-            if isinstance(cell.value, (dt_datetime, int, float)):
+        for value in row:
+            if isinstance(value, (dt_datetime, int, float)):
                 data_patterns += 1
-            elif isinstance(cell.value, str):
-                if re.match(r"\d{2}/\d{2}/\d{4}", cell.value):
+            elif isinstance(value, str):
+                if cls.DATE_PATTERN.match(value):
                     data_patterns += 1
-                elif re.match(r"\d{2}:\d{2}:\d{2}", cell.value):
+                elif cls.TIME_PATTERN.match(value):
                     data_patterns += 1
-                elif "R$" in cell.value:
+                elif "R$" in value:
                     data_patterns += 1
-        
+
         return data_patterns >= 3
 
-    def _get_column_indices(self, header_row):
-        headers = [self._normalize(str(cell.value)) for cell in header_row]
-        mapping = {
-            'data': ['data', 'datachamada', 'datahora', 'datahorario'],
-            'origem': ['origem', 'ramalorigem', 'setor', 'operador'],
-            'servico': ['servico', 'tiposervico', 'serviço', 'tipochamada'],
-            'regiao': ['regiao', 'região', 'localchamada', 'ddd'],
-            'destino': ['destino', 'numerodestino', 'telefone', 'ramaldestino'],
-            'duracao': ['duracao', 'tempochamada', 'tempogasto', 'duraçao'],
-            'preco': ['preco', 'custochamada', 'valor', 'tarifa']
-        }
+    @classmethod
+    def _get_column_indices(cls, header_values):
+        positions = {}
+        for index, value in enumerate(header_values):
+            positions.setdefault(cls._normalize(str(value)), index)
 
         indices = {}
-        for key, aliases in mapping.items():
+        for key, aliases in cls.COLUMN_ALIASES.items():
             for alias in aliases:
-                normalized = self._normalize(alias)
-                if normalized in headers:
-                    indices[key] = headers.index(normalized)
+                normalized = cls._normalize(alias)
+                if normalized in positions:
+                    indices[key] = positions[normalized]
                     break
             else:
                 raise ValueError(f"Coluna '{key}' não encontrada")
         return indices
 
-    def _normalize(self, text):
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def _normalize(text):
         return ''.join(c for c in unicodedata.normalize('NFD', str(text).lower()) 
                       if not unicodedata.combining(c))
 
     def stop(self):
-        self._interrupted = True
\ No newline at end of file
+        self._interrupted = True
+
+
+_worker_wb = None
+
+
+def _init_sheet_worker(file_path):
+    global _worker_wb
+    _worker_wb = open_workbook(file_path)
+
+
+def _parse_sheet_worker(sheet_title, schema, chunk_size, max_rows=None, regioes=None):
+    """
+    Executado no processo filho: devolve as linhas da aba já ordenadas, as mensagens de log
+    e os tempos (StageTimer.export). Acima de max_rows as linhas vão para disco e volta o caminho do run ordenado.
+    """
+    logs = []
+    timer = StageTimer('agitel', track_memory=False)
+    sheet = _worker_wb[sheet_title]
+    runs = SortedRuns(key=MotorAgitel._sort_key, max_rows_in_memory=max_rows or float('inf'))
+    try:
+        sheet_rows = []
+        with timer.span("conversão (processo)", aba=sheet_title):
+            for chunk in MotorAgitel._parse_sheet(
+                    sheet, schema, logs.append, lambda: False, chunk_size, regioes=regioes):
+                sheet_rows.extend(tuple(row) for row in chunk if not MotorAgitel._is_empty_row(row))
+                if max_rows and len(sheet_rows) >= max_rows:
+                    runs.add_run(sheet_rows)
+                    sheet_rows = []
+
+        with timer.span("ordenação (processo)", aba=sheet_title):
+            if len(runs):
+                runs.add_run(sheet_rows)
+                # Linhas que voltam como arquivo não entram no len() dos runs do processo principal
+                timer.count("linhas", len(runs))
+                sheet_rows = runs.export()
+            else:
+                sheet_rows.sort(key=MotorAgitel._sort_key)
+        return sheet_rows, logs, timer.export()
+    finally:
+        runs.close()
@@ -0,0 +1,185 @@
+import os
+import gc
+import queue
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+from services.ProcessamentoAgitel import MotorAgitel
+from utils.externalSort import SortedRuns
+from utils.stageTimer import StageTimer
+
+
+class MotorAgitelLote(MotorAgitel):
+    """
+    Processa várias planilhas da Agitel ao mesmo tempo, uma por processo (até
+    `workers` simultâneos). Cada arquivo gera a sua própria saída; com
+    combined_output as linhas de todos os arquivos também são unidas, em
+    ordem de 'Região', em um único arquivo na pasta do primeiro arquivo.
+    O status de cada arquivo sai por on_status(índice, texto).
+    """
+
+    COMBINED_NAME = 'agitel_combinado'
+
+    def __init__(self, file_paths, equalize, workers=1, output_format='xlsx',
+                 use_cache=False, combined_output=False, summary=False, summary_only=False,
+                 memory_limit_mb=None, output_dir=None, dedup=False, history_path=None,
+                 on_log=None, on_progress=None, on_status=None):
+        super().__init__(file_paths[0] if file_paths else "", equalize, workers=workers,
+                         output_format=output_format, use_cache=use_cache,
+                         summary=summary, summary_only=summary_only, memory_limit_mb=memory_limit_mb,
+                         output_dir=output_dir, dedup=dedup, history_path=history_path,
+                         on_log=on_log, on_progress=on_progress)
+        self.file_paths = list(file_paths)
+        self.combined_output = combined_output
+        self.failures = 0
+        self._report.on_status = on_status
+
+    @classmethod
+    def list_folder(cls, folder):
+        """Planilhas de uma pasta, ignorando as saídas já geradas pelo processamento"""
+        return sorted(
+            os.path.join(folder, name) for name in os.listdir(folder)
+            if name.lower().endswith('.xlsx')
+            and not name.startswith('~$')
+            and '_leitura_agitel' not in name
+            and not name.startswith(cls.COMBINED_NAME)
+        )
+
+    def process(self):
+        """Processa todos os arquivos e devolve a mensagem final (None se interrompido)"""
+        file_progress = [0] * len(self.file_paths)
+        rows_paths = [None] * len(self.file_paths)
+        self.failures = 0
+        # Os tempos de cada arquivo vêm dos processos filhos e são somados aqui
+        self.timer = timer = StageTimer('agitel_lote')
+        timer.count("arquivos", len(self.file_paths))
+        try:
+            if not self.file_paths:
+                raise ValueError("Nenhuma planilha para processar")
+
+            manager = multiprocessing.Manager()
+            events = manager.Queue()
+            stop_event = manager.Event()
+            options = {
+                'equalize': self.equalize,
+                'output_format': self.output_format,
+                'use_cache': self.use_cache,
+                'export_rows': self.combined_output,
+                'summary': self.summary,
+                'summary_only': self.summary_only,
+                'memory_limit_mb': self.memory_limit_mb,
+                'output_dir': self.output_dir,
+                'dedup': self.dedup,
+                'history_path': self.history_path
+            }
+
+            for index in range(len(self.file_paths)):
+                self._report.status(index, "Na fila")
+
+            pool = ProcessPoolExecutor(max_workers=min(self.workers, len(self.file_paths)))
+            futures = {
+                pool.submit(_process_file_worker, index, path, options, events, stop_event): index
+                for index, path in enumerate(self.file_paths)
+            }
+            pending = set(futures)
+            while pending:
+                if self._interrupted:
+                    stop_event.set()
+                done, pending = wait(pending, timeout=self.PROGRESS_INTERVAL, return_when=FIRST_COMPLETED)
+                self._drain_events(events, file_progress)
+
+                for future in done:
+                    index = futures[future]
+                    name = os.path.basename(self.file_paths[index])
+                    try:
+                        error, output, rows_path, timing = future.result()
+                    except Exception as e:
+                        error, output, rows_path, timing = str(e), None, None, None
+                    timer.merge(timing)
+
+                    file_progress[index] = 100
+                    if error:
+                        self.failures += 1
+                        self._report.status(index, "Erro")
+                        self._report.log(f"{name}: {error}")
+                    else:
+                        rows_paths[index] = rows_path
+                        self._report.status(index, "Concluído")
+                        self._report.log(f"{name}: {output}")
+                self._emit_progress(sum(file_progress) / len(file_progress))
+            self._drain_events(events, file_progress)
+
+            if self._interrupted:
+                return None
+
+            message = f"{len(self.file_paths) - self.failures} de {len(self.file_paths)} arquivos processados"
+            if self.combined_output:
+                runs = SortedRuns(key=self._sort_key)
+                for path in rows_paths:
+                    if path:
+                        runs.add_spilled(path)
+                self.output_path = self._get_output_path()
+                self._report.log("Gerando saída combinada...")
+                self._report.flush()
+                # O histórico já recebeu as linhas de cada arquivo
+                with timer.span("saída combinada", formato=self.output_format):
+                    self._write_output(self.output_path, runs.merged(), store_history=False)
+                message += f". Saída combinada: {self.output_path}{self._dedup_message()}"
+            self._emit_progress(100, force=True)
+            return message
+        finally:
+            self._report.flush()
+            if 'pool' in locals(): pool.shutdown(wait=True, cancel_futures=True)
+            if 'manager' in locals(): manager.shutdown()
+            if 'runs' in locals():
+                runs.close()
+            else:
+                for path in rows_paths:
+                    if path and os.path.exists(path):
+                        os.remove(path)
+            gc.collect()
+            timer.finish()
+
+    def _drain_events(self, events, file_progress):
+        while True:
+            try:
+                index, kind, value = events.get_nowait()
+            except queue.Empty:
+                return
+            if kind == 'progress':
+                file_progress[index] = value
+            elif kind == 'status':
+                self._report.status(index, value)
+            else:
+                # Mensagem ainda sem a contagem (on_entry do canal do filho): o canal daqui formata uma vez só
+                name = os.path.basename(self.file_paths[index])
+                message, count, group = value
+                self._report.log(f"{name}: {message}", group=f"{name}: {group}" if group else None, count=count)
+
+    def _get_output_path(self):
+        folder = self.output_dir or os.path.dirname(self.file_paths[0])
+        return self._output_name(os.path.join(folder, self.COMBINED_NAME), '.xlsx')
+
+
+def _process_file_worker(index, file_path, options, events, stop_event):
+    """
+    Executado no processo filho: processa um arquivo e repassa status, progresso e logs pela fila.
+    Devolve (erro, mensagem, caminho das linhas exportadas, tempos).
+    """
+    def on_progress(value):
+        events.put((index, 'progress', value))
+        if stop_event.is_set():
+            processor.stop()
+
+    processor = MotorAgitel(file_path, on_progress=on_progress, **options)
+    processor._report.on_entry = lambda message, count, group: events.put((index, 'log', (message, count, group)))
+    if stop_event.is_set():
+        return "Cancelado", None, None, None
+    events.put((index, 'status', "Processando"))
+    try:
+        output = processor.process()
+    except Exception as e:
+        logging.exception(f"Erro ao processar {file_path}")
+        return f"Erro crítico: {str(e)}", None, None, processor.timer.export()
+    return None, output, processor.rows_path, processor.timer.export()
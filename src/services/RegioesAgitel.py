@@ -0,0 +1,113 @@
+import os
+import re
+import json
+import hashlib
+import logging
+from utils.appPaths import app_path
+
+
+class RegioesAgitel:
+    """
+    Regras de equalização da coluna Região, editáveis em ARQUIVO_PADRAO (JSON).
+
+    Cada regra é {"tipo": "contem" | "regex" | "igual", "padrao": ..., "valor": ...},
+    sem diferenciar maiúsculas; a primeira regra que casar define o valor e
+    Regiões que nenhuma regra casar ficam como vieram. As regras são compiladas
+    uma vez e cada Região distinta é resolvida uma única vez (memo), então cada
+    linha custa uma consulta de dicionário.
+    """
+
+    # Na pasta do aplicativo, junto do config.ini: as regras não dependem da pasta de onde ele foi aberto
+    ARQUIVO_PADRAO = app_path('agitel_regioes.json')
+    TIPOS = ('contem', 'regex', 'igual')
+    # Regiões distintas guardadas no memo antes de ele ser esvaziado
+    MAX_MEMO = 100_000
+
+    REGRAS_PADRAO = [
+        {'tipo': 'contem', 'padrao': 'fixo', 'valor': 'Fixo'},
+        {'tipo': 'contem', 'padrao': 'movel', 'valor': 'Móvel'},
+        {'tipo': 'contem', 'padrao': 'móvel', 'valor': 'Móvel'},
+        {'tipo': 'regex', 'padrao': r'^\s+$', 'valor': 'Intragrupo'}
+    ]
+
+    def __init__(self, regras=None):
+        self.regras = []
+        self._matchers = []
+        for regra in self.REGRAS_PADRAO if regras is None else regras:
+            try:
+                self._matchers.append(self._compile(regra))
+                self.regras.append(regra)
+            except (TypeError, ValueError, re.error) as e:
+                logging.warning(f"Regra de Região ignorada {regra!r}: {str(e)}")
+        self._memo = {}
+
+    @classmethod
+    def carregar(cls, path=None):
+        """Regras do arquivo, ou as padrão se ele não existir (o arquivo não é criado aqui)"""
+        try:
+            with open(path or cls.ARQUIVO_PADRAO, 'r', encoding='utf-8') as f:
+                return cls(json.load(f))
+        except FileNotFoundError:
+            return cls()
+        except Exception as e:
+            logging.warning(f"Regras de Região do Agitel ignoradas: {str(e)}")
+            return cls()
+
+    @classmethod
+    def criar_arquivo_padrao(cls, path=None):
+        """Grava as regras padrão se o arquivo ainda não existir (primeira abertura da interface)"""
+        path = path or cls.ARQUIVO_PADRAO
+        if not os.path.exists(path):
+            cls().salvar(path)
+
+    def salvar(self, path=None):
+        try:
+            with open(path or self.ARQUIVO_PADRAO, 'w', encoding='utf-8') as f:
+                json.dump(self.regras, f, ensure_ascii=False, indent=2)
+        except Exception as e:
+            logging.warning(f"Erro ao salvar as regras de Região do Agitel: {str(e)}")
+
+    def fingerprint(self):
+        """Identifica o conjunto de regras (entra na chave do cache de abas)"""
+        raw = json.dumps(self.regras, ensure_ascii=False, sort_keys=True)
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()[:12]
+
+    @classmethod
+    def _compile(cls, regra):
+        ausentes = [campo for campo in ('tipo', 'padrao', 'valor') if campo not in regra]
+        if ausentes:
+            raise ValueError(f"campos ausentes: {', '.join(ausentes)}")
+        tipo, padrao, valor = regra['tipo'], regra['padrao'], regra['valor']
+        if tipo not in cls.TIPOS:
+            raise ValueError(f"tipo deve ser um de {', '.join(cls.TIPOS)}")
+        if not isinstance(padrao, str) or not isinstance(valor, str):
+            raise TypeError("padrao e valor devem ser texto")
+        if tipo == 'regex':
+            return re.compile(padrao, re.IGNORECASE).search, valor
+        if tipo == 'contem':
+            return re.compile(re.escape(padrao), re.IGNORECASE).search, valor
+        # 'igual': o texto inteiro, ignorando espaços nas pontas
+        return re.compile(r'\s*' + re.escape(padrao.strip()) + r'\s*', re.IGNORECASE).fullmatch, valor
+
+    def __call__(self, value):
+        try:
+            return self._memo[value]
+        except KeyError:
+            return self._resolve(value)
+
+    def equalize_column(self, values):
+        memo = self._memo
+        return [memo[value] if value in memo else self._resolve(value) for value in values]
+
+    def _resolve(self, value):
+        result = value
+        if value:
+            text = str(value)
+            for match, valor in self._matchers:
+                if match(text):
+                    result = valor
+                    break
+        if len(self._memo) >= self.MAX_MEMO:
+            self._memo.clear()
+        self._memo[value] = result
+        return result
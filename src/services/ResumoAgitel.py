@@ -0,0 +1,77 @@
+import csv
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, Alignment
+from utils.excelDays import ExcelDays
+
+
+class ResumoAgitel:
+    """
+    Totais acumulados enquanto as linhas de saída passam pelo gravador:
+    quantidade de chamadas, minutos e valor por Região, por Origem e por dia.
+    """
+
+    COLUNAS = ['Agrupamento', 'Chave', 'Chamadas', 'Minutos', 'Valor']
+    AGRUPAMENTOS = ('Região', 'Origem', 'Dia')
+    FORMATOS = {3: '0.0', 4: 'R$ #,##0.00'}
+
+    def __init__(self):
+        self.totals = {name: {} for name in self.AGRUPAMENTOS}
+        self._day = ExcelDays()
+
+    def track(self, rows):
+        """Repassa as linhas sem alterá-las, acumulando os totais pelo caminho"""
+        regioes, origens, dias = (self.totals[name] for name in self.AGRUPAMENTOS)
+        for row in rows:
+            minutes = row[6] if type(row[6]) in (int, float) else 0
+            value = row[7] if type(row[7]) in (int, float) else 0
+            for group, key in ((regioes, row[3]), (origens, row[1]), (dias, self._day(row[0]))):
+                entry = group.get(key)
+                if entry is None:
+                    group[key] = [1, minutes, value]
+                else:
+                    entry[0] += 1
+                    entry[1] += minutes
+                    entry[2] += value
+            yield row
+
+    def rows(self):
+        """Linhas do resumo: cada agrupamento em ordem de chave, seguido do total geral"""
+        for name in self.AGRUPAMENTOS:
+            group = self.totals[name]
+            for key in sorted(group, key=lambda k: "" if k is None else str(k).lower()):
+                count, minutes, value = group[key]
+                yield [name, "" if key is None else key, count, minutes, value]
+
+        count = minutes = value = 0
+        for entry in self.totals['Região'].values():
+            count += entry[0]
+            minutes += entry[1]
+            value += entry[2]
+        yield ['Total', "", count, minutes, value]
+
+    def write_sheet(self, sheet):
+        """Grava o resumo em uma aba write-only"""
+        header = []
+        for title in self.COLUNAS:
+            cell = WriteOnlyCell(sheet, value=title)
+            cell.font = Font(bold=True)
+            cell.alignment = Alignment(horizontal='center')
+            header.append(cell)
+        sheet.append(header)
+
+        templates = {}
+        for col, number_format in self.FORMATOS.items():
+            templates[col] = WriteOnlyCell(sheet)
+            templates[col].number_format = number_format
+        for values in self.rows():
+            for col, cell in templates.items():
+                cell.value = values[col]
+                values[col] = cell
+            sheet.append(values)
+
+    def write_csv(self, path):
+        with open(path, 'w', newline='', encoding='utf-8-sig') as f:
+            writer = csv.writer(f)
+            writer.writerow(self.COLUNAS)
+            for name, key, count, minutes, value in self.rows():
+                writer.writerow([name, key, count, round(minutes, 2), round(value, 2)])
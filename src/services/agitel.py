@@ -0,0 +1,111 @@
+"""
+Processamento da Agitel pela linha de comando, sem interface (agendador, servidor).
+
+Exemplos (a partir da pasta src):
+    python -m services.agitel planilha.xlsx
+    python -m services.agitel pasta_exports/ --out saida/ --format parquet --workers 4
+    python -m services.agitel jan.xlsx fev.xlsx --combined --summary-only
+"""
+import os
+import sys
+import logging
+import argparse
+
+from services.HistoricoAgitel import HistoricoAgitel
+from services.ProcessamentoAgitel import MotorAgitel
+from services.ProcessamentoAgitelLote import MotorAgitelLote
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog="python -m services.agitel",
+        description="Converte as planilhas de chamadas da Agitel para XLSX, CSV ou Parquet."
+    )
+    parser.add_argument("inputs", nargs="+", metavar="ENTRADA",
+                        help="arquivos .xlsx ou pastas com exports da Agitel")
+    parser.add_argument("--out", dest="output_dir",
+                        help="pasta de saída (padrão: a mesma de cada arquivo)")
+    parser.add_argument("--format", dest="output_format", default="xlsx",
+                        choices=MotorAgitel.FORMATOS_SAIDA)
+    parser.add_argument("--workers", type=int, default=1,
+                        help="processos simultâneos (abas de um arquivo ou arquivos de um lote)")
+    parser.add_argument("--equalize", action="store_true", help="equaliza a coluna 'Região' (regras em agitel_regioes.json, junto do config.ini)")
+    parser.add_argument("--combined", action="store_true",
+                        help="com vários arquivos, grava também uma saída combinada")
+    parser.add_argument("--summary", action="store_true", help="gera o resumo por Região, Origem e dia")
+    parser.add_argument("--summary-only", action="store_true", help="grava apenas o resumo")
+    parser.add_argument("--dedup", action="store_true",
+                        help="remove chamadas repetidas (mesma Data, Origem, Destino e Duração)")
+    parser.add_argument("--history", nargs="?", const=HistoricoAgitel.ARQUIVO_PADRAO, metavar="DB",
+                        help="guarda as linhas no histórico SQLite (padrão: %(const)s); "
+                             "consultas com python -m services.agitel_historico")
+    parser.add_argument("--cache", action="store_true", help="reaproveita abas sem alterações")
+    parser.add_argument("--memory-limit", type=int, metavar="MB", help="limite de memória em MB")
+    parser.add_argument("--timings", action="store_true", help="mostra o tempo de cada etapa ao final")
+    parser.add_argument("--trace", metavar="JSON",
+                        help="grava os tempos por etapa em JSON (formato Chrome trace)")
+    parser.add_argument("--quiet", action="store_true", help="mostra apenas erros e o resultado final")
+    return parser.parse_args(argv)
+
+
+def _expand_inputs(inputs):
+    file_paths = []
+    for path in inputs:
+        if os.path.isdir(path):
+            file_paths.extend(MotorAgitelLote.list_folder(path))
+        else:
+            file_paths.append(path)
+    return file_paths
+
+
+def main(argv=None):
+    args = _parse_args(argv)
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s: %(message)s")
+
+    file_paths = _expand_inputs(args.inputs)
+    if not file_paths:
+        print("Nenhuma planilha encontrada.", file=sys.stderr)
+        return 2
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+
+    on_log = None if args.quiet else print
+    options = dict(
+        workers=args.workers,
+        output_format=args.output_format,
+        use_cache=args.cache,
+        summary=args.summary,
+        summary_only=args.summary_only,
+        memory_limit_mb=args.memory_limit,
+        output_dir=args.output_dir,
+        dedup=args.dedup,
+        history_path=args.history,
+        on_log=on_log
+    )
+
+    try:
+        if len(file_paths) == 1:
+            engine = MotorAgitel(file_paths[0], args.equalize, **options)
+        else:
+            engine = MotorAgitelLote(
+                file_paths, args.equalize, combined_output=args.combined,
+                on_status=None if args.quiet else lambda index, status: print(
+                    f"[{status}] {os.path.basename(file_paths[index])}"
+                ),
+                **options
+            )
+        print(engine.process())
+    except Exception as e:
+        print(f"Erro crítico: {str(e)}", file=sys.stderr)
+        return 1
+    finally:
+        if 'engine' in locals():
+            if args.timings:
+                print("\n".join(engine.timer.report_lines()))
+            if args.trace:
+                engine.timer.save(args.trace)
+    return 1 if getattr(engine, 'failures', 0) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,72 @@
+"""
+Consultas ao histórico de chamadas da Agitel (gravado com --history ou pela opção
+"Salvar no histórico" da interface), sem reprocessar as planilhas.
+
+Exemplos (a partir da pasta src):
+    python -m services.agitel_historico --por origem --regiao Móvel --ultimos 6
+    python -m services.agitel_historico --por mes regiao --desde 2025-01 --csv
+    python -m services.agitel_historico --arquivos
+"""
+import os
+import sys
+import csv
+import argparse
+
+from services.HistoricoAgitel import HistoricoAgitel
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog="python -m services.agitel_historico",
+        description="Totais de chamadas, minutos e valor do histórico da Agitel."
+    )
+    parser.add_argument("--db", default=HistoricoAgitel.ARQUIVO_PADRAO, help="banco do histórico")
+    parser.add_argument("--por", nargs="+", default=["mes"], choices=list(HistoricoAgitel.CAMPOS),
+                        help="campos de agrupamento (padrão: mes)")
+    parser.add_argument("--desde", metavar="AAAA-MM", help="primeiro mês (inclusivo)")
+    parser.add_argument("--ate", metavar="AAAA-MM", help="último mês (inclusivo)")
+    parser.add_argument("--ultimos", type=int, metavar="N", help="apenas os últimos N meses")
+    parser.add_argument("--regiao", help="filtra pela Região (como gravada na saída)")
+    parser.add_argument("--origem", help="filtra pela Origem")
+    parser.add_argument("--servico", help="filtra pelo Serviço")
+    parser.add_argument("--csv", action="store_true", help="resultado em CSV na saída padrão")
+    parser.add_argument("--arquivos", action="store_true", help="lista os arquivos já gravados")
+    return parser.parse_args(argv)
+
+
+def _print_table(header, rows):
+    rows = [["" if value is None else str(value) for value in row] for row in rows]
+    widths = [max([len(str(title)), *(len(row[i]) for row in rows)]) for i, title in enumerate(header)]
+    print("  ".join(str(title).ljust(width) for title, width in zip(header, widths)))
+    for row in rows:
+        print("  ".join(value.ljust(width) for value, width in zip(row, widths)))
+
+
+def main(argv=None):
+    args = _parse_args(argv)
+    if not os.path.exists(args.db):
+        print(f"Histórico não encontrado: {args.db}", file=sys.stderr)
+        return 2
+
+    with HistoricoAgitel(args.db) as historico:
+        if args.arquivos:
+            header, rows = ["Arquivo", "Importado em", "Linhas"], historico.cargas()
+        else:
+            desde = HistoricoAgitel.primeiro_mes(args.ultimos) if args.ultimos else args.desde
+            header = [*args.por, "Chamadas", "Minutos", "Valor"]
+            rows = historico.totais(
+                args.por, desde=desde, ate=args.ate,
+                regiao=args.regiao, origem=args.origem, servico=args.servico
+            )
+
+    if args.csv:
+        writer = csv.writer(sys.stdout)
+        writer.writerow(header)
+        writer.writerows(rows)
+    else:
+        _print_table(header, rows)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,31 @@
+import os
+import sys
+
+
+def app_dir():
+    """
+    Pasta do aplicativo: a do executável no build do PyInstaller (sys.frozen) ou a
+    raiz do projeto (acima de src). Não depende da pasta de onde o app ou a CLI
+    foram abertos, então a interface e a linha de comando usam os mesmos arquivos.
+    """
+    if getattr(sys, 'frozen', False):
+        return os.path.dirname(sys.executable)
+    return os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def app_path(name):
+    """Caminho de um arquivo de dados ou configuração do app (ex.: config.ini) na pasta do aplicativo"""
+    return os.path.join(app_dir(), name)
+
+
+def user_cache_dir(name):
+    """
+    Pasta de cache do usuário para `name` (%LOCALAPPDATA%\\LE_Helper no Windows,
+    $XDG_CACHE_HOME ou ~/.cache/le_helper nos demais): dados que podem ser
+    apagados a qualquer momento, fora da pasta do app e da pasta atual.
+    """
+    if sys.platform == 'win32' and os.environ.get('LOCALAPPDATA'):
+        base = os.path.join(os.environ['LOCALAPPDATA'], 'LE_Helper')
+    else:
+        base = os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache'), 'le_helper')
+    return os.path.join(base, name)
@@ -0,0 +1,97 @@
+import os
+import sqlite3
+import hashlib
+import tempfile
+import numpy as np
+
+
+class DedupIndex:
+    """
+    Índice de chaves já vistas, para descartar linhas repetidas em streaming.
+
+    Cada chave vira um hash de 64 bits (blake2b). Os hashes ficam em um array
+    NumPy ordenado (8 bytes por chave) mais um conjunto pequeno com os últimos
+    incluídos, que é incorporado ao array de tempos em tempos. Acima de
+    max_keys_in_memory o índice passa para um SQLite temporário em disco.
+    """
+
+    PENDING_SIZE = 65_536
+
+    def __init__(self, max_keys_in_memory=None):
+        self.max_keys_in_memory = max_keys_in_memory
+        self.dropped = 0
+        self._keys = np.empty(0, dtype=np.int64)
+        self._pending = set()
+        self._db = None
+        self._db_path = None
+
+    def unique(self, rows, key):
+        """Repassa apenas a primeira linha de cada chave; as demais são contadas em `dropped`"""
+        for row in rows:
+            if self.add(key(row)):
+                yield row
+            else:
+                self.dropped += 1
+
+    def add(self, key):
+        """Inclui a chave no índice; retorna False se ela já tinha sido vista"""
+        digest = hashlib.blake2b(repr(key).encode('utf-8'), digest_size=8).digest()
+        value = int.from_bytes(digest, 'little', signed=True)
+        if value in self._pending or self._contains(value):
+            return False
+
+        self._pending.add(value)
+        if len(self._pending) >= max(self.PENDING_SIZE, len(self._keys) // 8):
+            self._flush_pending()
+        return True
+
+    def __len__(self):
+        if self._db is not None:
+            return self._db.execute("SELECT COUNT(*) FROM keys").fetchone()[0] + len(self._pending)
+        return len(self._keys) + len(self._pending)
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+        if self._db_path and os.path.exists(self._db_path):
+            os.remove(self._db_path)
+        self._db_path = None
+        self._keys = np.empty(0, dtype=np.int64)
+        self._pending = set()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _contains(self, value):
+        if self._db is not None:
+            return self._db.execute("SELECT 1 FROM keys WHERE hash = ?", (value,)).fetchone() is not None
+        position = np.searchsorted(self._keys, value)
+        return position < len(self._keys) and self._keys[position] == value
+
+    def _flush_pending(self):
+        if self._db is None and self.max_keys_in_memory and \
+                len(self._keys) + len(self._pending) > self.max_keys_in_memory:
+            self._open_db()
+
+        if self._db is not None:
+            self._db.executemany("INSERT OR IGNORE INTO keys VALUES (?)", ((v,) for v in self._pending))
+        else:
+            # Inserção ordenada: uma cópia do array por bloco, sem reordenar o que já existe
+            new = np.fromiter(self._pending, np.int64, len(self._pending))
+            new.sort()
+            self._keys = np.insert(self._keys, np.searchsorted(self._keys, new), new)
+        self._pending = set()
+
+    def _open_db(self):
+        fd, self._db_path = tempfile.mkstemp(prefix="le_helper_", suffix=".dedup")
+        os.close(fd)
+        self._db = sqlite3.connect(self._db_path)
+        self._db.execute("PRAGMA journal_mode = OFF")
+        self._db.execute("PRAGMA synchronous = OFF")
+        self._db.execute("CREATE TABLE keys (hash INTEGER PRIMARY KEY) WITHOUT ROWID")
+        self._db.executemany("INSERT INTO keys VALUES (?)", ((int(v),) for v in self._keys))
+        self._keys = np.empty(0, dtype=np.int64)
@@ -0,0 +1,45 @@
+from datetime import date, datetime as dt_datetime
+from openpyxl.utils import datetime as xl_datetime
+
+
+class ExcelDays:
+    """
+    Dia 'AAAA-MM-DD' de uma Data da Agitel, que chega como serial do Excel (a
+    parte inteira é o dia) ou como texto dd/mm/aaaa, com ou sem a hora. O que não
+    for uma data vira None. Cada dia distinto é convertido uma única vez.
+    """
+
+    MAX_CACHE = 100_000
+
+    def __init__(self):
+        self._cache = {}
+
+    def __call__(self, value):
+        if isinstance(value, str):
+            # Só a parte da data: "05/01/2024 08:30:00" e "05/01/2024" são o mesmo dia
+            parts = value.split()
+            key = parts[0] if parts else ""
+        elif type(value) in (int, float):
+            key = int(value)
+        else:
+            return None
+
+        text = self._cache.get(key)
+        if text is None and key not in self._cache:
+            if len(self._cache) >= self.MAX_CACHE:
+                self._cache.clear()
+            text = self._cache[key] = self._convert(key)
+        return text
+
+    @staticmethod
+    def _convert(key):
+        if isinstance(key, int):
+            converted = xl_datetime.from_excel(key)
+            return converted.strftime('%Y-%m-%d') if isinstance(converted, dt_datetime) else None
+        parts = key.split('/')
+        if len(parts) != 3 or not all(part.isdigit() for part in parts):
+            return None
+        try:
+            return date(int(parts[2]), int(parts[1]), int(parts[0])).isoformat()
+        except ValueError:
+            return None
@@ -0,0 +1,110 @@
+import heapq
+import os
+import pickle
+import tempfile
+
+
+class SortedRuns:
+    """
+    Ordenação externa: cada bloco de linhas é ordenado uma única vez (um "run"),
+    mantido em memória ou despejado em arquivo temporário, e todos os runs são
+    unidos por um único k-way merge na leitura.
+
+    O merge é estável: em chaves iguais prevalece a ordem em que os runs foram
+    adicionados, igual a um sort estável sobre todas as linhas concatenadas.
+
+    Runs em memória não contam para max_runs: só quando há mais de max_runs
+    arquivos (abertos juntos no merge) todos os runs são unidos em um só.
+    """
+
+    BATCH_SIZE = 1000
+
+    def __init__(self, key, max_rows_in_memory=200_000, max_runs=64):
+        self.key = key
+        self.max_rows_in_memory = max_rows_in_memory
+        self.max_runs = max_runs
+        self._runs = []  # listas (em memória) ou caminhos de arquivos temporários
+        self._rows_in_memory = 0
+        self._spilled = 0
+        self.total_rows = 0
+
+    def add_run(self, rows):
+        rows = sorted(rows, key=self.key)
+        if not rows:
+            return
+
+        self.total_rows += len(rows)
+        if self._rows_in_memory + len(rows) > self.max_rows_in_memory:
+            self._add_file(self._spill(rows))
+        else:
+            self._runs.append(rows)
+            self._rows_in_memory += len(rows)
+
+    def add_spilled(self, path):
+        """Adota um run já ordenado e gravado por export(); o arquivo passa a ser desta instância"""
+        self._add_file(path)
+
+    def export(self):
+        """Grava todas as linhas, já ordenadas, em um único arquivo de run e devolve o caminho"""
+        return self._spill(self.merged())
+
+    def merged(self):
+        """Itera todas as linhas em ordem (k-way merge dos runs)"""
+        iterables = [
+            run if isinstance(run, list) else self._read_spilled(run)
+            for run in self._runs
+        ]
+        return heapq.merge(*iterables, key=self.key)
+
+    def close(self):
+        for run in self._runs:
+            if not isinstance(run, list) and os.path.exists(run):
+                os.remove(run)
+        self._runs = []
+        self._rows_in_memory = 0
+        self._spilled = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.total_rows
+
+    def _add_file(self, path):
+        self._runs.append(path)
+        self._spilled += 1
+        if self._spilled > self.max_runs:
+            self._compact()
+
+    def _compact(self):
+        # Limita o número de arquivos abertos no merge final unindo os runs atuais em um só
+        path = self._spill(self.merged())
+        self.close()
+        self._runs = [path]
+        self._spilled = 1
+
+    def _spill(self, rows):
+        fd, path = tempfile.mkstemp(prefix="le_helper_", suffix=".run")
+        with os.fdopen(fd, "wb") as f:
+            batch = []
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= self.BATCH_SIZE:
+                    pickle.dump(batch, f, protocol=pickle.HIGHEST_PROTOCOL)
+                    batch = []
+            if batch:
+                pickle.dump(batch, f, protocol=pickle.HIGHEST_PROTOCOL)
+        return path
+
+    @staticmethod
+    def _read_spilled(path):
+        with open(path, "rb") as f:
+            while True:
+                try:
+                    batch = pickle.load(f)
+                except EOFError:
+                    return
+                yield from batch
@@ -0,0 +1,97 @@
+import time
+import threading
+from collections import OrderedDict
+
+
+class ReportChannel:
+    """
+    Canal de log e progresso dos workers. As mensagens ficam em buffer e são
+    repassadas em lote no máximo a cada `interval` segundos; mensagens iguais
+    (ou do mesmo `group`) viram uma só linha com a contagem, e do progresso
+    e de cada status (por chave, ex.: linha da tabela de arquivos) só o valor
+    mais recente é repassado.
+
+    Os callbacks normalmente são o .emit dos sinais do worker, então a
+    interface recebe poucos sinais por segundo mesmo com milhares de mensagens.
+    Quem usa o canal deve chamar flush() antes de sinalizar o fim do trabalho.
+
+    Com on_entry(mensagem, contagem, group) as mensagens são repassadas sem
+    formatar, para outro canal (ex.: o do processo pai) somar as contagens.
+    """
+
+    # Mensagens distintas no buffer; ao chegar nesse número o lote é repassado antes do intervalo
+    MAX_GROUPS = 50
+
+    def __init__(self, on_log=None, on_progress=None, interval=0.25, on_status=None):
+        self.on_log = on_log
+        self.on_progress = on_progress
+        self.on_status = on_status
+        self.on_entry = None
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._groups = OrderedDict()  # chave -> [primeira mensagem, contagem, group]
+        self._status = OrderedDict()
+        self._progress = None
+        self._last_progress = None
+        self._last_flush = 0.0
+
+    def log(self, message, group=None, count=1):
+        with self._lock:
+            key = group or message
+            entry = self._groups.get(key)
+            if entry is not None:
+                entry[1] += count
+            else:
+                self._groups[key] = [message, count, group]
+            full = len(self._groups) >= self.MAX_GROUPS
+        if full:
+            self.flush()
+        else:
+            self._maybe_flush()
+
+    def status(self, key, value):
+        with self._lock:
+            self._status.pop(key, None)
+            self._status[key] = value
+        self._maybe_flush()
+
+    def progress(self, value, force=False):
+        with self._lock:
+            self._progress = int(value)
+        if force:
+            self.flush()
+        else:
+            self._maybe_flush()
+
+    def flush(self):
+        with self._lock:
+            groups, self._groups = self._groups, OrderedDict()
+            status, self._status = self._status, OrderedDict()
+            progress = self._progress
+            self._last_flush = time.monotonic()
+
+        if self.on_status:
+            for key, value in status.items():
+                self.on_status(key, value)
+
+        for message, count, group in groups.values():
+            if self.on_entry:
+                self.on_entry(message, count, group)
+            elif self.on_log:
+                self.on_log(self._format(message, count, group))
+
+        if self.on_progress and progress is not None and progress != self._last_progress:
+            self._last_progress = progress
+            self.on_progress(progress)
+
+    @staticmethod
+    def _format(message, count, group):
+        if count == 1:
+            return message
+        if group is not None:
+            return f"{message} (+{count - 1} semelhantes)"
+        return f"{message} (x{count})"
+
+    def _maybe_flush(self):
+        if time.monotonic() - self._last_flush >= self.interval:
+            self.flush()
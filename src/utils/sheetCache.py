@@ -0,0 +1,181 @@
+import os
+import json
+import time
+import pickle
+import hashlib
+import logging
+from contextlib import contextmanager
+from utils.appPaths import user_cache_dir
+
+
+class SheetCache:
+    """
+    Cache em disco das linhas já convertidas de cada aba. A entrada é identificada
+    pela planilha (caminho absoluto) e pelo título da aba, e só vale enquanto o
+    fingerprint do conteúdo da aba for o mesmo.
+
+    Entradas de planilhas que não existem mais, sem uso há mais de max_age_days
+    ou além de max_bytes (as menos usadas primeiro) são removidas em prune().
+
+    Vários processos (lote com --workers) podem usar o mesmo diretório: save()
+    relê o índice sob um arquivo de trava e grava só as alterações deste processo.
+    Sem directory, o cache fica na pasta de cache do usuário (utils.appPaths).
+    """
+
+    INDEX_FILE = 'index.json'
+    LOCK_FILE = 'index.lock'
+    # Trava mais antiga que isso é de um processo que morreu sem liberá-la
+    LOCK_TIMEOUT = 30
+    # Arquivos fora do índice só são apagados depois disso (outro processo pode estar prestes a registrá-los)
+    ORPHAN_AGE = 3600
+
+    def __init__(self, directory=None, max_bytes=512 * 1024 * 1024, max_age_days=90):
+        self.directory = directory or user_cache_dir('agitel_cache')
+        self.max_bytes = max_bytes
+        self.max_age = max_age_days * 86400
+        self._index = self._load_index()
+        # Alterações deste processo, aplicadas sobre o índice em disco no save()
+        self._updated = {}
+        self._removed = {}
+
+    def has(self, workbook_path, sheet_title, fingerprint):
+        entry = self._index.get(self._key(workbook_path, sheet_title))
+        return bool(entry) and entry['fingerprint'] == fingerprint and \
+            os.path.exists(os.path.join(self.directory, entry['file']))
+
+    def get(self, workbook_path, sheet_title, fingerprint):
+        key = self._key(workbook_path, sheet_title)
+        entry = self._index.get(key)
+        if not entry or entry['fingerprint'] != fingerprint:
+            return None
+
+        try:
+            with open(os.path.join(self.directory, entry['file']), 'rb') as f:
+                rows = pickle.load(f)
+        except Exception as e:
+            logging.warning(f"Entrada de cache inválida ({sheet_title}): {str(e)}")
+            self._remove(key)
+            return None
+
+        entry['last_used'] = time.time()
+        self._updated[key] = entry
+        return rows
+
+    def put(self, workbook_path, sheet_title, fingerprint, rows):
+        key = self._key(workbook_path, sheet_title)
+        self._remove(key)
+
+        os.makedirs(self.directory, exist_ok=True)
+        file_name = f"{key}_{fingerprint[:12]}.pkl"
+        path = os.path.join(self.directory, file_name)
+        with open(path, 'wb') as f:
+            pickle.dump(rows, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+        self._index[key] = {
+            'workbook': os.path.abspath(workbook_path),
+            'sheet': sheet_title,
+            'fingerprint': fingerprint,
+            'file': file_name,
+            'size': os.path.getsize(path),
+            'last_used': time.time()
+        }
+        self._updated[key] = self._index[key]
+        self._removed.pop(key, None)
+
+    def prune(self):
+        now = time.time()
+        for key, entry in list(self._index.items()):
+            if not os.path.exists(entry['workbook']) or now - entry['last_used'] > self.max_age:
+                self._remove(key)
+
+        total = sum(entry['size'] for entry in self._index.values())
+        for key, entry in sorted(self._index.items(), key=lambda item: item[1]['last_used']):
+            if total <= self.max_bytes:
+                break
+            total -= entry['size']
+            self._remove(key)
+
+        # Arquivos que nenhuma entrada referencia (índice sobrescrito, processo interrompido)
+        known = {entry['file'] for entry in self._index.values()}
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return
+        for name in names:
+            path = os.path.join(self.directory, name)
+            try:
+                if name.endswith('.pkl') and name not in known and now - os.path.getmtime(path) > self.ORPHAN_AGE:
+                    os.remove(path)
+            except OSError:
+                pass
+
+    def save(self):
+        if not self._updated and not self._removed:
+            return
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with self._locked():
+                # Índice atual em disco (outros processos podem ter gravado) com as alterações deste
+                index = self._load_index()
+                for key, file_name in self._removed.items():
+                    if index.get(key, {}).get('file') == file_name:
+                        del index[key]
+                index.update(self._updated)
+                self._index = index
+                self.prune()
+
+                path = os.path.join(self.directory, self.INDEX_FILE)
+                temp_path = f"{path}.{os.getpid()}.tmp"
+                with open(temp_path, 'w', encoding='utf-8') as f:
+                    json.dump(self._index, f, ensure_ascii=False)
+                os.replace(temp_path, path)
+                self._updated = {}
+                self._removed = {}
+        except Exception as e:
+            logging.warning(f"Erro ao salvar índice do cache: {str(e)}")
+
+    @contextmanager
+    def _locked(self):
+        path = os.path.join(self.directory, self.LOCK_FILE)
+        while True:
+            try:
+                fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                break
+            except FileExistsError:
+                try:
+                    if time.time() - os.path.getmtime(path) > self.LOCK_TIMEOUT:
+                        os.remove(path)
+                        continue
+                except OSError:
+                    continue
+                time.sleep(0.05)
+        try:
+            yield
+        finally:
+            os.close(fd)
+            os.remove(path)
+
+    def _remove(self, key):
+        entry = self._index.pop(key, None)
+        if entry is None:
+            return
+        self._updated.pop(key, None)
+        self._removed[key] = entry['file']
+        path = os.path.join(self.directory, entry['file'])
+        if os.path.exists(path):
+            os.remove(path)
+
+    def _load_index(self):
+        path = os.path.join(self.directory, self.INDEX_FILE)
+        try:
+            if os.path.exists(path):
+                with open(path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+        except Exception as e:
+            logging.warning(f"Índice do cache ignorado: {str(e)}")
+        return {}
+
+    @staticmethod
+    def _key(workbook_path, sheet_title):
+        raw = f"{os.path.abspath(workbook_path)}|{sheet_title}"
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()
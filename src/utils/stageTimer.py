@@ -0,0 +1,226 @@
+import os
+import json
+import time
+import logging
+import threading
+from datetime import datetime
+from contextlib import contextmanager
+from utils.appPaths import app_path
+
+
+class MemorySampler:
+    """
+    Pico de memória de uma execução: uma thread soma o RSS do processo e dos filhos
+    vivos a cada `interval` segundos entre start() e stop(). É o pico da execução,
+    não o do processo desde que foi aberto. Sem psutil, peak_mb fica None.
+    """
+
+    def __init__(self, interval=0.1):
+        self.interval = interval
+        self.peak_mb = None
+        self._peak = 0
+        self._process = None
+        self._thread = None
+        self._started = False
+        self._stop = threading.Event()
+
+    def start(self):
+        """Começa a medir; chamadas seguintes (e depois de stop()) não fazem nada"""
+        if self._started:
+            return
+        self._started = True
+        try:
+            import psutil
+        except ImportError:
+            return
+        self._process = psutil.Process()
+        self._sample()
+        self._thread = threading.Thread(target=self._run, name="MemorySampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return self.peak_mb
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self._sample()
+        self.peak_mb = round(self._peak / 1024 / 1024, 1)
+        return self.peak_mb
+
+    def _sample(self):
+        try:
+            rss = self._process.memory_info().rss
+            for child in self._process.children(recursive=True):
+                try:
+                    rss += child.memory_info().rss
+                except Exception:
+                    # Filho encerrado entre a listagem e a leitura
+                    continue
+        except Exception:
+            return
+        self._peak = max(self._peak, rss)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+
+class StageTimer:
+    """
+    Tempos de cada etapa de um trabalho (spans), contadores (linhas, arquivos...)
+    e o pico de memória da execução (MemorySampler, a partir do primeiro span até
+    finish(); track_memory=False nos timers de processos filhos, que já entram na
+    soma do processo pai), para saber onde o tempo de uma execução foi gasto.
+
+    Uso: `with timer.span("salvar"):` em volta de cada etapa; etapas dentro de
+    outras aparecem recuadas no relatório. report(emit) encerra a execução e
+    manda o resumo para o log do painel; save() grava um JSON no formato Chrome
+    trace (chrome://tracing ou ui.perfetto.dev), com o resumo em "otherData".
+    """
+
+    TRACE_DIR = 'le_helper_tempos'
+    MAX_TRACES = 20
+    # Pasta onde report() grava o trace de cada execução; None (padrão) não grava.
+    # A interface a define com salvar_tempos=true no config.ini
+    trace_dir = None
+
+    def __init__(self, name, track_memory=True):
+        self.name = name
+        self.spans = []
+        self.counters = {}
+        self.peak_rss_mb = None
+        self._memory = MemorySampler() if track_memory else None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._wall0 = time.time()
+        self._perf0 = time.perf_counter()
+        self.started = self.now()
+        self.finished = None
+
+    def now(self):
+        """Segundos desde a época, com a resolução de perf_counter (comparável entre processos)"""
+        return self._wall0 + (time.perf_counter() - self._perf0)
+
+    @contextmanager
+    def span(self, stage, **details):
+        if self._memory:
+            self._memory.start()
+        depth = getattr(self._local, 'depth', 0)
+        self._local.depth = depth + 1
+        start = self.now()
+        try:
+            yield
+        finally:
+            self._local.depth = depth
+            self.add_span(stage, start, self.now(), depth=depth, **details)
+
+    def add_span(self, stage, start, end, depth=None, **details):
+        """Registra uma etapa medida fora de span() (ex.: o intervalo entre itens de um gerador)"""
+        if self._memory:
+            self._memory.start()
+        if depth is None:
+            depth = getattr(self._local, 'depth', 0)
+        with self._lock:
+            self.spans.append({
+                'stage': stage, 'start': start, 'end': end, 'depth': depth,
+                'pid': os.getpid(), 'tid': threading.get_ident(), 'details': details
+            })
+
+    def count(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def export(self):
+        """Spans e contadores em dicionário simples, para voltar de um processo filho"""
+        with self._lock:
+            return {'spans': list(self.spans), 'counters': dict(self.counters)}
+
+    def merge(self, data):
+        """Incorpora o export() de outro StageTimer (processo filho)"""
+        if not data:
+            return
+        with self._lock:
+            self.spans.extend(data['spans'])
+            for name, value in data['counters'].items():
+                self.counters[name] = self.counters.get(name, 0) + value
+
+    def finish(self):
+        if self.finished is not None:
+            return
+        self.finished = self.now()
+        if self._memory:
+            self.peak_rss_mb = self._memory.stop()
+
+    def report(self, emit):
+        """Encerra a execução, passa o resumo linha a linha para emit e grava o trace se trace_dir estiver definido"""
+        self.finish()
+        for line in self.report_lines():
+            emit(line)
+        if self.trace_dir:
+            self.save_run(self.trace_dir)
+
+    def totals(self):
+        """Etapa -> [execuções, segundos, profundidade], na ordem em que apareceram"""
+        totals = {}
+        for span in sorted(self.spans, key=lambda s: s['start']):
+            entry = totals.setdefault(span['stage'], [0, 0.0, span['depth']])
+            entry[0] += 1
+            entry[1] += span['end'] - span['start']
+            entry[2] = min(entry[2], span['depth'])
+        return totals
+
+    def report_lines(self):
+        finished = self.finished or self.now()
+        header = f"Tempos ({self.name}): total {finished - self.started:.2f}s"
+        if self.peak_rss_mb is not None:
+            header += f", pico de memória na execução {self.peak_rss_mb:.0f} MB (processo e filhos)"
+        lines = [header]
+        for stage, (calls, seconds, depth) in self.totals().items():
+            suffix = f" ({calls}x)" if calls > 1 else ""
+            lines.append(f"{'  ' * (depth + 1)}{stage}: {seconds:.2f}s{suffix}")
+        if self.counters:
+            lines.append("  " + ", ".join(f"{name}: {value}" for name, value in self.counters.items()))
+        return lines
+
+    def summary(self):
+        finished = self.finished or self.now()
+        return {
+            'name': self.name,
+            'started': datetime.fromtimestamp(self.started).isoformat(timespec='seconds'),
+            'duration_s': round(finished - self.started, 4),
+            'peak_rss_mb': self.peak_rss_mb,
+            'counters': dict(self.counters),
+            'stages_s': {stage: round(seconds, 4) for stage, (_, seconds, _) in self.totals().items()}
+        }
+
+    def chrome_trace(self):
+        events = [{
+            'name': span['stage'], 'ph': 'X', 'cat': self.name,
+            'ts': round(span['start'] * 1_000_000), 'dur': round((span['end'] - span['start']) * 1_000_000),
+            'pid': span['pid'], 'tid': span['tid'], 'args': span['details']
+        } for span in self.spans]
+        return {'traceEvents': events, 'displayTimeUnit': 'ms', 'otherData': self.summary()}
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.chrome_trace(), f, ensure_ascii=False, default=str)
+        return path
+
+    def save_run(self, directory=None):
+        """Grava o trace em directory ou TRACE_DIR, na pasta do app (mantendo os MAX_TRACES mais recentes); falhas só vão para o log"""
+        directory = directory or app_path(self.TRACE_DIR)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            stamp = datetime.fromtimestamp(self.started).strftime('%Y%m%d_%H%M%S')
+            path = self.save(os.path.join(directory, f"{self.name}_{stamp}.json"))
+            traces = sorted(
+                (os.path.join(directory, name) for name in os.listdir(directory) if name.endswith('.json')),
+                key=os.path.getmtime
+            )
+            for old in traces[:-self.MAX_TRACES]:
+                os.remove(old)
+            return path
+        except Exception as e:
+            logging.warning(f"Erro ao salvar os tempos de {self.name}: {str(e)}")
+            return None
@@ -0,0 +1,440 @@
+import re
+import hashlib
+import posixpath
+import zipfile
+from xml.etree.ElementTree import iterparse
+
+from openpyxl.formula.translate import Translator
+from openpyxl.styles.numbers import BUILTIN_FORMATS, is_date_format, is_timedelta_format
+from openpyxl.utils.cell import range_boundaries
+from openpyxl.utils.datetime import from_excel, from_ISO8601, WINDOWS_EPOCH, MAC_EPOCH
+
+SHEET_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+PKG_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+
+ROW_TAG = f"{{{SHEET_NS}}}row"
+CELL_TAG = f"{{{SHEET_NS}}}c"
+VALUE_TAG = f"{{{SHEET_NS}}}v"
+FORMULA_TAG = f"{{{SHEET_NS}}}f"
+INLINE_TAG = f"{{{SHEET_NS}}}is"
+TEXT_TAG = f"{{{SHEET_NS}}}t"
+RUN_TAG = f"{{{SHEET_NS}}}r"
+SI_TAG = f"{{{SHEET_NS}}}si"
+DIMENSION_TAG = f"{{{SHEET_NS}}}dimension"
+SHEET_DATA_TAG = f"{{{SHEET_NS}}}sheetData"
+COL_TAG = f"{{{SHEET_NS}}}col"
+WORKBOOK_TAG = f"{{{SHEET_NS}}}workbook"
+
+WORKSHEET_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet"
+
+# Referência a shared string dentro do XML bruto da aba: <c ... t="s" ...><v>12</v>
+SHARED_REF = re.compile(rb'(\bt="s"[^>]*>\s*<(?:\w+:)?v>)(\d+)(?=<)')
+
+
+class XlsxReaderError(Exception):
+    """Arquivo fora do formato suportado pelo leitor direto (usar openpyxl)"""
+
+
+def open_workbook(path, data_only=False):
+    """
+    Abre a planilha com o leitor direto e, para arquivos incomuns, cai para o
+    openpyxl em read-only. Os dois objetos expõem worksheets, active, [título],
+    close() e, por aba, title, max_row, max_column e iter_rows(values_only=True).
+    """
+    try:
+        return XlsxReader(path, data_only=data_only)
+    except XlsxReaderError:
+        from openpyxl import load_workbook
+        return load_workbook(path, read_only=True, data_only=data_only)
+
+
+class XlsxReader:
+    """
+    Leitor mínimo de .xlsx: lê o XML das abas e a tabela de shared strings direto
+    do zip, em streaming (iterparse), e gera tuplas de valores simples, sem criar
+    objetos de célula. Os valores seguem as mesmas regras do openpyxl em read-only
+    (números, datas por formato de célula, booleanos, fórmulas).
+    """
+
+    def __init__(self, path, data_only=False):
+        self.path = path
+        self.data_only = data_only
+        try:
+            self._archive = zipfile.ZipFile(path)
+        except (zipfile.BadZipFile, OSError) as e:
+            raise XlsxReaderError(str(e))
+
+        try:
+            names = set(self._archive.namelist())
+            if "xl/workbook.xml" not in names:
+                raise XlsxReaderError("xl/workbook.xml não encontrado")
+            self._names = names
+            self._read_workbook()
+            self._read_styles()
+            self._shared_strings = self._read_shared_strings()
+        except XlsxReaderError:
+            self._archive.close()
+            raise
+        except Exception as e:
+            self._archive.close()
+            raise XlsxReaderError(str(e))
+
+    def _read_workbook(self):
+        targets = {}
+        rels_path = "xl/_rels/workbook.xml.rels"
+        if rels_path in self._names:
+            with self._archive.open(rels_path) as src:
+                for _, element in iterparse(src):
+                    if element.tag == f"{{{PKG_REL_NS}}}Relationship":
+                        targets[element.get("Id")] = (element.get("Type"), element.get("Target"))
+
+        self.epoch = WINDOWS_EPOCH
+        self.worksheets = []
+        entries = []
+        active_tab = 0
+        with self._archive.open("xl/workbook.xml") as src:
+            root = None
+            for event, element in iterparse(src, events=("start", "end")):
+                if root is None:
+                    root = element
+                    # Só a raiz decide o formato: Strict OOXML usa outro namespace no arquivo inteiro
+                    if root.tag != WORKBOOK_TAG:
+                        raise XlsxReaderError(f"Namespace não suportado: {root.tag}")
+                if event == "start":
+                    continue
+                tag = element.tag
+                # Extensões do Excel em outros namespaces (mc:AlternateContent, xr:revisionPtr...) são ignoradas
+                if tag == f"{{{SHEET_NS}}}workbookPr":
+                    if element.get("date1904") in ("1", "true"):
+                        self.epoch = MAC_EPOCH
+                elif tag == f"{{{SHEET_NS}}}workbookView":
+                    active_tab = int(element.get("activeTab", 0) or 0)
+                elif tag == f"{{{SHEET_NS}}}sheet":
+                    entries.append((element.get("name"), element.get(f"{{{REL_NS}}}id")))
+
+        sheets = []
+        for title, rel_id in entries:
+            rel_type, target = targets.get(rel_id, (None, None))
+            if rel_type != WORKSHEET_REL:
+                sheets.append(None)
+                continue
+            if target.startswith("/"):
+                part = target.lstrip("/")
+            else:
+                part = posixpath.normpath(posixpath.join("xl", target))
+            if part not in self._names:
+                raise XlsxReaderError(f"Aba não encontrada: {part}")
+            sheet = XlsxSheet(self, title, part)
+            sheets.append(sheet)
+            self.worksheets.append(sheet)
+
+        if active_tab >= len(sheets) or sheets[active_tab] is None:
+            self._active = self.worksheets[0] if self.worksheets else None
+        else:
+            self._active = sheets[active_tab]
+
+    def _read_styles(self):
+        self._date_styles = set()
+        self._timedelta_styles = set()
+        if "xl/styles.xml" not in self._names:
+            return
+
+        custom = {}
+        style_formats = []
+        in_cell_xfs = False
+        with self._archive.open("xl/styles.xml") as src:
+            for event, element in iterparse(src, events=("start", "end")):
+                tag = element.tag
+                if tag == f"{{{SHEET_NS}}}cellXfs":
+                    in_cell_xfs = event == "start"
+                elif event == "end" and tag == f"{{{SHEET_NS}}}numFmt":
+                    custom[int(element.get("numFmtId"))] = element.get("formatCode")
+                elif event == "end" and in_cell_xfs and tag == f"{{{SHEET_NS}}}xf":
+                    style_formats.append(int(element.get("numFmtId", 0)))
+
+        for style_id, fmt_id in enumerate(style_formats):
+            fmt = custom.get(fmt_id) or BUILTIN_FORMATS.get(fmt_id)
+            if fmt and is_date_format(fmt):
+                self._date_styles.add(style_id)
+            if fmt and is_timedelta_format(fmt):
+                self._timedelta_styles.add(style_id)
+
+    def _read_shared_strings(self):
+        part = "xl/sharedStrings.xml"
+        if part not in self._names:
+            return []
+
+        strings = []
+        with self._archive.open(part) as src:
+            for _, element in iterparse(src):
+                if element.tag == SI_TAG:
+                    strings.append(_text_content(element).replace('x005F_', ''))
+                    element.clear()
+        return strings
+
+    @property
+    def active(self):
+        return self._active
+
+    @property
+    def sheetnames(self):
+        return [sheet.title for sheet in self.worksheets]
+
+    def __getitem__(self, title):
+        for sheet in self.worksheets:
+            if sheet.title == title:
+                return sheet
+        raise KeyError(f"Worksheet {title} does not exist.")
+
+    def close(self):
+        self._archive.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class XlsxSheet:
+    def __init__(self, reader, title, part):
+        self._reader = reader
+        self.title = title
+        self._part = part
+        self.max_row = None
+        self.max_column = None
+        self._read_dimension()
+
+    def _read_dimension(self):
+        with self._reader._archive.open(self._part) as src:
+            for _, element in iterparse(src):
+                if element.tag == DIMENSION_TAG:
+                    ref = element.get("ref")
+                    if ref:
+                        _, _, self.max_column, self.max_row = range_boundaries(ref)
+                    return
+                if element.tag in (SHEET_DATA_TAG, ROW_TAG):
+                    return
+
+    def column_widths(self):
+        """Larguras definidas em <cols> ({coluna 0-based: largura}), lidas sem percorrer as linhas"""
+        widths = {}
+        with self._reader._archive.open(self._part) as src:
+            for _, element in iterparse(src):
+                if element.tag == COL_TAG:
+                    width = element.get("width")
+                    if width:
+                        for col in range(int(element.get("min")) - 1, int(element.get("max"))):
+                            widths[col] = float(width)
+                elif element.tag in (SHEET_DATA_TAG, ROW_TAG):
+                    break
+        return widths
+
+    def fingerprint(self):
+        """
+        Hash do conteúdo da aba: dimensão e XML da aba com as shared strings já
+        resolvidas, para que regravar a tabela de strings (índices diferentes,
+        mesmos textos) não invalide abas que não mudaram.
+        """
+        digest = hashlib.sha1(f"{self.max_row}:{self.max_column}|".encode())
+        strings = self._reader._shared_strings
+
+        def resolve(match):
+            text = strings[int(match.group(2))].encode("utf-8")
+            return match.group(1) + b"\x00" + text + b"\x00"
+
+        pending = b""
+        with self._reader._archive.open(self._part) as src:
+            while True:
+                block = src.read(1 << 20)
+                if not block:
+                    break
+                data = pending + block
+                # Só processa linhas completas; o resto segue para o próximo bloco
+                cut = data.rfind(b"row>") + 4 if b"row>" in data else 0
+                digest.update(SHARED_REF.sub(resolve, data[:cut]))
+                pending = data[cut:]
+        digest.update(SHARED_REF.sub(resolve, pending))
+        return digest.hexdigest()
+
+    def iter_rows(self, min_row=1, max_row=None, values_only=True, columns=None):
+        """
+        Gera tuplas de valores como o openpyxl em read-only (linhas ausentes viram
+        linhas vazias e a largura segue a dimensão da aba). Com columns (índices
+        0-based) só essas colunas são convertidas e cada tupla traz apenas as que
+        cabem na largura da linha, em ordem crescente.
+        """
+        if not values_only:
+            raise ValueError("XlsxSheet só fornece valores (values_only=True)")
+
+        max_row = max_row or self.max_row
+        width = self.max_column
+        wanted = sorted(set(columns)) if columns is not None else None
+        positions = {col: i for i, col in enumerate(wanted)} if wanted is not None else None
+
+        def empty_row():
+            if wanted is not None:
+                return tuple(None for col in wanted if width is None or col < width)
+            return (None,) * width if width else ()
+
+        counter = min_row
+        row_number = 1
+        for row_number, values, last_column in self._parse(positions):
+            if max_row is not None and row_number > max_row:
+                break
+
+            while counter < row_number:
+                counter += 1
+                yield empty_row()
+
+            if counter > row_number:
+                continue
+
+            row_width = width or last_column
+            if wanted is not None:
+                projected = []
+                for col in wanted:
+                    if col >= row_width:
+                        break
+                    projected.append(values.get(col))
+                yield tuple(projected)
+            else:
+                row = [None] * row_width
+                for col, value in values.items():
+                    if col < row_width:
+                        row[col] = value
+                yield tuple(row)
+            counter += 1
+
+        if max_row is not None and max_row < row_number:
+            while counter <= max_row:
+                counter += 1
+                yield empty_row()
+
+    def _parse(self, positions):
+        """Gera (número da linha, {coluna 0-based: valor}, largura da linha)"""
+        reader = self._reader
+        shared_strings = reader._shared_strings
+        date_styles = reader._date_styles
+        timedelta_styles = reader._timedelta_styles
+        epoch = reader.epoch
+        data_only = reader.data_only
+        shared_formulae = {}
+        column_cache = {}
+
+        sheet_data = None
+        row_number = 0
+        with reader._archive.open(self._part) as src:
+            for event, element in iterparse(src, events=("start", "end")):
+                if event == "start":
+                    if element.tag == SHEET_DATA_TAG:
+                        sheet_data = element
+                    continue
+                if element.tag != ROW_TAG:
+                    continue
+
+                r = element.get("r")
+                row_number = int(r) if r else row_number + 1
+                values = {}
+                col = -1
+                for cell in element:
+                    if cell.tag != CELL_TAG:
+                        continue
+                    coordinate = cell.get("r")
+                    if coordinate:
+                        letters = coordinate.rstrip("0123456789")
+                        col = column_cache.get(letters)
+                        if col is None:
+                            col = column_cache[letters] = _column_index(letters)
+                    else:
+                        col += 1
+
+                    if positions is not None and col not in positions:
+                        continue
+                    values[col] = _cell_value(
+                        cell, coordinate, shared_strings, date_styles, timedelta_styles,
+                        epoch, data_only, shared_formulae
+                    )
+
+                # Descarta as linhas já lidas para a árvore não crescer com a aba
+                if sheet_data is not None:
+                    sheet_data.clear()
+                else:
+                    element.clear()
+                yield row_number, values, col + 1
+
+
+def _column_index(letters):
+    index = 0
+    for char in letters.upper():
+        index = index * 26 + (ord(char) - 64)
+    return index - 1
+
+
+def _text_content(element):
+    # Texto de <si>/<is>: <t> direto e <r><t>, ignorando a fonética (<rPh>)
+    parts = []
+    for child in element:
+        if child.tag == TEXT_TAG:
+            parts.append(child.text or "")
+        elif child.tag == RUN_TAG:
+            for sub in child:
+                if sub.tag == TEXT_TAG:
+                    parts.append(sub.text or "")
+    return "".join(parts)
+
+
+def _cell_value(cell, coordinate, shared_strings, date_styles, timedelta_styles,
+                epoch, data_only, shared_formulae):
+    data_type = cell.get("t", "n")
+    value = None
+    formula = None
+    inline = None
+    for child in cell:
+        tag = child.tag
+        if tag == VALUE_TAG:
+            value = child.text or None
+        elif tag == FORMULA_TAG:
+            formula = child
+        elif tag == INLINE_TAG:
+            inline = child
+
+    if data_type == "inlineStr":
+        value = None
+
+    if not data_only and formula is not None:
+        return _formula_value(formula, coordinate, shared_formulae)
+
+    if value is not None:
+        if data_type == "n":
+            value = float(value) if ("." in value or "E" in value or "e" in value) else int(value)
+            style_id = cell.get("s")
+            if style_id and int(style_id) in date_styles:
+                try:
+                    value = from_excel(value, epoch, timedelta=int(style_id) in timedelta_styles)
+                except (OverflowError, ValueError):
+                    value = "#VALUE!"
+        elif data_type == "s":
+            value = shared_strings[int(value)]
+        elif data_type == "b":
+            value = bool(int(value))
+        elif data_type == "d":
+            value = from_ISO8601(value)
+    elif data_type == "inlineStr" and inline is not None:
+        value = _text_content(inline)
+    return value
+
+
+def _formula_value(formula, coordinate, shared_formulae):
+    value = "="
+    if formula.text is not None:
+        value += formula.text
+
+    if formula.get("t") == "shared":
+        idx = formula.get("si")
+        if idx in shared_formulae:
+            value = shared_formulae[idx].translate_formula(coordinate)
+        elif value != "=":
+            shared_formulae[idx] = Translator(value, coordinate)
+    return value
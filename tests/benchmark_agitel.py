@@ -0,0 +1,156 @@
+"""
+Benchmark do processamento da Agitel: gera planilhas sintéticas (ver
+gerar_planilha_agitel.py), processa cada uma com o MotorAgitel e mede tempo
+total, linhas por segundo, pico de memória (RSS) e o tempo de cada etapa.
+As etapas vêm do StageTimer do motor (utils/stageTimer.py). Cada execução
+roda em um processo novo, para o pico de memória ser só dela.
+
+    python tests/benchmark_agitel.py --tamanhos 5x2000 20x10000 --workers 1 4
+    python tests/benchmark_agitel.py --formatos xlsx csv --comparar resultado_anterior.json
+
+O resultado vai para um JSON (--saida) que pode ser comparado com outra execução.
+"""
+import os
+import sys
+import json
+import shutil
+import platform
+import argparse
+import subprocess
+import tempfile
+from datetime import datetime
+from time import perf_counter
+from concurrent.futures import ProcessPoolExecutor
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(RAIZ, "src"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from gerar_planilha_agitel import gerar_planilha  # noqa: E402
+
+
+def _executar(caminho, opcoes, pasta):
+    """Processo filho: processamento completo, como pela interface; devolve tempo, pico e etapas"""
+    from services.ProcessamentoAgitel import MotorAgitel
+    os.chdir(pasta)
+    motor = MotorAgitel(caminho, output_dir=pasta, **opcoes)
+    inicio = perf_counter()
+    motor.process()
+    tempo = perf_counter() - inicio
+    resumo = motor.timer.summary()
+    return tempo, resumo['peak_rss_mb'], resumo['stages_s'], resumo['counters'].get('linhas')
+
+
+def _em_processo_novo(funcao, *args):
+    with ProcessPoolExecutor(max_workers=1) as pool:
+        return pool.submit(funcao, *args).result()
+
+
+def _tamanho(texto):
+    abas, linhas = texto.lower().split("x")
+    return int(abas), int(linhas)
+
+
+def _versao_git():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ,
+                               capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def _chave(caso):
+    return (caso["abas"], caso["linhas_por_aba"], caso["workers"], caso["formato"], caso["limite_memoria_mb"])
+
+
+def _comparar(resultados, caminho_anterior):
+    with open(caminho_anterior, "r", encoding="utf-8") as f:
+        anteriores = {_chave(caso): caso for caso in json.load(f)["resultados"]}
+    print(f"\nComparação com {caminho_anterior}:")
+    for caso in resultados:
+        anterior = anteriores.get(_chave(caso))
+        if not anterior:
+            continue
+        razao = anterior["tempo_s"] / caso["tempo_s"] if caso["tempo_s"] else 0
+        print(f"  {caso['abas']}x{caso['linhas_por_aba']} workers={caso['workers']} {caso['formato']}: "
+              f"{anterior['tempo_s']:.2f}s -> {caso['tempo_s']:.2f}s ({razao:.2f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do processamento da Agitel.")
+    parser.add_argument("--tamanhos", nargs="+", default=["5x2000", "10x10000"], metavar="ABASxLINHAS")
+    parser.add_argument("--workers", nargs="+", type=int, default=[1])
+    parser.add_argument("--formatos", nargs="+", default=["xlsx"], choices=["xlsx", "csv", "parquet"])
+    parser.add_argument("--limite-memoria", type=int, metavar="MB")
+    parser.add_argument("--equalizar", action="store_true")
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--linha-cabecalho", type=int, default=3)
+    parser.add_argument("--sem-resumo", action="store_true")
+    parser.add_argument("--sujeira", type=float, default=0.02)
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--saida", default=f"benchmark_agitel_{datetime.now():%Y%m%d_%H%M%S}.json")
+    parser.add_argument("--comparar", metavar="JSON", help="resultado anterior para comparação")
+    args = parser.parse_args()
+
+    pasta = tempfile.mkdtemp(prefix="le_helper_bench_")
+    resultados = []
+    try:
+        for texto in args.tamanhos:
+            abas, linhas = _tamanho(texto)
+            caminho = os.path.join(pasta, f"agitel_{abas}x{linhas}.xlsx")
+            inicio = perf_counter()
+            total = gerar_planilha(caminho, abas, linhas, args.linha_cabecalho,
+                                   not args.sem_resumo, args.sujeira, args.semente)
+            print(f"{os.path.basename(caminho)}: {total} linhas geradas em {perf_counter() - inicio:.1f}s")
+
+            for workers in args.workers:
+                for formato in args.formatos:
+                    opcoes = {
+                        "equalize": args.equalizar, "workers": workers,
+                        "output_format": formato, "memory_limit_mb": args.limite_memoria
+                    }
+                    execucoes = sorted((_em_processo_novo(_executar, caminho, opcoes, pasta)
+                                        for _ in range(args.repeticoes)), key=lambda execucao: execucao[0])
+                    tempos = [execucao[0] for execucao in execucoes]
+                    # Etapas da execução mediana
+                    tempo, _, etapas, linhas_saida = execucoes[len(execucoes) // 2]
+                    caso = {
+                        "abas": abas,
+                        "linhas_por_aba": linhas,
+                        "linhas_entrada": total,
+                        "linhas_saida": linhas_saida,
+                        "workers": workers,
+                        "formato": formato,
+                        "limite_memoria_mb": args.limite_memoria,
+                        "tempo_s": round(tempo, 4),
+                        "tempo_min_s": round(min(tempos), 4),
+                        "linhas_por_s": round(total / tempo) if tempo else None,
+                        "pico_rss_mb": max((execucao[1] for execucao in execucoes if execucao[1] is not None),
+                                           default=None),
+                        "etapas_s": etapas
+                    }
+                    resultados.append(caso)
+                    print(f"  workers={workers} {formato}: {tempo:.2f}s, {caso['linhas_por_s']} linhas/s, "
+                          f"pico {caso['pico_rss_mb']} MB, etapas {etapas}")
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+
+    with open(args.saida, "w", encoding="utf-8") as f:
+        json.dump({
+            "data": datetime.now().isoformat(timespec="seconds"),
+            "commit": _versao_git(),
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "cpus": os.cpu_count(),
+            "semente": args.semente,
+            "repeticoes": args.repeticoes,
+            "resultados": resultados
+        }, f, ensure_ascii=False, indent=2)
+    print(f"Resultados salvos em: {args.saida}")
+
+    if args.comparar:
+        _comparar(resultados, args.comparar)
+
+
+if __name__ == "__main__":
+    main()
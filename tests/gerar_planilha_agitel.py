@@ -0,0 +1,83 @@
+"""
+Gera planilhas sintéticas no formato dos exports da Agitel, para benchmarks e
+testes manuais. A mesma semente gera sempre o mesmo arquivo.
+
+    python tests/gerar_planilha_agitel.py saida.xlsx --abas 10 --linhas 20000
+"""
+import random
+import argparse
+from datetime import datetime, time, timedelta
+from openpyxl import Workbook
+
+REGIOES = ["Fixo Local", "Fixo LDN", "Movel DDD", "Móvel Local", "MÓVEL VC1", "LDN", "Intragrupo", "", "  ", None]
+SERVICOS = ["Ligação", "Ligação Local", "Longa Distância", "Celular"]
+CABECALHO = ["Data", "Origem", "Serviço", "Região", "Destino", "Duração", "Preço"]
+
+
+def gerar_planilha(caminho, abas=5, linhas=1000, linha_cabecalho=3, resumo=True, sujeira=0.02, semente=42):
+    """
+    Grava a planilha e devolve o total de linhas de dados geradas.
+
+    linha_cabecalho: linha (1-based) do cabeçalho em cada aba; as anteriores têm título.
+    resumo: cria uma primeira aba "Resumo", ignorada pelo processamento.
+    sujeira: fração de linhas com duração/preço inválidos, linhas curtas ou em branco.
+    """
+    rnd = random.Random(semente)
+    inicio = datetime(2024, 1, 1)
+    wb = Workbook(write_only=True)
+    total = 0
+
+    if resumo:
+        ws = wb.create_sheet("Resumo")
+        ws.append(["Resumo geral das chamadas"])
+        ws.append(["Abas", abas])
+
+    for aba in range(abas):
+        ws = wb.create_sheet(f"Ramal {aba + 1}")
+        for numero in range(1, linha_cabecalho):
+            ws.append([f"Relatório Agitel - Ramal {aba + 1}"] if numero == 1 else [])
+        ws.append(CABECALHO)
+
+        origem = f"Ramal {aba + 1}"
+        for _ in range(linhas):
+            data = inicio + timedelta(seconds=rnd.randrange(180 * 86400))
+            duracao = time(rnd.randrange(2), rnd.randrange(60), rnd.randrange(60))
+            if rnd.random() < 0.3:
+                duracao = duracao.strftime("%H:%M:%S")
+            preco = f"R$ {rnd.randrange(30)},{rnd.randrange(100):02d}" if rnd.random() < 0.7 else round(rnd.random() * 20, 2)
+            linha = [data, origem, rnd.choice(SERVICOS), rnd.choice(REGIOES),
+                     f"11{rnd.randrange(10**8, 10**9)}", duracao, preco]
+
+            if rnd.random() < sujeira:
+                tipo = rnd.randrange(4)
+                if tipo == 0:
+                    linha[5] = "x"
+                elif tipo == 1:
+                    linha[6] = "abc"
+                elif tipo == 2:
+                    linha = linha[:3]
+                else:
+                    linha = [None] * len(CABECALHO)
+            ws.append(linha)
+            total += 1
+
+        ws.append([])
+        ws.append(["Total", None, None, None, None, None, "—"])
+
+    wb.save(caminho)
+    return total
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gera uma planilha sintética da Agitel.")
+    parser.add_argument("caminho")
+    parser.add_argument("--abas", type=int, default=5)
+    parser.add_argument("--linhas", type=int, default=1000, help="linhas de dados por aba")
+    parser.add_argument("--linha-cabecalho", type=int, default=3)
+    parser.add_argument("--sem-resumo", action="store_true")
+    parser.add_argument("--sujeira", type=float, default=0.02)
+    parser.add_argument("--semente", type=int, default=42)
+    args = parser.parse_args()
+    total = gerar_planilha(args.caminho, args.abas, args.linhas, args.linha_cabecalho,
+                           not args.sem_resumo, args.sujeira, args.semente)
+    print(f"{args.caminho}: {args.abas} abas, {total} linhas")
@@ -0,0 +1,40 @@
+import os
+
+from utils.dedupIndex import DedupIndex
+
+
+def test_primeira_ocorrencia_fica_e_so_a_chave_conta():
+    linhas = [("a", 1, "primeira"), ("b", 1, "x"), ("a", 1, "segunda"), ("a", 2, "y"), ("b", 1, "z")]
+    with DedupIndex() as indice:
+        unicas = list(indice.unique(linhas, key=lambda linha: linha[:2]))
+        assert unicas == [("a", 1, "primeira"), ("b", 1, "x"), ("a", 2, "y")]
+        assert indice.dropped == 2
+        assert len(indice) == 3
+
+
+def test_chaves_iguais_tem_o_mesmo_hash_e_diferentes_nao_colidem():
+    with DedupIndex() as indice:
+        assert indice.add(("2024-01-05", "100", None))
+        assert not indice.add(("2024-01-05", "100", None))
+        # Tipos diferentes são chaves diferentes (repr), como na comparação de tuplas de texto
+        assert indice.add(("2024-01-05", 100, None))
+        assert indice.add(("2024-01-05", "100", ""))
+        assert all(indice.add(("chave", i)) for i in range(10_000))
+        assert len(indice) == 10_003
+
+
+def test_acima_do_limite_o_indice_vai_para_o_disco(monkeypatch):
+    monkeypatch.setattr(DedupIndex, 'PENDING_SIZE', 16)
+    linhas = [(i % 700, "linha") for i in range(2000)]
+    indice = DedupIndex(max_keys_in_memory=100)
+    try:
+        unicas = list(indice.unique(linhas, key=lambda linha: linha[0]))
+        assert indice._db is not None and os.path.exists(indice._db_path)
+        assert len(indice._keys) == 0
+        # Mesmo resultado do índice em memória, inclusive para chaves vistas antes da troca
+        assert unicas == [(i, "linha") for i in range(700)]
+        assert indice.dropped == 1300
+        caminho = indice._db_path
+    finally:
+        indice.close()
+    assert not os.path.exists(caminho)
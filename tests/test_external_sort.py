@@ -0,0 +1,54 @@
+import os
+import random
+
+from utils.externalSort import SortedRuns
+
+
+def _blocos(semente=7, blocos=100, linhas=50):
+    rnd = random.Random(semente)
+    # Chaves com muitas repetições; o segundo campo identifica a ordem de chegada
+    return [[(rnd.randrange(20), bloco * linhas + i) for i in range(linhas)] for bloco in range(blocos)]
+
+
+def _chave(linha):
+    return linha[0]
+
+
+def _esperado(blocos):
+    return sorted((linha for bloco in blocos for linha in bloco), key=_chave)
+
+
+def test_merge_em_memoria_igual_ao_sorted_estavel():
+    blocos = _blocos()
+    with SortedRuns(key=_chave) as runs:
+        for bloco in blocos:
+            runs.add_run(bloco)
+        # Sem limite atingido nada vai para o disco, mesmo com mais runs que max_runs
+        assert all(isinstance(run, list) for run in runs._runs) and len(runs._runs) > runs.max_runs
+        assert list(runs.merged()) == _esperado(blocos)
+        assert len(runs) == 5000
+
+
+def test_merge_com_runs_em_disco_e_compactacao_igual_ao_sorted_estavel():
+    blocos = _blocos()
+    with SortedRuns(key=_chave, max_rows_in_memory=120, max_runs=8) as runs:
+        for bloco in blocos:
+            runs.add_run(bloco)
+        arquivos = [run for run in runs._runs if not isinstance(run, list)]
+        # Compactado: nunca mais que max_runs arquivos no merge final
+        assert 0 < len(arquivos) <= runs.max_runs
+        assert list(runs.merged()) == _esperado(blocos)
+    assert not any(os.path.exists(arquivo) for arquivo in arquivos)
+
+
+def test_runs_exportados_por_outro_processo():
+    blocos = _blocos(blocos=10)
+    exportados = []
+    for bloco in blocos:
+        with SortedRuns(key=_chave) as runs:
+            runs.add_run(bloco)
+            exportados.append(runs.export())
+    with SortedRuns(key=_chave, max_runs=3) as runs:
+        for caminho in exportados:
+            runs.add_spilled(caminho)
+        assert list(runs.merged()) == _esperado(blocos)
@@ -0,0 +1,42 @@
+from services import agitel_historico
+from services.HistoricoAgitel import HistoricoAgitel
+
+
+def test_consulta_em_historico_vazio(tmp_path, capsys):
+    caminho = str(tmp_path / "historico.db")
+    HistoricoAgitel(caminho).close()
+
+    assert agitel_historico.main(["--db", caminho, "--por", "origem", "--regiao", "Móvel", "--ultimos", "6"]) == 0
+    assert capsys.readouterr().out.split() == ["origem", "Chamadas", "Minutos", "Valor"]
+
+
+def test_totais_por_mes_usam_o_indice_de_mes(tmp_path):
+    # Data (serial), Origem, Serviço, Região, Destino, Duração, Minutos, Valor
+    linhas = [(45292.5, "1130000000", "Local", "Fixo", "1140000000", 0.01, 1.5, 0.2)] * 3
+    with HistoricoAgitel(str(tmp_path / "historico.db")) as historico:
+        assert list(historico.track(iter(linhas), "janeiro.xlsx")) == linhas
+        consultas = []
+        historico._db.set_trace_callback(consultas.append)
+        assert historico.totais(["mes"], desde="2024-01") == [("2024-01", 3, 4.5, 0.6)]
+        historico._db.set_trace_callback(None)
+
+        plano = historico._db.execute(f"EXPLAIN QUERY PLAN {consultas[-1]}").fetchall()
+        assert any("COVERING INDEX idx_chamadas_mes" in linha[3] for linha in plano)
+
+
+def test_banco_padrao_nao_depende_da_pasta_atual(tmp_path, monkeypatch):
+    import os
+    import sys
+    from utils.appPaths import app_dir
+
+    raiz = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    assert HistoricoAgitel.ARQUIVO_PADRAO == os.path.join(raiz, "agitel_historico.db")
+
+    # A CLI é aberta a partir de src, a interface a partir da raiz: o padrão é o mesmo
+    monkeypatch.chdir(os.path.join(raiz, "src"))
+    assert agitel_historico._parse_args([]).db == HistoricoAgitel.ARQUIVO_PADRAO
+
+    # No executável do PyInstaller os dados ficam ao lado dele, não na pasta temporária
+    monkeypatch.setattr(sys, "frozen", True, raising=False)
+    monkeypatch.setattr(sys, "executable", str(tmp_path / "LE_Helper.exe"))
+    assert app_dir() == str(tmp_path)
@@ -0,0 +1,155 @@
+from openpyxl import Workbook, load_workbook
+
+from services.MesclaPlanilhas import PlanilhaMesclagemWorker, LeituraAntecipada
+
+
+def _planilha(caminho, linhas):
+    wb = Workbook()
+    ws = wb.active
+    ws.append(["Cliente", "Data", "Valor", "Cidade", "Status"])
+    for linha in linhas:
+        ws.append(linha)
+    wb.save(caminho)
+
+
+def test_ler_linhas_no_openpyxl_corta_colunas_nao_selecionadas(tmp_path):
+    # Leitura pelo openpyxl (caminho usado quando o leitor direto não aceita o arquivo)
+    caminho = tmp_path / "entrada.xlsx"
+    _planilha(caminho, [["A", 1, 2.5, "X", "ok"], ["B", 2]])
+    wb = load_workbook(caminho, read_only=True)
+    try:
+        linhas = list(PlanilhaMesclagemWorker._ler_linhas(wb.active, [0, 1]))
+    finally:
+        wb.close()
+    assert linhas == [["A", 1], ["B", 2]]
+
+
+def test_mesclagem_grava_so_as_colunas_selecionadas(tmp_path, monkeypatch):
+    # Nada da mesclagem deve parar na pasta atual (traces são opcionais e caches ficam junto da saída)
+    monkeypatch.chdir(tmp_path)
+    arquivos = []
+    for mes in range(2):
+        caminho = tmp_path / f"mes_{mes}.xlsx"
+        _planilha(caminho, [[f"C{mes}", mes, 1.5, "X", "ok"]])
+        arquivos.append(str(caminho))
+
+    worker = PlanilhaMesclagemWorker(arquivos, str(tmp_path), "saida", {0, 1})
+    worker.executar_mesclagem()
+
+    wb = load_workbook(tmp_path / "saida.xlsx")
+    assert [list(linha) for linha in wb.active.iter_rows(min_row=2, values_only=True)] == [["C0", 0], ["C1", 1]]
+
+
+def _mesclar_incremental(pasta, nomes):
+    arquivos = [str(pasta / nome) for nome in nomes]
+    worker = PlanilhaMesclagemWorker(arquivos, str(pasta), "saida", {0, 2}, arquivo_base=arquivos[0], incremental=True)
+    avisos = []
+    worker.aviso.connect(avisos.append)
+    worker.executar_mesclagem()
+    wb = load_workbook(pasta / "saida.xlsx", read_only=True)
+    try:
+        linhas = [tuple(linha) for linha in wb.active.iter_rows(min_row=2, values_only=True)]
+    finally:
+        wb.close()
+    return linhas, avisos
+
+
+def test_incremental_reconhece_arquivo_renomeado_e_remove_os_que_sairam(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    _planilha(tmp_path / "jan.xlsx", [["a", None, 1], ["b", None, 2]])
+    _planilha(tmp_path / "fev.xlsx", [["c", None, 3]])
+    _planilha(tmp_path / "mar.xlsx", [["d", None, 4]])
+    linhas, _ = _mesclar_incremental(tmp_path, ["jan.xlsx", "fev.xlsx", "mar.xlsx"])
+    assert linhas == [("a", 1), ("b", 2), ("c", 3), ("d", 4)]
+
+    # Renomeado: as linhas continuam no mesmo lugar, sem duplicar
+    (tmp_path / "jan.xlsx").rename(tmp_path / "janeiro.xlsx")
+    linhas, _ = _mesclar_incremental(tmp_path, ["fev.xlsx", "janeiro.xlsx", "mar.xlsx"])
+    assert linhas == [("a", 1), ("b", 2), ("c", 3), ("d", 4)]
+
+    # Removido e alterado: as linhas de fev saem e as de mar são substituídas
+    (tmp_path / "fev.xlsx").unlink()
+    _planilha(tmp_path / "mar.xlsx", [["d", None, 40], ["e", None, 5]])
+    linhas, avisos = _mesclar_incremental(tmp_path, ["janeiro.xlsx", "mar.xlsx"])
+    assert linhas == [("a", 1), ("b", 2), ("d", 40), ("e", 5)]
+    assert any("fora da pasta" in aviso for aviso in avisos)
+
+
+def test_leitura_antecipada_em_lotes_mantem_a_ordem_e_segue_apos_erro(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    # Lotes pequenos e fila de um lote: os processos filhos esperam o gravador
+    monkeypatch.setattr(LeituraAntecipada, 'LOTE_LINHAS', 3)
+    monkeypatch.setattr(LeituraAntecipada, 'MAX_LOTES', 1)
+    arquivos, esperadas = [], []
+    for mes in range(4):
+        caminho = tmp_path / f"mes_{mes}.xlsx"
+        linhas = [[f"C{mes}-{i}", i] for i in range(10)]
+        _planilha(caminho, linhas)
+        arquivos.append(str(caminho))
+        esperadas += linhas
+        if mes == 1:
+            # Arquivo ilegível no meio: vira erro no status e a mesclagem continua
+            (tmp_path / "quebrado.xlsx").write_bytes(b"isto nao e um xlsx")
+            arquivos.append(str(tmp_path / "quebrado.xlsx"))
+
+    worker = PlanilhaMesclagemWorker(arquivos, str(tmp_path), "saida", {0, 1}, workers=3)
+    status = {}
+    worker.atualizar_status.connect(lambda idx, texto: status.__setitem__(idx, texto))
+    worker.executar_mesclagem()
+
+    wb = load_workbook(tmp_path / "saida.xlsx")
+    assert [list(linha) for linha in wb.active.iter_rows(min_row=2, values_only=True)] == esperadas
+    assert status[2].startswith("Erro") and status[4] == "Concluído"
+
+
+def test_cache_de_cabecalhos_fica_na_pasta_da_saida(tmp_path, monkeypatch):
+    atual = tmp_path / "atual"
+    saida = tmp_path / "saida"
+    atual.mkdir()
+    saida.mkdir()
+    monkeypatch.chdir(atual)
+    caminho = tmp_path / "jan.xlsx"
+    _planilha(caminho, [["A", 1, 2.5]])
+
+    worker = PlanilhaMesclagemWorker([str(caminho)], str(saida), "mescla", {0, 2}, por_nome=True)
+    worker.executar_mesclagem()
+
+    assert list(atual.iterdir()) == []
+    cabecalhos = worker._carregar_cabecalhos()
+    assert list(cabecalhos.values()) == [{"cliente": 0, "data": 1, "valor": 2, "cidade": 3, "status": 4}]
+    assert sorted(p.name for p in saida.iterdir()) == ["mescla.xlsx", "mesclagem_cabecalhos.json"]
+
+
+def test_duplicadas_pela_chave_com_indice_em_disco(tmp_path, monkeypatch):
+    from utils.dedupIndex import DedupIndex
+
+    monkeypatch.chdir(tmp_path)
+    # Limite de 1 MB com chaves "enormes": o índice passa para o SQLite depois de poucas linhas
+    monkeypatch.setattr(PlanilhaMesclagemWorker, 'DEDUP_KEY_BYTES', 1024 * 1024 // 4 // 10)
+    monkeypatch.setattr(DedupIndex, 'PENDING_SIZE', 4)
+    abertos = []
+    abrir = DedupIndex._open_db
+    monkeypatch.setattr(DedupIndex, '_open_db', lambda self: (abertos.append(self), abrir(self)))
+
+    _planilha(tmp_path / "jan.xlsx", [[f"C{i}", None, 1.0, "X"] for i in range(40)])
+    # Fevereiro repete metade dos clientes com outro valor: fica a linha de janeiro
+    _planilha(tmp_path / "fev.xlsx", [[f"C{i}", None, 2.0, "Y"] for i in range(20, 60)])
+    arquivos = [str(tmp_path / "jan.xlsx"), str(tmp_path / "fev.xlsx")]
+
+    worker = PlanilhaMesclagemWorker(
+        arquivos, str(tmp_path), "saida", {0, 2, 3}, limite_memoria_mb=1, dedup=True, colunas_chave={0}
+    )
+    mensagens, status = [], {}
+    worker.concluido.connect(mensagens.append)
+    worker.atualizar_status.connect(lambda idx, texto: status.__setitem__(idx, texto))
+    worker.executar_mesclagem()
+
+    wb = load_workbook(tmp_path / "saida.xlsx", read_only=True)
+    try:
+        linhas = [tuple(linha) for linha in wb.active.iter_rows(min_row=2, values_only=True)]
+    finally:
+        wb.close()
+    assert abertos
+    assert linhas == [(f"C{i}", 1, "X") for i in range(40)] + [(f"C{i}", 2, "Y") for i in range(40, 60)]
+    assert worker.duplicadas == 20 and mensagens[0].endswith("(20 linhas duplicadas removidas)")
+    assert status == {0: "Concluído", 1: "Concluído (20 duplicadas)"}
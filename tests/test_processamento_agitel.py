@@ -0,0 +1,139 @@
+from datetime import datetime
+
+import pyarrow as pa
+
+from services.ProcessamentoAgitel import MotorAgitel
+
+
+def test_data_em_texto_entra_no_timestamp_do_parquet():
+    valores = (45296.75, "05/01/2024 08:30:00", "05/01/2024", "Total", "", None)
+    millis, nulos, nao_reconhecidos = MotorAgitel._serials_to_epoch_ms(valores)
+
+    assert pa.array(millis, type=pa.timestamp('ms'), mask=nulos).to_pylist() == [
+        datetime(2024, 1, 5, 18, 0), datetime(2024, 1, 5, 8, 30), datetime(2024, 1, 5), None, None, None
+    ]
+    assert nao_reconhecidos == 1
+
+
+class _AbaContada:
+    """Aba mínima que conta quantas linhas foram lidas"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.lidas = 0
+
+    def iter_rows(self, max_row=None, values_only=True):
+        for row in self.rows[:max_row]:
+            self.lidas += 1
+            yield row
+
+
+def test_layout_conhecido_dispensa_a_leitura_das_linhas_de_cabecalho(tmp_path):
+    cabecalho = ("Data", "Origem", "Serviço", "Região", "Destino", "Duração", "Preço")
+    rows = [("Relatório",), cabecalho] + [(45296.75, "100", "Local", "SP", "200", None, "R$ 1,00")] * 30
+
+    layouts = {}
+    schema = MotorAgitel._detect_schema(_AbaContada(rows), layouts)
+    assert schema.header_row == 2 and len(layouts) == 1
+
+    aba = _AbaContada(rows)
+    assert MotorAgitel._detect_schema(aba, layouts) == schema
+    assert aba.lidas == 2
+
+    motor = MotorAgitel(str(tmp_path / "agitel.xlsx"), False, output_dir=str(tmp_path / "saida"))
+    (tmp_path / "saida").mkdir()
+    motor._save_layouts(layouts)
+    assert motor._load_layouts() == layouts
+    assert (tmp_path / "saida" / MotorAgitel.LAYOUTS_FILE).exists()
+
+
+def test_linhas_ignoradas_de_varias_abas_viram_uma_mensagem(tmp_path, monkeypatch):
+    from openpyxl import Workbook
+
+    monkeypatch.chdir(tmp_path)
+    # Intervalo longo: só o flush final repassa as mensagens
+    monkeypatch.setattr(MotorAgitel, 'PROGRESS_INTERVAL', 60)
+    # Sem <dimension> (write-only), a linha curta chega curta e é ignorada
+    wb = Workbook(write_only=True)
+    for aba in range(30):
+        ws = wb.create_sheet(f"Ramal {aba}")
+        ws.append(["Data", "Origem", "Serviço", "Região", "Destino", "Duração", "Preço"])
+        ws.append([45296.75, f"Ramal {aba}", "Local", "Fixo", "200", "00:01:00", "R$ 1,00"])
+        ws.append([45296.75, f"Ramal {aba}", "Local"])
+    caminho = tmp_path / "agitel.xlsx"
+    wb.save(caminho)
+
+    logs, progresso = [], []
+    MotorAgitel(str(caminho), False, output_format='csv', on_log=logs.append, on_progress=progresso.append).process()
+
+    ignoradas = [linha for linha in logs if linha.startswith("Linha ignorada")]
+    assert len(ignoradas) == 1 and "(+29 semelhantes)" in ignoradas[0]
+    assert len(progresso) <= 2
+
+
+def test_conversao_em_bloco_igual_a_conversao_linha_a_linha():
+    import random
+    from datetime import time
+
+    from services.RegioesAgitel import RegioesAgitel
+
+    rnd = random.Random(3)
+    datas = [datetime(2024, 1, 5, 18, 0), datetime(2023, 12, 31, 23, 59, 59, 999000), datetime(1900, 1, 15, 6),
+             datetime(1900, 2, 28, 12), datetime(1900, 3, 1), 45296.75, 0, "05/01/2024 08:30:00", "", None]
+    duracoes = [time(0, m, s) for m in range(3) for s in range(60)] + [
+        time(1, 2, 3), time(23, 59, 59), "00:02:30", "1:2:3", "x", "1:2", "", None, 12.5, 0]
+    precos = ["R$ 1,50", "R$1,5", " 2,00 ", "abc", "R$ ", "", 2, 3.5, 0, None, True]
+    regioes = ["Fixo Local", "MÓVEL VC1", "  ", "", None, 11, "LDN"]
+    linhas = [
+        (rnd.choice(datas), rnd.choice([" 100 ", "Ramal 1", None, 7]), rnd.choice(["Local", None, ""]),
+         rnd.choice(regioes), rnd.choice(["  1140000000", None, 1140000000]), rnd.choice(duracoes), rnd.choice(precos))
+        for _ in range(2000)
+    ]
+    indices = {'data': 0, 'origem': 1, 'servico': 2, 'regiao': 3, 'destino': 4, 'duracao': 5, 'preco': 6}
+
+    for regras in (None, RegioesAgitel()):
+        def log(mensagem):
+            raise AssertionError(mensagem)
+        esperado = [MotorAgitel._process_row(linha, indices, log, regras) for linha in linhas]
+        assert [list(linha) for linha in MotorAgitel._convert_columns(linhas, indices, regras)] == esperado
+
+    # Linhas curtas seguem por _process_row, que as registra e descarta
+    mensagens = []
+    bloco = MotorAgitel._convert_chunk(linhas[:10] + [(45296.75, "100")], indices, mensagens.append)
+    assert [list(linha) for linha in bloco] == [MotorAgitel._process_row(l, indices, None) for l in linhas[:10]]
+    assert mensagens == ["Linha ignorada: tuple index out of range"]
+
+
+def test_chamadas_duplicadas_com_indice_em_disco(tmp_path, monkeypatch):
+    from openpyxl import Workbook
+    from utils.dedupIndex import DedupIndex
+
+    monkeypatch.chdir(tmp_path)
+    # Limite de 1 MB com chaves "enormes": o índice passa para o SQLite depois de poucas chamadas
+    monkeypatch.setattr(MotorAgitel, 'DEDUP_KEY_BYTES', 1024 * 1024 // 4 // 10)
+    monkeypatch.setattr(DedupIndex, 'PENDING_SIZE', 4)
+    abertos = []
+    abrir = DedupIndex._open_db
+    monkeypatch.setattr(DedupIndex, '_open_db', lambda self: (abertos.append(self), abrir(self)))
+
+    wb = Workbook()
+    wb.remove(wb.active)
+    for aba in ("Janeiro", "Export repetido"):
+        ws = wb.create_sheet(aba)
+        ws.append(["Data", "Origem", "Serviço", "Região", "Destino", "Duração", "Preço"])
+        for i in range(30):
+            # Mesma Data, Origem, Destino e Duração nas duas abas; o Preço não entra na chave e fica o da primeira
+            ws.append([45296 + i / 100, "Ramal 1", "Local", "Fixo", f"11{i:08d}", "00:01:00", f"R$ {1 if aba == 'Janeiro' else 2},00"])
+    caminho = tmp_path / "agitel.xlsx"
+    wb.save(caminho)
+
+    logs = []
+    motor = MotorAgitel(str(caminho), False, output_format='csv', dedup=True, memory_limit_mb=1, on_log=logs.append)
+    mensagem = motor.process()
+
+    assert abertos and motor.duplicates_dropped == 30
+    assert mensagem.endswith("(30 chamadas duplicadas removidas)")
+    assert "Chamadas duplicadas removidas: 30" in logs
+    with open(motor.output_path, encoding='utf-8-sig') as f:
+        linhas = f.read().splitlines()[1:]
+    assert len(linhas) == 30 and all(linha.endswith(",0.0,1.0") for linha in linhas)
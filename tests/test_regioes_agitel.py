@@ -0,0 +1,24 @@
+import os
+
+from services.RegioesAgitel import RegioesAgitel
+
+
+def test_arquivo_padrao_fica_na_pasta_do_app(tmp_path, monkeypatch):
+    raiz = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    monkeypatch.chdir(tmp_path)
+    assert RegioesAgitel.ARQUIVO_PADRAO == os.path.join(raiz, 'agitel_regioes.json')
+
+
+def test_carregar_nao_cria_o_arquivo(tmp_path):
+    caminho = str(tmp_path / 'regras.json')
+    assert RegioesAgitel.carregar(caminho).regras == RegioesAgitel.REGRAS_PADRAO
+    assert not os.path.exists(caminho)
+
+    RegioesAgitel.criar_arquivo_padrao(caminho)
+    assert RegioesAgitel.carregar(caminho).regras == RegioesAgitel.REGRAS_PADRAO
+
+    # Regras editadas pelo usuário não são sobrescritas
+    regras = [{'tipo': 'igual', 'padrao': 'VC1', 'valor': 'Local'}]
+    RegioesAgitel(regras).salvar(caminho)
+    RegioesAgitel.criar_arquivo_padrao(caminho)
+    assert RegioesAgitel.carregar(caminho).regras == regras
@@ -0,0 +1,35 @@
+from utils.reportChannel import ReportChannel
+
+
+def _canal(on_log=None):
+    canal = ReportChannel(on_log, interval=3600)
+    # Sem repasse por tempo: só por flush() ou buffer cheio
+    canal._last_flush = float('inf')
+    return canal
+
+
+def test_mensagens_alem_de_max_groups_nao_sao_descartadas():
+    recebidas = []
+    canal = _canal(recebidas.append)
+    for i in range(ReportChannel.MAX_GROUPS * 2 + 10):
+        canal.log(f"mensagem {i}")
+    canal.flush()
+    assert recebidas == [f"mensagem {i}" for i in range(ReportChannel.MAX_GROUPS * 2 + 10)]
+
+
+def test_contagem_de_mensagens_repassadas_aparece_uma_vez():
+    recebidas = []
+    pai = _canal(recebidas.append)
+    filho = _canal()
+    filho.on_entry = lambda mensagem, contagem, group: pai.log(
+        f"a.xlsx: {mensagem}", group=f"a.xlsx: {group}" if group else None, count=contagem
+    )
+    for lote in (3, 2):
+        for _ in range(lote):
+            filho.log("Erro de leitura")
+        filho.flush()
+    for letra in "abcd":
+        filho.log(f"Linha ignorada: {letra}", group="Linha ignorada")
+    filho.flush()
+    pai.flush()
+    assert recebidas == ["a.xlsx: Erro de leitura (x5)", "a.xlsx: Linha ignorada: a (+3 semelhantes)"]
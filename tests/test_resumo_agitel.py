@@ -0,0 +1,14 @@
+from services.ResumoAgitel import ResumoAgitel
+
+
+def test_datas_em_texto_com_hora_entram_no_mesmo_dia():
+    # Data, Origem, Serviço, Região, Destino, Duração, Minutos, Valor
+    linhas = [
+        (45296.75, "1130000000", "Local", "Fixo", "1140000000", 0.01, 1.0, 0.5),
+        ("05/01/2024", "1130000000", "Local", "Fixo", "1140000000", 0.01, 2.0, 0.5),
+        ("05/01/2024 08:30:00", "1130000000", "Local", "Móvel", "1140000000", 0.01, 3.0, 1.0),
+        ("sem data", "1130000000", "Local", "Móvel", "1140000000", 0.01, 4.0, 1.0),
+    ]
+    resumo = ResumoAgitel()
+    assert list(resumo.track(linhas)) == linhas
+    assert resumo.totals['Dia'] == {"2024-01-05": [3, 6.0, 2.0], None: [1, 4.0, 1.0]}
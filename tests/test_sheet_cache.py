@@ -0,0 +1,56 @@
+import os
+import time
+
+from utils.sheetCache import SheetCache
+
+
+def test_processos_com_o_mesmo_diretorio_nao_perdem_entradas(tmp_path):
+    planilha = tmp_path / "agitel.xlsx"
+    planilha.write_bytes(b"")
+    diretorio = str(tmp_path / "cache")
+
+    # Os dois carregam o índice (vazio) antes de qualquer um salvar, como no lote com --workers
+    primeiro, segundo = SheetCache(diretorio), SheetCache(diretorio)
+    primeiro.put(planilha, "Janeiro", "a" * 40, [["linha 1"]])
+    segundo.put(planilha, "Fevereiro", "b" * 40, [["linha 2"]])
+    primeiro.save()
+    segundo.save()
+
+    cache = SheetCache(diretorio)
+    assert cache.get(planilha, "Janeiro", "a" * 40) == [["linha 1"]]
+    assert cache.get(planilha, "Fevereiro", "b" * 40) == [["linha 2"]]
+    assert not os.path.exists(os.path.join(diretorio, SheetCache.LOCK_FILE))
+
+
+def test_prune_apaga_arquivos_fora_do_indice(tmp_path):
+    diretorio = tmp_path / "cache"
+    diretorio.mkdir()
+    antigo, recente = diretorio / "antigo.pkl", diretorio / "recente.pkl"
+    antigo.write_bytes(b"")
+    recente.write_bytes(b"")
+    velho = time.time() - SheetCache.ORPHAN_AGE - 60
+    os.utime(antigo, (velho, velho))
+
+    SheetCache(str(diretorio)).prune()
+
+    # O recente pode ser de um processo que ainda vai gravar o índice
+    assert not antigo.exists()
+    assert recente.exists()
+
+
+def test_diretorio_padrao_fica_no_cache_do_usuario(tmp_path, monkeypatch):
+    monkeypatch.setattr("sys.platform", "linux")
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache_usuario"))
+    atual = tmp_path / "atual"
+    atual.mkdir()
+    monkeypatch.chdir(atual)
+    planilha = tmp_path / "agitel.xlsx"
+    planilha.write_bytes(b"")
+
+    cache = SheetCache()
+    cache.put(planilha, "Janeiro", "a" * 40, [["linha 1"]])
+    cache.save()
+
+    assert cache.directory == str(tmp_path / "cache_usuario" / "le_helper" / "agitel_cache")
+    assert os.path.exists(os.path.join(cache.directory, SheetCache.INDEX_FILE))
+    assert list(atual.iterdir()) == []
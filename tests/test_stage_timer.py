@@ -0,0 +1,45 @@
+import time
+
+from utils.stageTimer import StageTimer
+
+
+def _execucao(megabytes):
+    timer = StageTimer('teste')
+    with timer.span("etapa"):
+        bloco = bytearray(megabytes * 1024 * 1024)
+        bloco[::4096] = b"x" * len(bloco[::4096])
+        time.sleep(0.3)
+        del bloco
+    timer.finish()
+    return timer.peak_rss_mb
+
+
+def test_pico_de_memoria_e_da_execucao_e_nao_do_processo():
+    grande = _execucao(200)
+    pequena = _execucao(1)
+    assert grande is not None and pequena is not None
+    # O pico de uma execução anterior não contamina a seguinte
+    assert grande - pequena > 150
+
+
+def test_timer_sem_memoria_nao_mede():
+    timer = StageTimer('filho', track_memory=False)
+    with timer.span("etapa"):
+        pass
+    timer.finish()
+    assert timer.peak_rss_mb is None
+
+
+def test_report_so_grava_o_trace_quando_habilitado(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    linhas = []
+    timer = StageTimer('teste', track_memory=False)
+    with timer.span("etapa"):
+        pass
+    timer.report(linhas.append)
+    assert linhas[0].startswith("Tempos (teste)") and "etapa" in linhas[1]
+    assert list(tmp_path.iterdir()) == []
+
+    monkeypatch.setattr(StageTimer, 'trace_dir', str(tmp_path / "tempos"))
+    StageTimer('teste', track_memory=False).report(linhas.append)
+    assert len(list((tmp_path / "tempos").iterdir())) == 1
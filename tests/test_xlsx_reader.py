@@ -0,0 +1,97 @@
+import zipfile
+from datetime import datetime
+
+import pytest
+from openpyxl import Workbook
+
+from utils.xlsxReader import open_workbook, XlsxReader, XlsxReaderError, XlsxSheet
+
+# workbook.xml como o Excel grava: extensões em outros namespaces antes e depois das abas
+WORKBOOK_EXCEL = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships" '
+    'xmlns:mc="http://schemas.openxmlformats.org/markup-compatibility/2006" mc:Ignorable="x15 xr xr6 xr10 xr2" '
+    'xmlns:x15="http://schemas.microsoft.com/office/spreadsheetml/2010/11/main" '
+    'xmlns:xr="http://schemas.microsoft.com/office/spreadsheetml/2014/revision" '
+    'xmlns:xr6="http://schemas.microsoft.com/office/spreadsheetml/2016/revision6" '
+    'xmlns:xr10="http://schemas.microsoft.com/office/spreadsheetml/2016/revision10" '
+    'xmlns:xr2="http://schemas.microsoft.com/office/spreadsheetml/2015/revision2">'
+    '<fileVersion appName="xl" lastEdited="7" lowestEdited="7" rupBuild="27328"/>'
+    '<workbookPr defaultThemeVersion="166925"/>'
+    '<mc:AlternateContent xmlns:mc="http://schemas.openxmlformats.org/markup-compatibility/2006">'
+    '<mc:Choice Requires="x15"><x15ac:absPath url="C:\\Users\\Financeiro\\Desktop\\" '
+    'xmlns:x15ac="http://schemas.microsoft.com/office/spreadsheetml/2010/11/ac"/></mc:Choice>'
+    '</mc:AlternateContent>'
+    '<xr:revisionPtr revIDLastSave="0" documentId="8_{6D3A0E8B-1E84-4B43-9B0F-2A1C5C7D1F00}" '
+    'xr6:coauthVersionLast="47" xr6:coauthVersionMax="47" xr10:uidLastSave="{00000000-0000-0000-0000-000000000000}"/>'
+    '<bookViews><workbookView xWindow="-120" yWindow="-120" windowWidth="29040" windowHeight="15840" '
+    'xr2:uid="{8A3C7E45-2B0E-4F3D-9C1B-7E6F5D4C3B2A}"/></bookViews>'
+    '<sheets><sheet name="Chamadas" sheetId="1" r:id="rId1"/></sheets>'
+    '<calcPr calcId="191029"/>'
+    '<extLst><ext uri="{140A7094-0E35-4892-8432-C4D2E57EDEB5}" '
+    'xmlns:x15="http://schemas.microsoft.com/office/spreadsheetml/2010/11/main">'
+    '<x15:workbookPr chartTrackingRefBase="1"/></ext></extLst>'
+    '</workbook>'
+)
+
+
+def _regravar(origem, destino, partes):
+    with zipfile.ZipFile(origem) as entrada, zipfile.ZipFile(destino, "w", zipfile.ZIP_DEFLATED) as saida:
+        for item in entrada.infolist():
+            saida.writestr(item, partes.get(item.filename, entrada.read(item.filename)))
+
+
+@pytest.fixture
+def planilha_excel(tmp_path):
+    """Planilha com as extensões que o Excel grava no workbook.xml e na aba (x14ac, mc:Ignorable)"""
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Chamadas"
+    ws.append(["Data", "Origem", "Duração"])
+    ws.append([datetime(2024, 1, 5, 8, 30), "1130000000", 42])
+    ws.column_dimensions["B"].width = 18
+    base = tmp_path / "openpyxl.xlsx"
+    wb.save(base)
+
+    with zipfile.ZipFile(base) as entrada:
+        aba = entrada.read("xl/worksheets/sheet1.xml").decode("utf-8")
+    aba = aba.replace(
+        '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">',
+        '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships" '
+        'xmlns:mc="http://schemas.openxmlformats.org/markup-compatibility/2006" mc:Ignorable="x14ac xr" '
+        'xmlns:x14ac="http://schemas.microsoft.com/office/spreadsheetml/2009/9/ac" '
+        'xmlns:xr="http://schemas.microsoft.com/office/spreadsheetml/2014/revision" '
+        'xr:uid="{5B1C6F2E-8D4A-4C3B-A1E2-9F8D7C6B5A40}">'
+    ).replace('<row r="2"', '<row r="2" x14ac:dyDescent="0.25"')
+    caminho = tmp_path / "excel.xlsx"
+    _regravar(base, caminho, {"xl/workbook.xml": WORKBOOK_EXCEL, "xl/worksheets/sheet1.xml": aba})
+    return caminho
+
+
+def test_planilha_do_excel_usa_o_leitor_direto(planilha_excel):
+    wb = open_workbook(planilha_excel)
+    try:
+        assert isinstance(wb, XlsxReader)
+        ws = wb.active
+        assert isinstance(ws, XlsxSheet)
+        assert ws.title == "Chamadas"
+        assert list(ws.iter_rows(values_only=True)) == [
+            ("Data", "Origem", "Duração"),
+            (datetime(2024, 1, 5, 8, 30), "1130000000", 42)
+        ]
+        assert ws.column_widths()[1] == 18
+    finally:
+        wb.close()
+
+
+def test_strict_ooxml_cai_para_o_openpyxl(planilha_excel, tmp_path):
+    strict = WORKBOOK_EXCEL.replace(
+        'xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"',
+        'xmlns="http://purl.oclc.org/ooxml/spreadsheetml/main"'
+    )
+    caminho = tmp_path / "strict.xlsx"
+    _regravar(planilha_excel, caminho, {"xl/workbook.xml": strict})
+    with pytest.raises(XlsxReaderError):
+        XlsxReader(caminho)